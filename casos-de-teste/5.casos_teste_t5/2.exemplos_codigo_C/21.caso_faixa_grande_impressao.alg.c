@@ -0,0 +1,33 @@
+/*
+  Comando 'caso' com faixas grandes de valores
+*/
+
+#include <stdio.h>
+#include <stdlib.h>
+
+int main() {
+	int i, n, q;
+	scanf("%d", &q);
+	for (i = 1; i <= q; i++) {
+		scanf("%d", &n);
+		switch (n) {
+			case 0 ... 9:
+				printf("digito");
+				break;
+			case 10 ... 999999:
+				printf("medio");
+				break;
+			case 1000000 ... 2000000000:
+				printf("enorme");
+				break;
+			case 2000000001:
+			case 2000000005 ... 2147483647:
+				printf("topo");
+				break;
+			default:
+				printf("fora");
+		}
+		printf("\n");
+	}
+	return 0;
+}
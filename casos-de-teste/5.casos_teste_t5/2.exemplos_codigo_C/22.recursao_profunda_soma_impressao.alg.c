@@ -0,0 +1,22 @@
+/*
+  Funcao com recursao profunda (soma dos ultimos digitos)
+*/
+
+#include <stdio.h>
+#include <stdlib.h>
+
+int soma(int n) {
+	int acumulador = 0;
+	while (n != 0) {
+		acumulador = acumulador + n % 10;
+		n = n - 1;
+	}
+	return acumulador;
+}
+
+int main() {
+	int n;
+	scanf("%d", &n);
+	printf("%d", soma(n));
+	return 0;
+}
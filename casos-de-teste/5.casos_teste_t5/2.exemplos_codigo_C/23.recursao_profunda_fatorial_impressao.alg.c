@@ -0,0 +1,22 @@
+/*
+  Funcao com recursao em cauda profunda (fatorial com acumulador)
+*/
+
+#include <stdio.h>
+#include <stdlib.h>
+
+int fatorial(int n, int acumulado) {
+	while (n > 1) {
+		acumulado = (acumulado * n) % 1009;
+		n = n - 1;
+	}
+	return acumulado;
+}
+
+int main() {
+	int n, m;
+	scanf("%d", &n);
+	scanf("%d", &m);
+	printf("%d %d", fatorial(n, 1), fatorial(m, 1));
+	return 0;
+}
@@ -0,0 +1,19 @@
+/*
+  Variavel real que estoura para infinito antes de qualquer leitura
+*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+
+int main() {
+	float z, b;
+	z = 1.5;
+	b = 3.0;
+	z = z + pow(1.28 + b*z, 3);
+	z = z + pow(1.28 + b*z, 3);
+	z = z + pow(1.28 + b*z, 3);
+	z = z + pow(1.28 + b*z, 3);
+	printf("%f %f", z, -z);
+	return 0;
+}
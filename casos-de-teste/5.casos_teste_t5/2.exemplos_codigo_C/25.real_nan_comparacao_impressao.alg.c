@@ -0,0 +1,31 @@
+/*
+  Divisao 0/0 gera NaN: toda comparacao com NaN e falsa, inclusive a inversa
+*/
+
+#include <stdio.h>
+#include <stdlib.h>
+
+int main() {
+	float x, y, z, w;
+	int n;
+	scanf("%f", &x);
+	scanf("%f", &y);
+	z = x / y;
+	if (z < 1.0)
+		printf("menor\n");
+	else
+		printf("nao menor\n");
+	if (z >= 1.0)
+		printf("maior ou igual\n");
+	else
+		printf("nao maior ou igual\n");
+	n = 0;
+	while (z != z && n < 2)
+		n = n + 1;
+	printf("%d\n", n);
+	n = 0;
+	for (w = z; w <= 3.0; w++)
+		n = n + 1;
+	printf("%d\n", n);
+	return 0;
+}
@@ -0,0 +1,25 @@
+/*
+  Vetor local grande demais para a pilha: cada chamada comeca com ele zerado
+*/
+
+#include <stdio.h>
+#include <stdlib.h>
+
+int grande(int k) {
+	int *v = calloc(100000, sizeof *v);
+	int i, soma;
+	for (i = 0; i <= k - 1; i++)
+		v[i] = v[i] + 1;
+	soma = v[0] + v[1] + v[2];
+	free(v);
+	return soma;
+}
+
+int main() {
+	int k;
+	scanf("%d", &k);
+	printf("%d ", grande(k));
+	k = k - 1;
+	printf("%d\n", grande(k));
+	return 0;
+}
@@ -0,0 +1,19 @@
+/*
+  Somas de constantes inteiras que passam de INT_MAX dao a volta em 32 bits
+*/
+
+#include <stdio.h>
+#include <stdlib.h>
+
+int dobro(int a) {
+	return (int) ((unsigned) a + (unsigned) a);
+}
+
+int main() {
+	int x, y, z;
+	scanf("%d", &z);
+	x = 2147483647;
+	y = (int) ((unsigned) x + 1u);
+	printf("%d %d %d\n", y, dobro(2147483647), (int) ((unsigned) z + 2u * 2147483647u));
+	return 0;
+}
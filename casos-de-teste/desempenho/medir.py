@@ -0,0 +1,103 @@
+"""Medidas das otimizações do compilador.
+
+Cada programa <nome>.alg desta pasta é compilado em variantes (opções do
+compilador.py ou um C escrito à mão com a tradução de antes da otimização) e
+cada executável roda com a entrada <nome>.in. Mostra o melhor de REPETICOES
+tempos de cada variante, a diferença para a primeira e avisa se alguma saída
+difere da dela.
+
+Uso: python3 casos-de-teste/desempenho/medir.py [nome ...]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+COMPILADOR = os.path.join(PASTA, '..', '..', 'compilador.py')
+REPETICOES = 3
+
+# nome do programa -> variantes (rótulo, opções do compilador.py ou arquivo .c da pasta)
+BENCHMARKS = {
+    'pot': [
+        ('pow da libm', 'pot_pow.c'),
+        ('pot() pelo tipo do expoente', []),
+    ],
+    'fib': [
+        ('--memoize=off', ['--memoize=off']),
+        ('--memoize=auto', ['--memoize=auto']),
+    ],
+    'texto': [
+        ('char[80] com strcpy', 'texto_strcpy.c'),
+        ('literal com tamanho', []),
+    ],
+    'registros': [
+        ('--layout=aos', ['--layout=aos']),
+        ('--layout=soa', ['--layout=soa']),
+    ],
+    'paralelo': [
+        ('serial', []),
+        ('--parallel', ['--parallel']),
+    ],
+}
+
+
+def compilar(nome, numero, variante, pasta):
+    """Gera em pasta o executável da variante; devolve o caminho ou None se falhou"""
+    executavel = os.path.join(pasta, f'{nome}_{numero}.out')
+    if isinstance(variante, str):
+        resultado = subprocess.run(['gcc', os.path.join(PASTA, variante), '-o', executavel, '-lm'],
+                                   capture_output=True, text=True)
+    else:
+        arquivo_c = executavel[:-len('.out')] + '.c'
+        resultado = subprocess.run([sys.executable, COMPILADOR, *variante, os.path.join(PASTA, f'{nome}.alg'),
+                                    arquivo_c], capture_output=True, text=True)
+    if resultado.returncode != 0 or not os.path.exists(executavel):
+        return None
+    return executavel
+
+
+def executar(executavel, entrada):
+    """Melhor tempo de REPETICOES execuções e a saída da última"""
+    melhor, saida = None, None
+    for _ in range(REPETICOES):
+        with open(entrada, 'rb') as f:
+            inicio = time.perf_counter()
+            saida = subprocess.run([executavel], stdin=f, capture_output=True).stdout
+            segundos = time.perf_counter() - inicio
+        melhor = segundos if melhor is None else min(melhor, segundos)
+    return melhor, saida
+
+
+def medir(nome, variantes):
+    linhas = [f'{nome} (entrada {nome}.in):']
+    base, saida_base = None, None
+    with tempfile.TemporaryDirectory() as pasta:
+        for numero, (rotulo, variante) in enumerate(variantes):
+            executavel = compilar(nome, numero, variante, pasta)
+            if executavel is None:
+                linhas.append(f'  - {rotulo}: erro na compilacao')
+                continue
+            segundos, saida = executar(executavel, os.path.join(PASTA, f'{nome}.in'))
+            if base is None:
+                base, saida_base = segundos, saida
+                linhas.append(f'  - {rotulo}: {segundos:.3f}s')
+            else:
+                linhas.append(f'  - {rotulo}: {segundos:.3f}s ({(segundos - base) / base * 100:+.1f}%)')
+            if saida != saida_base:
+                linhas.append('    aviso: a saida difere da primeira variante')
+    print('\n'.join(linhas))
+
+
+def main():
+    nomes = sys.argv[1:] or list(BENCHMARKS)
+    for nome in nomes:
+        if nome not in BENCHMARKS:
+            sys.exit(f'benchmark desconhecido: {nome} (existem: {", ".join(BENCHMARKS)})')
+        medir(nome, BENCHMARKS[nome])
+
+
+if __name__ == '__main__':
+    main()
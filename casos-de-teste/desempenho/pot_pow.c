@@ -0,0 +1,21 @@
+/*
+  pot.alg traduzido com pow da libm, como antes de pot() ser baixado pelo
+  tipo do expoente
+*/
+
+#include <stdio.h>
+#include <math.h>
+
+int main() {
+	int i, n, a, b, k, s;
+	scanf("%d", &n);
+	s = 0;
+	for (i = 1; i <= n; i++) {
+		a = i % 7;
+		b = i % 5;
+		k = i % 13;
+		s = (s + (int) pow(a, 3) + (int) pow(b, k) + (int) pow(a + b, 2)) % 1000003;
+	}
+	printf("%d\n", s);
+	return 0;
+}
@@ -0,0 +1,35 @@
+/*
+  texto.alg traduzido como antes do runtime de literais: char[80], leitura com
+  fgets e strcspn, atribuicoes com strcpy e subLiteral copiado com strncpy
+*/
+
+#include <stdio.h>
+#include <string.h>
+
+int main() {
+	char s[80], t[80], u[80], temporario[80], fatia[80];
+	int i, n, iguais;
+	fgets(s, 80, stdin);
+	s[strcspn(s, "\n")] = '\0';
+	scanf("%d", &n);
+	iguais = 0;
+	for (i = 1; i <= n; i++) {
+		strcpy(t, s);
+		strncpy(u, t + 10, 40);
+		u[40] = '\0';
+		strcpy(temporario, u);
+		strcat(temporario, "|");
+		strncat(temporario, s, 30);
+		strcpy(t, temporario);
+		strncpy(fatia, t, 40);
+		fatia[40] = '\0';
+		if (strcmp(fatia, u) == 0)
+			iguais = iguais + 1;
+		strncpy(temporario, s + 1, 59);
+		temporario[59] = '\0';
+		strncat(temporario, s, 1);
+		strcpy(s, temporario);
+	}
+	printf("%d %s\n", iguais, t);
+	return 0;
+}
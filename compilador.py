@@ -2,7 +2,19 @@
 
 import sys
 import os
+import argparse
+import array
+import hashlib
+import json
+import marshal
+import math
+import fractions
+import re
+import string
+import struct
 import subprocess
+import tempfile
+import time
 from antlr4 import *
 from antlr4.error.ErrorListener import ErrorListener
 from LALexer import LALexer
@@ -12,6 +24,413 @@ from LAListener import LAListener
 # Lista de tipos válidos (de acordo com a gramática)
 TIPOS_VALIDOS = {'literal', 'inteiro', 'real', 'logico'}
 
+# Faixa do int de 32 bits do C gerado (limite para dobrar constantes inteiras)
+INT_MIN, INT_MAX = -2**31, 2**31 - 1
+
+# Faixas de um caso com até este número de valores viram um 'case' por valor
+LIMITE_CASES_POR_VALOR = 4
+
+# pot(x, k) com k constante até este valor vira x*x*...*x
+LIMITE_POT_INLINE = 4
+
+# Funções cujo corpo é só 'retorne expr' com até este número de tokens são expandidas
+# no lugar da chamada
+LIMITE_TOKENS_INLINE = 24
+
+# Vetores com mais bytes que isto saem da pilha (estáticos no main, heap nos subprogramas)
+LIMITE_VETOR_PILHA = 1 << 16
+
+# Memoização: tabela densa para funções de um parâmetro inteiro (argumentos em
+# [0, TAMANHO_MEMO_DENSO)) e cache de mapeamento direto para as demais
+TAMANHO_MEMO_DENSO = 1 << 16
+TAMANHO_MEMO_CACHE = 4096
+
+# Laços para com número de iterações conhecido: até LIMITE_DESENROLAR_COMPLETO
+# iterações (e LIMITE_TOKENS_DESENROLADOS tokens copiados) viram cópias do corpo;
+# os maiores, com corpo pequeno, executam FATOR_DESENROLAR cópias por volta
+LIMITE_DESENROLAR_COMPLETO = 8
+LIMITE_TOKENS_DESENROLADOS = 160
+FATOR_DESENROLAR = 4
+
+# --parallel: laços com menos iterações que isto continuam seriais
+LIMITE_ITERACOES_PARALELO = 10000
+
+# Avaliação parcial: o interpretador executa na compilação até este número de
+# comandos/iterações, com até LIMITE_SAIDA_AVALIACAO bytes escritos e vetores de
+# até LIMITE_ELEMENTOS_AVALIACAO elementos
+LIMITE_PASSOS_AVALIACAO = 50000
+LIMITE_SAIDA_AVALIACAO = 1 << 16
+LIMITE_ELEMENTOS_AVALIACAO = 1 << 16
+
+# --run: profundidade de chamadas do Python (cada chamada LA usa uma dúzia ou
+# mais): umas 300 mil chamadas LA aninhadas, mais do que a pilha padrão de 8 MB
+# dá ao binário do gcc. O Interpretador para logo ao passar de
+# LIMITE_CHAMADAS_ARVORE chamadas aninhadas, antes de esgotar a pilha do Python
+LIMITE_RECURSAO_EXECUCAO = 1 << 22
+LIMITE_CHAMADAS_ARVORE = 1 << 18
+
+# --run com bytecode: programas compilados guardados em PASTA_BYTECODE (ao lado
+# do fonte); MARCA_BYTECODE/VERSAO_BYTECODE identificam o formato do arquivo.
+# A máquina virtual aceita até LIMITE_CHAMADAS_BYTECODE chamadas aninhadas
+PASTA_BYTECODE = '.labc'
+MARCA_BYTECODE = b'LABC'
+VERSAO_BYTECODE = 1
+LIMITE_CHAMADAS_BYTECODE = 1 << 20
+
+# --pgo: perfis guardados em PASTA_PERFIS (ao lado do .c) por hash do programa;
+# cada execução de treino/medida tem até LIMITE_SEGUNDOS_EXECUCAO segundos e o
+# tempo relatado é o melhor de REPETICOES_MEDIDA passadas pelas entradas
+PASTA_PERFIS = '.pgo'
+LIMITE_SEGUNDOS_EXECUCAO = 10
+REPETICOES_MEDIDA = 3
+
+# --autotune: configurações do gcc experimentadas, das mais simples para as mais
+# agressivas; uma só vence a atual se for mais rápida por mais que o ruído medido
+# (no mínimo LIMIAR_RUIDO). O vencedor de cada programa fica em ARQUIVO_AJUSTES
+CONFIGURACOES_AUTOTUNE = [
+    (),
+    ('-O2',),
+    ('-O3',),
+    ('-O2', '-funroll-loops'),
+    ('-O2', '-march=native'),
+    ('-O3', '-march=native'),
+    ('-O3', '-march=native', '-funroll-loops'),
+    ('-O2', '-flto'),
+    ('-O3', '-march=native', '-flto'),
+]
+LIMIAR_RUIDO = 0.03
+ARQUIVO_AJUSTES = '.autotune.json'
+
+# Funções auxiliares emitidas só quando usadas (exponenciação rápida por quadrados
+# e o runtime de entrada/saída com buffer)
+AUXILIARES_C = {
+    'pot_inteiro': [
+        'static inline int pot_inteiro(int base, int expoente) {',
+        '\tunsigned int resultado = 1, fator = (unsigned int) base;',
+        '\tif (expoente < 0)',
+        '\t\treturn base == 1 ? 1 : base == -1 ? (expoente % 2 ? -1 : 1) : 0;',
+        '\twhile (expoente > 0) {',
+        '\t\tif (expoente & 1)',
+        '\t\t\tresultado *= fator;',
+        '\t\tfator *= fator;',
+        '\t\texpoente >>= 1;',
+        '\t}',
+        '\treturn (int) resultado;',
+        '}',
+    ],
+    'pot_real': [
+        'static inline double pot_real(double base, int expoente) {',
+        '\tdouble resultado = 1.0;',
+        '\tunsigned int n = expoente < 0 ? 0u - (unsigned int) expoente : (unsigned int) expoente;',
+        '\tif (expoente < 0)',
+        '\t\tbase = 1.0 / base;',
+        '\twhile (n > 0) {',
+        '\t\tif (n & 1)',
+        '\t\t\tresultado *= base;',
+        '\t\tbase *= base;',
+        '\t\tn >>= 1;',
+        '\t}',
+        '\treturn resultado;',
+        '}',
+    ],
+    'alocar_vetor': [
+        'static void *alocar_vetor(size_t elementos, size_t tamanho) {',
+        '\tvoid *vetor = calloc(elementos, tamanho);',
+        '\tif (vetor == NULL) {',
+        '\t\tfputs("memoria insuficiente\\n", stderr);',
+        '\t\texit(1);',
+        '\t}',
+        '\treturn vetor;',
+        '}',
+    ],
+    # E/S com buffer próprio: a saída acumula em memória e vai para o fd 1 ao
+    # encher, antes de cada leitura que precise esperar pela entrada e no fim do main
+    'saida': [
+        'static char saida_buffer[1 << 16];',
+        'static size_t saida_tamanho;',
+        '',
+        'static void descarregar_saida(void) {',
+        '\tsize_t escrito = 0;',
+        '\twhile (escrito < saida_tamanho) {',
+        '\t\tssize_t n = write(1, saida_buffer + escrito, saida_tamanho - escrito);',
+        '\t\tif (n <= 0)',
+        '\t\t\tbreak;',
+        '\t\tescrito += (size_t) n;',
+        '\t}',
+        '\tsaida_tamanho = 0;',
+        '}',
+        '',
+        'static void escreva_bytes(const char *texto, size_t n) {',
+        '\twhile (n > 0) {',
+        '\t\tsize_t parte;',
+        '\t\tif (saida_tamanho == sizeof saida_buffer)',
+        '\t\t\tdescarregar_saida();',
+        '\t\tparte = sizeof saida_buffer - saida_tamanho;',
+        '\t\tif (parte > n)',
+        '\t\t\tparte = n;',
+        '\t\tmemcpy(saida_buffer + saida_tamanho, texto, parte);',
+        '\t\tsaida_tamanho += parte;',
+        '\t\ttexto += parte;',
+        '\t\tn -= parte;',
+        '\t}',
+        '}',
+        '',
+        '#define ESCREVA_CONSTANTE(texto) escreva_bytes(texto, sizeof texto - 1)',
+    ],
+    'escreva_cadeia': [
+        'static void escreva_cadeia(const char *texto) {',
+        '\tescreva_bytes(texto, strlen(texto));',
+        '}',
+    ],
+    'escreva_inteiro': [
+        'static void escreva_inteiro(int valor) {',
+        '\tchar digitos[12];',
+        '\tsize_t i = sizeof digitos;',
+        '\tunsigned int n = valor < 0 ? 0u - (unsigned int) valor : (unsigned int) valor;',
+        '\tdo {',
+        "\t\tdigitos[--i] = (char) ('0' + n % 10);",
+        '\t\tn /= 10;',
+        '\t} while (n > 0);',
+        '\tif (valor < 0)',
+        "\t\tdigitos[--i] = '-';",
+        '\tescreva_bytes(digitos + i, sizeof digitos - i);',
+        '}',
+    ],
+    # Mesmo texto de printf("%f"): o valor binário exato vezes 10^6, arredondado
+    # para o par mais próximo, em aritmética de 128 bits; valores fora dessa faixa,
+    # infinito e NaN ficam com o snprintf
+    'escreva_real': [
+        'static void escreva_real(double valor) {',
+        '\tuint64_t bits, mantissa;',
+        '\tint expoente;',
+        '\tunsigned __int128 escalado;',
+        '\tchar digitos[48];',
+        '\tsize_t i = sizeof digitos;',
+        '\tint casa;',
+        '\tmemcpy(&bits, &valor, sizeof bits);',
+        '\texpoente = (int) ((bits >> 52) & 0x7ff);',
+        '\tmantissa = bits & ((UINT64_C(1) << 52) - 1);',
+        '\tif (expoente == 0x7ff || expoente > 1075 + 54) {',
+        '\t\tchar texto[320];',
+        '\t\tint n = snprintf(texto, sizeof texto, "%f", valor);',
+        '\t\tescreva_bytes(texto, (size_t) n);',
+        '\t\treturn;',
+        '\t}',
+        '\tif (expoente == 0)',
+        '\t\texpoente = 1;',
+        '\telse',
+        '\t\tmantissa |= UINT64_C(1) << 52;',
+        '\texpoente -= 1075;',
+        '\tescalado = (unsigned __int128) mantissa * 1000000u;',
+        '\tif (expoente >= 0) {',
+        '\t\tescalado <<= expoente;',
+        '\t} else if (expoente <= -128) {',
+        '\t\tescalado = 0;',
+        '\t} else {',
+        '\t\tunsigned __int128 metade = (unsigned __int128) 1 << (-expoente - 1);',
+        '\t\tunsigned __int128 resto = escalado & ((metade << 1) - 1);',
+        '\t\tescalado >>= -expoente;',
+        '\t\tif (resto > metade || (resto == metade && (escalado & 1)))',
+        '\t\t\tescalado++;',
+        '\t}',
+        '\tfor (casa = 0; casa < 6; casa++) {',
+        "\t\tdigitos[--i] = (char) ('0' + (int) (escalado % 10));",
+        '\t\tescalado /= 10;',
+        '\t}',
+        "\tdigitos[--i] = '.';",
+        '\tdo {',
+        "\t\tdigitos[--i] = (char) ('0' + (int) (escalado % 10));",
+        '\t\tescalado /= 10;',
+        '\t} while (escalado > 0);',
+        '\tif (bits >> 63)',
+        "\t\tdigitos[--i] = '-';",
+        '\tescreva_bytes(digitos + i, sizeof digitos - i);',
+        '}',
+    ],
+    # Entrada lida em blocos do fd 0; espiar_entrada só descarrega a saída quando
+    # o buffer acabou (o prompt aparece antes de o programa esperar pelo usuário)
+    'entrada': [
+        'static char entrada_buffer[1 << 16];',
+        'static size_t entrada_inicio, entrada_fim;',
+        '',
+        'static int espiar_entrada(void) {',
+        '\tif (entrada_inicio == entrada_fim) {',
+        '\t\tssize_t n;',
+        '\t\tdescarregar_saida();',
+        '\t\tn = read(0, entrada_buffer, sizeof entrada_buffer);',
+        '\t\tif (n <= 0)',
+        '\t\t\treturn EOF;',
+        '\t\tentrada_inicio = 0;',
+        '\t\tentrada_fim = (size_t) n;',
+        '\t}',
+        '\treturn (unsigned char) entrada_buffer[entrada_inicio];',
+        '}',
+        '',
+        'static inline int pular_espacos(void) {',
+        '\tint c;',
+        "\twhile ((c = espiar_entrada()) == ' ' || (c >= '\\t' && c <= '\\r'))",
+        '\t\tentrada_inicio++;',
+        '\treturn c;',
+        '}',
+    ],
+    # Como scanf("%d"): sem dígitos, a variável fica como estava
+    'leia_inteiro': [
+        'static void leia_inteiro(int *destino) {',
+        '\tint c = pular_espacos(), negativo = 0;',
+        '\tunsigned int valor = 0;',
+        "\tif (c == '-' || c == '+') {",
+        "\t\tnegativo = c == '-';",
+        '\t\tentrada_inicio++;',
+        '\t\tc = espiar_entrada();',
+        '\t}',
+        "\tif (c < '0' || c > '9')",
+        '\t\treturn;',
+        "\twhile (c >= '0' && c <= '9') {",
+        "\t\tvalor = valor * 10 + (unsigned int) (c - '0');",
+        '\t\tentrada_inicio++;',
+        '\t\tc = espiar_entrada();',
+        '\t}',
+        '\t*destino = negativo ? (int) (0u - valor) : (int) valor;',
+        '}',
+    ],
+    # O número é recortado à mão; a conversão fica com strtof, que arredonda
+    # corretamente como o scanf("%f")
+    'leia_real': [
+        'static int guardar_caractere(char *texto, size_t *n, size_t tamanho, int c) {',
+        '\tif (*n + 1 < tamanho)',
+        '\t\ttexto[(*n)++] = (char) c;',
+        '\tentrada_inicio++;',
+        '\treturn espiar_entrada();',
+        '}',
+        '',
+        'static void leia_real(float *destino) {',
+        '\tchar texto[64];',
+        '\tsize_t n = 0;',
+        '\tint c = pular_espacos(), digitos = 0;',
+        "\tif (c == '-' || c == '+')",
+        '\t\tc = guardar_caractere(texto, &n, sizeof texto, c);',
+        "\tfor (; c >= '0' && c <= '9'; digitos++)",
+        '\t\tc = guardar_caractere(texto, &n, sizeof texto, c);',
+        "\tif (c == '.') {",
+        '\t\tc = guardar_caractere(texto, &n, sizeof texto, c);',
+        "\t\tfor (; c >= '0' && c <= '9'; digitos++)",
+        '\t\t\tc = guardar_caractere(texto, &n, sizeof texto, c);',
+        '\t}',
+        "\tif (digitos > 0 && (c == 'e' || c == 'E')) {",
+        '\t\tc = guardar_caractere(texto, &n, sizeof texto, c);',
+        "\t\tif (c == '-' || c == '+')",
+        '\t\t\tc = guardar_caractere(texto, &n, sizeof texto, c);',
+        "\t\twhile (c >= '0' && c <= '9')",
+        '\t\t\tc = guardar_caractere(texto, &n, sizeof texto, c);',
+        '\t}',
+        '\tif (digitos == 0)',
+        '\t\treturn;',
+        "\ttexto[n] = '\\0';",
+        '\t*destino = strtof(texto, NULL);',
+        '}',
+    ],
+    # Cadeias com o tamanho guardado ao lado dos dados (MAX_LITERAL é definido pelo
+    # gerador): tamanho em O(1), cópias com memcpy e visões sem cópia para
+    # constantes e subLiteral
+    'literal': [
+        'typedef struct {',
+        '\tint tamanho;',
+        '\tchar dados[MAX_LITERAL + 1];',
+        '} literal;',
+        '',
+        'typedef struct {',
+        '\tconst char *dados;',
+        '\tint tamanho;',
+        '} literal_visao;',
+        '',
+        '#define LITERAL_CONSTANTE(texto) ((literal_visao) {texto, (int) sizeof texto - 1})',
+        '',
+        'static inline literal_visao visao_literal(const literal *cadeia) {',
+        '\treturn (literal_visao) {cadeia->dados, cadeia->tamanho};',
+        '}',
+        '',
+        '/* subLiteral(cadeia, inicio, tamanho): posições a partir de 1, limitadas à cadeia */',
+        'static inline literal_visao visao_fatia(literal_visao cadeia, int inicio, int tamanho) {',
+        '\tinicio = inicio < 1 ? 0 : inicio - 1;',
+        '\tif (inicio > cadeia.tamanho)',
+        '\t\tinicio = cadeia.tamanho;',
+        '\tif (tamanho > cadeia.tamanho - inicio)',
+        '\t\ttamanho = cadeia.tamanho - inicio;',
+        '\tif (tamanho < 0)',
+        '\t\ttamanho = 0;',
+        '\treturn (literal_visao) {cadeia.dados + inicio, tamanho};',
+        '}',
+        '',
+        'static inline void literal_atribuir(literal *destino, literal_visao origem) {',
+        '\tint n = origem.tamanho < MAX_LITERAL ? origem.tamanho : MAX_LITERAL;',
+        '\tmemmove(destino->dados, origem.dados, (size_t) n);',
+        "\tdestino->dados[n] = '\\0';",
+        '\tdestino->tamanho = n;',
+        '}',
+        '',
+        'static inline void literal_anexar(literal *destino, literal_visao origem) {',
+        '\tint livre = MAX_LITERAL - destino->tamanho;',
+        '\tint n = origem.tamanho < livre ? origem.tamanho : livre;',
+        '\tmemcpy(destino->dados + destino->tamanho, origem.dados, (size_t) n);',
+        '\tdestino->tamanho += n;',
+        "\tdestino->dados[destino->tamanho] = '\\0';",
+        '}',
+        '',
+        'static inline int literal_igual(literal_visao a, literal_visao b) {',
+        '\treturn a.tamanho == b.tamanho && memcmp(a.dados, b.dados, (size_t) a.tamanho) == 0;',
+        '}',
+        '',
+        'static inline int literal_comparar(literal_visao a, literal_visao b) {',
+        '\tint resultado = memcmp(a.dados, b.dados, (size_t) (a.tamanho < b.tamanho ? a.tamanho : b.tamanho));',
+        '\treturn resultado != 0 ? resultado : (a.tamanho > b.tamanho) - (a.tamanho < b.tamanho);',
+        '}',
+    ],
+    'escreva_literal': [
+        'static void escreva_literal(literal_visao cadeia) {',
+        '\tescreva_bytes(cadeia.dados, (size_t) cadeia.tamanho);',
+        '}',
+    ],
+    # Como fgets + remoção do '\n': lê até o fim da linha ou MAX_LITERAL caracteres
+    'leia_literal': [
+        'static void leia_literal(literal *destino) {',
+        '\tint n = 0, c = 0;',
+        '\twhile (n < MAX_LITERAL && (c = espiar_entrada()) != EOF) {',
+        '\t\tentrada_inicio++;',
+        "\t\tif (c == '\\n')",
+        '\t\t\tbreak;',
+        '\t\tdestino->dados[n++] = (char) c;',
+        '\t}',
+        "\tif (n > 0 || c == '\\n') {",
+        "\t\tdestino->dados[n] = '\\0';",
+        '\t\tdestino->tamanho = n;',
+        '\t}',
+        '}',
+    ],
+}
+
+# Auxiliares que dependem de outros (emitidos antes) e cabeçalhos extras de cada um
+DEPENDENCIAS_AUXILIARES = {
+    'escreva_cadeia': ['saida'],
+    'escreva_inteiro': ['saida'],
+    'escreva_real': ['saida'],
+    'entrada': ['saida'],
+    'leia_inteiro': ['entrada'],
+    'leia_real': ['entrada'],
+    'escreva_literal': ['saida', 'literal'],
+    'leia_literal': ['entrada', 'literal'],
+}
+CABECALHOS_AUXILIARES = {
+    'saida': ['<unistd.h>'],
+    'escreva_real': ['<stdint.h>'],
+}
+
+# Função do runtime usada por escreva/leia para cada formato do printf/scanf
+ESCRITA_POR_FORMATO = {'%d': 'escreva_inteiro', '%f': 'escreva_real', '%s': 'escreva_cadeia'}
+LEITURA_POR_FORMATO = {'%d': 'leia_inteiro', '%f': 'leia_real'}
+
+# Caracteres de uma variável literal quando --max-literal não é dado (o antigo char[80])
+MAX_LITERAL_PADRAO = 79
+
 class MeuErroListener(ErrorListener):
     def __init__(self):
         super(MeuErroListener, self).__init__()
@@ -142,7 +561,16 @@ class AnalisadorSemantico(LAListener):
 
     def enterDeclaracao(self, ctx):
         """Processa declaração de variáveis"""
-        for var_ctx in ctx.lista_variaveis().variavel():
+        self.registrar_variaveis(ctx.lista_variaveis())
+
+    def enterDeclaracoes_locais(self, ctx):
+        """Processa as declarações locais de funções e procedimentos"""
+        for lista in ctx.lista_variaveis():
+            self.registrar_variaveis(lista)
+
+    def registrar_variaveis(self, lista_variaveis):
+        """Registra as variáveis de uma lista de declaração no escopo atual"""
+        for var_ctx in lista_variaveis.variavel():
             tipo_ctx = var_ctx.tipo()
             
             # Verifica se é um registro inline ou tipo simples
@@ -315,6 +743,12 @@ class AnalisadorSemantico(LAListener):
         for exp in ctx.expressao():
             self.tipo_expressao(exp)
     
+    def enterDeclaracao_constante(self, ctx):
+        """Registra constantes para que possam ser usadas em expressões"""
+        nome = ctx.IDENT().getText()
+        self.constantes[nome] = ctx.valor_constante().getText()
+        self.simbolos[nome] = ctx.tipo_base().getText()
+
     def enterDeclaracao_procedimento(self, ctx):
         """Processa declaração de procedimento para análise semântica"""
         nome = ctx.IDENT().getText()
@@ -342,6 +776,26 @@ class AnalisadorSemantico(LAListener):
         """Finaliza análise semântica do procedimento"""
         self.escopo_atual = 'global'
         self.simbolos_locais = {}
+
+    def enterDeclaracao_funcao(self, ctx):
+        """Processa declaração de função para análise semântica"""
+        nome = ctx.IDENT().getText()
+        self.funcoes[nome] = {'parametros': [], 'retorno': ctx.tipo_base().getText()}
+
+        # Parâmetros fazem parte do escopo local
+        if ctx.parametros():
+            for param_ctx in ctx.parametros().parametro():
+                param_nome = param_ctx.IDENT().getText()
+                param_tipo = (param_ctx.tipo_base() or param_ctx.tipo_identificado()).getText()
+                self.funcoes[nome]['parametros'].append((param_nome, param_tipo))
+                self.simbolos_locais[param_nome] = param_tipo
+
+        self.escopo_atual = nome
+
+    def exitDeclaracao_funcao(self, ctx):
+        """Finaliza análise semântica da função"""
+        self.escopo_atual = 'global'
+        self.simbolos_locais = {}
     
     def enterChamada_procedimento(self, ctx):
         """Verifica chamada de procedimento"""
@@ -454,447 +908,1532 @@ class AnalisadorSemantico(LAListener):
             self.erros.append(f"Linha {token.line}: indice de array deve ser inteiro")
 
 class GeradorCodigo(LAListener):
-    def __init__(self):
+    def __init__(self, eliminar_mortos=True, memoizar=True, max_literal=MAX_LITERAL_PADRAO, layout='aos',
+                 paralelo=False, marcar_linhas=False, fundir_lacos=True,
+                 desenrolar=True, eliminar_subexpressoes=True, avaliar_parcial=True):
         self.codigo = []
         self.declaracoes = []
         self.defines = []  # Para #define das constantes
         self.tipos_structs = []  # Para typedef structs
         self.funcoes = []
         self.procedimentos = []
-        self.tabela_simbolos = {}
+        self.tabela_simbolos = {}  # nome -> tipo C
+        self.tipos_variaveis = {}  # nome -> tipo LA
+        self.vetores = {}  # nome -> tamanho do vetor
+        self.campos_registro = {}  # tipo registro -> {campo: tipo LA}
+        self.tipos_alias = {}  # tipo declarado com 'tipo X: Y' -> Y
+        self.tipos_funcoes = {}  # nome da função -> tipo LA de retorno
         self.escopo_atual = 'global'
         self.em_funcao = False
         self.em_procedimento = False
-        self.nivel_escopo = 0
-        self.constantes = {}
-        self.contextos_processados = set()  # Para evitar processamento duplo
-        self.bloqueando_automatico = False  # Flag para bloquear processamento automático
-        
-    def adicionar_codigo(self, linha, indent=0):
-        """Adiciona uma linha de código com indentação"""
-        linha_formatada = '\t' * indent + linha
-        
+        self.constantes = {}  # nome -> (valor, tipo C)
+        self.valores_conhecidos = {}  # Propagação: variável -> (valor, tipo C)
+        self.enderecados = set()  # Variáveis que têm o endereço tomado (&x)
+        self.profundidade_comando = 0  # Comandos aninhados são gerados recursivamente
+        self.bloco_encerrado = False  # Já houve um retorne no corpo atual
+        self.auxiliares = []  # Funções auxiliares usadas (chaves de AUXILIARES_C)
+        self.identificadores = set()  # Todos os nomes do programa (evita colisão com temporários)
+        self.funcoes_puras = set()  # Funções sem efeitos colaterais (podem sair de laços)
+        self.funcoes_inline = {}  # nome -> (parâmetros, expressão retornada, tipo de retorno)
+        self.expandindo = set()  # Funções sendo expandidas (evita expansão recursiva)
+        self.argumentos_inline = {}  # parâmetro -> (texto, constante) durante uma expansão
+        self.prototipos = {}  # nome do subprograma -> protótipo static
+        self.modos_parametros = {}  # subprograma -> modo de passagem de cada parâmetro
+        self.parametros_ponteiro = set()  # Parâmetros registro recebidos por ponteiro
+        self.recursao = None  # Autochamadas em cauda da função atual (ver analisar_recursao)
+        self.memoizar = memoizar
+        self.max_literal = max_literal  # Caracteres que cabem em uma variável literal
+        self.funcoes_memo = {}  # função memoizada -> nome da função que faz o cálculo
+        self.layout = layout  # 'soa': vetores de registros viram um vetor por campo
+        self.vetores_soa = {}  # (escopo, vetor) -> {campo: vetor do campo}
+        self.layouts_registros = []  # (registro, sizeof, bytes de preenchimento)
+        self.paralelo = paralelo  # Laços para independentes ganham #pragma omp parallel for
+        self.marcar_linhas = marcar_linhas  # Comentário com a linha LA em cada laço (--vec-report)
+        self.funcoes_reentrantes = set()  # Funções que podem ser chamadas de várias threads
+        self.em_paralelo = False  # Gerando o corpo de um laço paralelo
+        self.usa_openmp = False  # Algum laço foi paralelizado (gcc precisa de -fopenmp)
+        self.fundir_lacos = fundir_lacos  # Laços para adjacentes com os mesmos limites viram um só
+        self.lacos_fundidos = set()  # id dos comandos para já gerados dentro do anterior
+        self.estatisticas = {}  # passo de otimização -> onde foi aplicado (--pass-stats)
+        self.desenrolar = desenrolar  # Laços para com limites constantes são desenrolados
+        self.eliminar_subexpressoes = eliminar_subexpressoes  # Subexpressões repetidas viram temporários
+        self.subexpressoes = []  # (último comando, ids dos nós) das subexpressões comuns em uso
+        self.avaliar_parcial = avaliar_parcial  # O que não depende da entrada é executado na compilação
+        self.avaliacao = None  # Interpretador parado no fim do prefixo avaliado do algoritmo
+        self.ponteiros_avaliados = []  # (ponteiro, alvo) que o prefixo avaliado deixou apontando
+        self.estado_emitido = False  # Saída e ponteiros do prefixo já foram gerados
+        self.programa = None
+        self.subprograma = None  # Contexto do subprograma sendo gerado
+        self.subprogramas_removidos = set()
+        self.subprogramas_recursivos = set()
+        self.temporarios = []  # Declarações de temporários do subprograma atual
+        self.posicao_temporarios = None  # Onde os temporários do subprograma são declarados
+        self.substituicoes = {}  # id do nó da expressão -> temporário que guarda seu valor
+        self.escrita_constante = None  # Última linha ESCREVA_CONSTANTE (para juntar a seguinte)
+        self.usa_math = False  # Precisa de <math.h> (pow com expoente real)
+
+        # Eliminação de código morto
+        self.eliminar_mortos = eliminar_mortos
+        self.usos = {}  # escopo -> variáveis lidas
+        self.coletores_leitura = []  # pilha de conjuntos de leituras (lado direito de atribuições)
+        self.definicoes = []  # (escopo, variável, leituras, posição) de atribuições removíveis
+        self.posicoes_declaracao = []  # (escopo, variável, posição)
+        self.chamadas = {}  # escopo -> subprogramas chamados
+        self.blocos_subprogramas = {}  # nome -> (lista, início, fim)
+        self.removidos = []  # Descrição do que foi eliminado (para o relatório)
+
+    def lista_atual(self, principal):
+        """Lista de saída do escopo atual (função, procedimento ou a lista do main)"""
         if self.em_funcao:
-            self.funcoes.append(linha_formatada)
+            return self.funcoes
         elif self.em_procedimento:
-            self.procedimentos.append(linha_formatada)
-        else:
-            self.codigo.append(linha_formatada)
-    
+            return self.procedimentos
+        return principal
+
+    def adicionar_codigo(self, linha, indent=0):
+        """Adiciona uma linha de código com indentação; devolve a posição da linha"""
+        lista = self.lista_atual(self.codigo)
+        lista.append('\t' * indent + linha)
+        return lista, len(lista) - 1
+
     def adicionar_declaracao(self, linha):
-        """Adiciona uma declaração de variável"""
-        self.declaracoes.append('\t' + linha)
-    
+        """Adiciona uma declaração de variável; devolve a posição da linha"""
+        lista = self.lista_atual(self.declaracoes)
+        lista.append('\t' + linha)
+        return lista, len(lista) - 1
+
     def traduzir_tipo(self, tipo_la, eh_parametro=False):
         """Traduz tipo da linguagem LA para C"""
         tipos = {
             'inteiro': 'int',
-            'real': 'float', 
-            'literal': 'char*' if eh_parametro else 'char',
+            'real': 'float',
+            'literal': 'literal',
             'logico': 'int'
         }
-        
+        if tipo_la.lstrip('^') == 'literal':
+            self.usar_auxiliar('literal')
+
         # Remove ponteiro se existir
         if tipo_la.startswith('^'):
             tipo_base = tipo_la[1:]
             if tipo_base in tipos:
-                base_tipo = tipos[tipo_base]
-                if tipo_base == 'literal' and eh_parametro:
-                    return 'char**'  # ponteiro para string
-                else:
-                    return base_tipo + '*'
+                return tipos[tipo_base] + '*'
             else:
                 return tipo_base + '*'
-        
+
         return tipos.get(tipo_la, tipo_la)
-    
+
     def obter_formato_printf(self, tipo):
         """Retorna o formato correto para printf/scanf baseado no tipo"""
         formatos = {
             'int': '%d',
             'float': '%f',
-            'char': '%s',
-            'char*': '%s'
+            'literal': '%s',
         }
         return formatos.get(tipo, '%d')
-    
+
+    def formato_tipo_la(self, tipo_la):
+        """Retorna o formato de printf/scanf para um tipo LA (None se desconhecido)"""
+        formatos = {
+            'inteiro': '%d',
+            'logico': '%d',
+            'real': '%f',
+            'literal': '%s'
+        }
+        return formatos.get(self.resolver_tipo(tipo_la))
+
+    def resolver_tipo(self, tipo_la):
+        """Resolve apelidos declarados com 'tipo X: Y' até o tipo LA de fato"""
+        visitados = set()
+        while tipo_la in self.tipos_alias and tipo_la not in visitados:
+            visitados.add(tipo_la)
+            tipo_la = self.tipos_alias[tipo_la]
+        return tipo_la
+
+    def percorrer(self, ctx, classe):
+        """Devolve, em ordem, os nós da subárvore de ctx que são da classe indicada"""
+        pilha = [ctx]
+        while pilha:
+            no = pilha.pop()
+            if isinstance(no, classe):
+                yield no
+            if isinstance(no, ParserRuleContext) and no.children:
+                pilha.extend(reversed(no.children))
+
+    def enterPrograma(self, ctx):
+        """Coleta as variáveis cujo endereço é tomado (elas nunca têm valor propagado),
+        os nomes usados no programa e as funções puras"""
+        self.programa = ctx
+        for fator in self.percorrer(ctx, LAParser.FatorContext):
+            if fator.E_COMERCIAL():
+                alvo = fator.IDENT() or fator.acesso_campo()
+                self.enderecados.add(alvo.getText().split('.')[0])
+        for terminal in self.percorrer(ctx, TerminalNode):
+            if terminal.getSymbol().type == LALexer.IDENT:
+                self.identificadores.add(terminal.getText())
+        self.modos_parametros = self.coletar_modos_parametros(ctx)
+        self.subprogramas_recursivos = self.coletar_recursivos(ctx)
+        self.funcoes_puras = self.coletar_funcoes_puras(ctx)
+        self.funcoes_inline = self.coletar_funcoes_inline(ctx)
+        if self.memoizar:
+            self.funcoes_memo = {nome: self.nome_livre(f'{nome}_calculo')
+                                 for nome in self.coletar_funcoes_memo(ctx)}
+        self.funcoes_reentrantes = self.coletar_funcoes_reentrantes(ctx)
+        if self.avaliar_parcial:
+            self.avaliacao = avaliar_parcialmente(ctx, self.max_literal)
+            if self.avaliacao is not None:
+                self.ponteiros_avaliados = self.restaurar_ponteiros(self.avaliacao)
+                if self.ponteiros_avaliados is None or not self.estado_finito(self.avaliacao.globais.values()):
+                    self.avaliacao = None
+
+    def estado_finito(self, celulas):
+        """Se nenhum real do estado avaliado é inf ou NaN (sem literal em C, eles
+        não podem virar valor inicial)"""
+        for celula in celulas:
+            if celula.tipo in ('float', 'double') and celula.valor is not None and not math.isfinite(celula.valor):
+                return False
+            if celula.tipo == 'registro' and not self.estado_finito(celula.valor.values()):
+                return False
+            if celula.tipo == 'vetor' and not self.estado_finito(celula.valor):
+                return False
+        return True
+
+    def restaurar_ponteiros(self, avaliacao):
+        """Ponteiros do estado avaliado como (ponteiro, alvo) para 'p = &alvo;'
+        (None se algum aponta para onde o C não alcança pelo nome, como uma
+        variável local de subprograma, ou fica dentro de vetor ou registro)"""
+        enderecos = {}
+        for nome, celula in avaliacao.globais.items():
+            enderecos[id(celula)] = nome
+            if celula.tipo == 'registro':
+                for campo, celula_campo in celula.valor.items():
+                    enderecos[id(celula_campo)] = f'{nome}.{campo}'
+        atribuicoes = []
+        for nome, celula in avaliacao.globais.items():
+            internas = list(celula.valor.values()) if celula.tipo == 'registro' else []
+            if celula.tipo == 'vetor':
+                internas = [interna for elemento in celula.valor
+                            for interna in (elemento.valor.values() if elemento.tipo == 'registro' else [elemento])]
+            if any(interna.tipo == 'ponteiro' and interna.valor is not None for interna in internas):
+                return None
+            if celula.tipo != 'ponteiro' or celula.valor is None:
+                continue
+            if id(celula.valor) not in enderecos:
+                return None
+            atribuicoes.append((nome, enderecos[id(celula.valor)]))
+        return atribuicoes
+
+    def inicializador(self, celula):
+        """Inicializador C com o valor avaliado de uma variável (None se indefinido)"""
+        if celula.valor is None or celula.tipo == 'ponteiro':
+            return None
+        if celula.tipo in ('int', 'float'):
+            return self.literal_c((celula.valor, celula.tipo))
+        if celula.tipo == 'literal':
+            return f'{{{len(celula.valor)}, "{cadeia_c(celula.valor)}"}}' if celula.valor else '{0}'
+        if celula.tipo == 'registro':
+            campos = [(campo, self.inicializador(valor)) for campo, valor in celula.valor.items()]
+            iniciais = [f'.{campo} = {inicial}' for campo, inicial in campos if inicial is not None]
+            return f'{{{", ".join(iniciais)}}}' if iniciais else None
+        elementos = [self.inicializador(elemento) for elemento in celula.valor]
+        while elementos and elementos[-1] is None:
+            elementos.pop()
+        if not elementos:
+            return None
+        return f'{{{", ".join("{0}" if e is None else e for e in elementos)}}}'
+
+    def coletar_modos_parametros(self, ctx):
+        """Modo de passagem de cada parâmetro: 'var' (T*) para registros e literais
+        'var', 'const' (const T*) para os só lidos e None para passagem por valor.
+
+        Um registro ou literal sem 'var' alterado no corpo continua por valor (a
+        cópia é a semântica do LA), assim como quando outro parâmetro 'var' ou
+        ponteiro do mesmo tipo poderia apontar para o mesmo valor.
+        """
+        registros = set()
+        for decl in self.percorrer(ctx, LAParser.Declaracao_tipoContext):
+            if decl.tipo_registro() or decl.tipo_identificado().getText() in registros:
+                registros.add(decl.IDENT().getText())
+
+        subprogramas = list(self.percorrer(ctx, (LAParser.Declaracao_funcaoContext,
+                                                 LAParser.Declaracao_procedimentoContext)))
+        parametros = {sub.IDENT().getText(): sub.parametros().parametro() if sub.parametros() else []
+                      for sub in subprogramas}
+        modos = {}
+        for sub in subprogramas:
+            alterados = self.registros_alterados(sub, parametros)
+            tipos = {param: (param.tipo_identificado() or param.tipo_base()).getText()
+                     for param in parametros[sub.IDENT().getText()]}
+            mutaveis = {tipo.lstrip('^') for param, tipo in tipos.items()
+                        if param.getChild(0).getText() == 'var' or tipo.startswith('^')}
+            lista = []
+            for param in parametros[sub.IDENT().getText()]:
+                tipo = tipos[param]
+                if tipo not in registros and tipo != 'literal':
+                    lista.append(None)
+                elif param.getChild(0).getText() == 'var':
+                    lista.append('var')
+                elif param.IDENT().getText() in alterados or tipo in mutaveis:
+                    lista.append(None)
+                else:
+                    lista.append('const')
+            modos[sub.IDENT().getText()] = lista
+        return modos
+
+    def registros_alterados(self, ctx, parametros):
+        """Variáveis que a subárvore pode alterar: atribuídas, lidas, com endereço
+        tomado ou passadas a parâmetros 'var'"""
+        alterados = set()
+        for atrib in self.percorrer(ctx, LAParser.AtribuicaoContext):
+            if not atrib.CIRCUNFLEXO():
+                alterados.add(atrib.getChild(0).getText().split('[')[0].split('.')[0])
+        for leitura in self.percorrer(ctx, LAParser.LeituraContext):
+            for alvo in leitura.lista_identificadores().getChildren():
+                alterados.add(alvo.getText().split('[')[0].split('.')[0])
+        for fator in self.percorrer(ctx, LAParser.FatorContext):
+            if fator.E_COMERCIAL():
+                alterados.add(fator.getChild(1).getText().split('.')[0])
+        for chamada in self.percorrer(ctx, (LAParser.Chamada_funcaoContext, LAParser.Chamada_procedimentoContext)):
+            expressoes = chamada.lista_expressao().expressao() if chamada.lista_expressao() else []
+            for param, expr in zip(parametros.get(chamada.IDENT().getText(), []), expressoes):
+                if param.getChild(0).getText() == 'var':
+                    alterados.add(expr.getText().split('[')[0].split('.')[0])
+        return alterados
+
+    def coletar_funcoes_puras(self, ctx):
+        """Funções que só dependem dos argumentos: sem E/S, ponteiros, cadeias
+        (passadas por referência) nem chamadas a subprogramas impuros"""
+        candidatas = {}
+        for funcao in self.percorrer(ctx, LAParser.Declaracao_funcaoContext):
+            parametros = funcao.parametros().parametro() if funcao.parametros() else []
+            if any(self.percorrer(funcao, (LAParser.LeituraContext, LAParser.EscritaContext,
+                                           LAParser.Chamada_procedimentoContext))):
+                continue
+            if any(t.getSymbol().type in (LALexer.CIRCUNFLEXO, LALexer.E_COMERCIAL)
+                   for t in self.percorrer(funcao, TerminalNode)):
+                continue
+            if any(self.resolver_tipo(p.getChild(p.getChildCount() - 1).getText()) == 'literal'
+                   or p.getChild(0).getText() == 'var' for p in parametros):
+                continue
+            candidatas[funcao.IDENT().getText()] = {
+                chamada.IDENT().getText() for chamada in self.percorrer(funcao, LAParser.Chamada_funcaoContext)}
+
+        # Remove até o ponto fixo as que chamam funções impuras
+        puras = set(candidatas)
+        mudou = True
+        while mudou:
+            mudou = False
+            for nome in list(puras):
+                if not candidatas[nome] <= puras:
+                    puras.discard(nome)
+                    mudou = True
+        return puras
+
+    def coletar_recursivos(self, ctx):
+        """Subprogramas que podem chamar a si mesmos (direta ou mutuamente)"""
+        chamadas = {}
+        for sub in self.percorrer(ctx, (LAParser.Declaracao_funcaoContext, LAParser.Declaracao_procedimentoContext)):
+            chamadas[sub.IDENT().getText()] = {
+                chamada.IDENT().getText()
+                for chamada in self.percorrer(sub, (LAParser.Chamada_funcaoContext, LAParser.Chamada_procedimentoContext))}
+
+        recursivos = set()
+        for nome in chamadas:
+            visitadas, pendentes = set(), list(chamadas[nome])
+            while pendentes:
+                atual = pendentes.pop()
+                if atual in chamadas and atual not in visitadas:
+                    visitadas.add(atual)
+                    pendentes.extend(chamadas[atual])
+            if nome in visitadas:
+                recursivos.add(nome)
+        return recursivos
+
+    def coletar_funcoes_reentrantes(self, ctx):
+        """Funções puras que não guardam estado entre chamadas (sem tabela de
+        memoização nem vetores locais, que podem ser estáticos), nem elas nem
+        as que chamam"""
+        candidatas = {}
+        for funcao in self.percorrer(ctx, LAParser.Declaracao_funcaoContext):
+            nome = funcao.IDENT().getText()
+            locais = funcao.declaracoes_locais()
+            if (nome in self.funcoes_puras and nome not in self.funcoes_memo
+                    and not (locais and '[' in locais.getText())):
+                candidatas[nome] = {chamada.IDENT().getText()
+                                    for chamada in self.percorrer(funcao, LAParser.Chamada_funcaoContext)}
+
+        reentrantes = set(candidatas)
+        mudou = True
+        while mudou:
+            mudou = False
+            for nome in list(reentrantes):
+                if not candidatas[nome] <= reentrantes:
+                    reentrantes.discard(nome)
+                    mudou = True
+        return reentrantes
+
+    def coletar_funcoes_memo(self, ctx):
+        """Funções puras e recursivas (direta ou mutuamente) com parâmetros e
+        retorno escalares: o resultado só depende dos argumentos e pode ser guardado"""
+        escalares = ('inteiro', 'real', 'logico')
+        memo = []
+        for funcao in self.percorrer(ctx, LAParser.Declaracao_funcaoContext):
+            parametros = funcao.parametros().parametro() if funcao.parametros() else []
+            nome = funcao.IDENT().getText()
+            if (nome in self.funcoes_puras and nome in self.subprogramas_recursivos and parametros
+                    and funcao.tipo_base().getText() in escalares
+                    and all(p.tipo_base() and p.tipo_base().getText() in escalares for p in parametros)):
+                memo.append(nome)
+        return memo
+
+    def gerar_memo(self, nome, tipo_retorno, parametros):
+        """Gera a função nome(...) que consulta a tabela e só chama o cálculo
+        original (renomeado) na primeira vez que vê os argumentos"""
+        calculo = self.funcoes_memo[nome]
+        assinatura = ', '.join(f'{tipo} {param}' for tipo, param in parametros)
+        argumentos = ', '.join(param for _, param in parametros)
+        valores, prontos, resultado = (self.nome_livre(n) for n in ('memo_valores', 'memo_prontos', 'resultado'))
+        linhas = [f'static {tipo_retorno} {nome}({assinatura}) {{']
+
+        if len(parametros) == 1 and parametros[0][0] == 'int':
+            # Domínio inteiro pequeno: tabela densa indexada pelo próprio argumento
+            param = parametros[0][1]
+            linhas += [
+                f'\tstatic {tipo_retorno} {valores}[{TAMANHO_MEMO_DENSO}];',
+                f'\tstatic unsigned char {prontos}[{TAMANHO_MEMO_DENSO}];',
+                f'\tif ({param} < 0 || {param} >= {TAMANHO_MEMO_DENSO})',
+                f'\t\treturn {calculo}({param});',
+                f'\tif (!{prontos}[{param}]) {{',
+                f'\t\t{tipo_retorno} {resultado} = {calculo}({param});',
+                f'\t\t{valores}[{param}] = {resultado};',
+                f'\t\t{prontos}[{param}] = 1;',
+                '\t}',
+                f'\treturn {valores}[{param}];',
+                '}',
+            ]
+            return linhas
+
+        # Demais casos: cache de mapeamento direto com hash FNV-1a dos argumentos
+        cache, hash_, bits, indice = (self.nome_livre(n) for n in ('memo_cache', 'memo_hash', 'memo_bits', 'memo_indice'))
+        campos = ' '.join(f'{tipo} {param};' for tipo, param in parametros)
+        iguais = ' && '.join(f'memcmp(&{cache}[{indice}].{param}, &{param}, sizeof {param}) == 0'
+                             for _, param in parametros)
+        linhas += [
+            f'\tstatic struct {{ {campos} {tipo_retorno} valor; unsigned char ocupada; }} {cache}[{TAMANHO_MEMO_CACHE}];',
+            f'\tunsigned int {hash_} = 2166136261u, {bits}, {indice};',
+        ]
+        for _, param in parametros:
+            linhas.append(f'\tmemcpy(&{bits}, &{param}, sizeof {bits});')
+            linhas.append(f'\t{hash_} = ({hash_} ^ {bits}) * 16777619u;')
+        linhas += [
+            f'\t{indice} = {hash_} % {TAMANHO_MEMO_CACHE};',
+            f'\tif (!{cache}[{indice}].ocupada || !({iguais})) {{',
+            f'\t\t{tipo_retorno} {resultado} = {calculo}({argumentos});',
+        ]
+        linhas += [f'\t\t{cache}[{indice}].{param} = {param};' for _, param in parametros]
+        linhas += [
+            f'\t\t{cache}[{indice}].valor = {resultado};',
+            f'\t\t{cache}[{indice}].ocupada = 1;',
+            f'\t\treturn {resultado};',
+            '\t}',
+            f'\treturn {cache}[{indice}].valor;',
+            '}',
+        ]
+        return linhas
+
+    def coletar_funcoes_inline(self, ctx):
+        """Funções puras e não recursivas cujo corpo é um único 'retorne' pequeno"""
+        escalares = ('inteiro', 'real', 'logico')
+        inline = {}
+        for funcao in self.percorrer(ctx, LAParser.Declaracao_funcaoContext):
+            nome = funcao.IDENT().getText()
+            comandos = funcao.comandos().comando()
+            if (nome not in self.funcoes_puras or funcao.declaracoes_locais() or len(comandos) != 1
+                    or not comandos[0].retorne() or funcao.tipo_base().getText() not in escalares):
+                continue
+            corpo = comandos[0].retorne().expressao()
+            if len(list(self.percorrer(corpo, TerminalNode))) > LIMITE_TOKENS_INLINE:
+                continue
+            if any(chamada.IDENT().getText() == nome
+                   for chamada in self.percorrer(corpo, LAParser.Chamada_funcaoContext)):
+                continue
+            parametros = [(p.IDENT().getText(), p.getChild(p.getChildCount() - 1).getText())
+                          for p in (funcao.parametros().parametro() if funcao.parametros() else [])]
+            if all(tipo in escalares for _, tipo in parametros):
+                inline[nome] = (parametros, corpo, funcao.tipo_base().getText())
+        return inline
+
+    def eliminar_codigo_morto(self):
+        """Remove subprogramas nunca chamados, variáveis nunca lidas e as atribuições a elas"""
+        descartar = set()  # (id da lista, índice da linha)
+
+        # Subprogramas alcançáveis a partir do algoritmo principal
+        alcancaveis = set()
+        pendentes = ['global']
+        while pendentes:
+            for chamado in self.chamadas.get(pendentes.pop(), ()):
+                if chamado in self.blocos_subprogramas and chamado not in alcancaveis:
+                    alcancaveis.add(chamado)
+                    pendentes.append(chamado)
+        for nome, (lista, inicio, fim) in self.blocos_subprogramas.items():
+            if nome not in alcancaveis:
+                self.removidos.append(f'subprograma {nome} (nunca chamado)')
+                self.subprogramas_removidos.add(nome)
+                descartar.update((id(lista), i) for i in range(inicio, fim))
+
+        # Variáveis vivas: lidas diretamente, ou lidas por atribuições a variáveis vivas
+        vivas = {escopo: set(usos) for escopo, usos in self.usos.items()}
+        mudou = True
+        while mudou:
+            mudou = False
+            for escopo, var, leituras, _ in self.definicoes:
+                vivas_escopo = vivas.setdefault(escopo, set())
+                if var in vivas_escopo and not leituras <= vivas_escopo:
+                    vivas_escopo |= leituras
+                    mudou = True
+
+        for escopo, var, _, (lista, indice) in self.definicoes:
+            if var not in vivas.get(escopo, ()):
+                descartar.add((id(lista), indice))
+        for escopo, var, (lista, indice) in self.posicoes_declaracao:
+            if var not in vivas.get(escopo, ()):
+                descartar.add((id(lista), indice))
+                if escopo == 'global' or escopo in alcancaveis:
+                    local = 'algoritmo' if escopo == 'global' else escopo
+                    self.removidos.append(f'variavel {var} em {local} (nunca lida)')
+
+        for lista in (self.declaracoes, self.codigo, self.funcoes, self.procedimentos):
+            lista[:] = [linha for i, linha in enumerate(lista) if (id(lista), i) not in descartar]
+
+    def nome_livre(self, prefixo):
+        """Nome derivado do prefixo que não colide com nenhum nome do programa"""
+        nome, contador = prefixo, 1
+        while nome in self.identificadores:
+            nome = f'{prefixo}_{contador}'
+            contador += 1
+        self.identificadores.add(nome)
+        return nome
+
+    def novo_temporario(self, prefixo, tipo_c):
+        """Declara uma variável auxiliar cujo nome não colide com os do programa"""
+        nome = self.nome_livre(prefixo)
+        if self.em_funcao or self.em_procedimento:
+            self.temporarios.append(f'\t{tipo_c} {nome};')
+        else:
+            self.adicionar_declaracao(f'{tipo_c} {nome};')
+        return nome
+
     def exitPrograma(self, ctx):
         """Fim do programa - gera código completo"""
+        if self.avaliacao is not None and self.avaliacao.completo:
+            self.gerar_programa_avaliado()
+            return
+        if self.eliminar_mortos:
+            self.eliminar_codigo_morto()
+        for lista in (self.funcoes, self.procedimentos):
+            lista[:] = [linha for linha in lista if linha is not None]
+
         # Gera as funções primeiro
         codigo_final = []
-        codigo_final.extend(['#include <stdio.h>', '#include <stdlib.h>', '#include <string.h>', ''])
-        
+        codigo_final.extend(['#include <stdio.h>', '#include <stdlib.h>', '#include <string.h>'])
+        cabecalhos = ['<math.h>'] if self.usa_math else []
+        for nome in self.auxiliares:
+            cabecalhos.extend(c for c in CABECALHOS_AUXILIARES.get(nome, []) if c not in cabecalhos)
+        codigo_final.extend(f'#include {cabecalho}' for cabecalho in cabecalhos)
+        codigo_final.append('')
+
+        # Funções auxiliares usadas pelo programa (antes dos defines do usuário,
+        # que poderiam trocar nomes dentro delas, e dos structs, que usam literal)
+        if 'literal' in self.auxiliares:
+            codigo_final.extend([f'#define MAX_LITERAL {self.max_literal}', ''])
+        for nome in self.auxiliares:
+            codigo_final.extend(AUXILIARES_C[nome])
+            codigo_final.append('')
+
         # Adiciona defines das constantes
         codigo_final.extend(self.defines)
         if self.defines:
             codigo_final.append('')  # Linha em branco após defines
-        
+
         # Adiciona typedefs de structs
         codigo_final.extend(self.tipos_structs)
         if self.tipos_structs:
             codigo_final.append('')  # Linha em branco após typedefs
-        
+
+        # Protótipos: permitem chamadas em qualquer ordem entre os subprogramas
+        prototipos = [linha for nome, linha in self.prototipos.items() if nome not in self.subprogramas_removidos]
+        codigo_final.extend(prototipos)
+        if prototipos:
+            codigo_final.append('')
+
         # Adiciona funções e procedimentos
         codigo_final.extend(self.funcoes)
         codigo_final.extend(self.procedimentos)
-        
+
         # Função main
         codigo_final.append('int main() {')
         codigo_final.extend(self.declaracoes)
         codigo_final.extend(self.codigo)
+        if 'saida' in self.auxiliares:
+            codigo_final.append('\tdescarregar_saida();')
         codigo_final.append('\treturn 0;')
         codigo_final.append('}')
-        
+
         self.codigo = codigo_final
-    
+
+    def gerar_programa_avaliado(self):
+        """Programa que não lê nada e cabe no orçamento de avaliação: só a saída,
+        calculada na compilação, escrita de uma vez"""
+        saida = bytes(self.avaliacao.saida)
+        self.removidos.append('todo o algoritmo (executado na compilacao)')
+        self.registrar_estatistica('avaliacao parcial', 'programa inteiro executado na compilacao')
+        self.codigo = ['#include <stdio.h>', '', 'int main() {']
+        if saida:
+            linhas = saida.splitlines(keepends=True)
+            self.codigo.append('\tfwrite(' + '\n\t       '.join(f'"{cadeia_c(linha)}"' for linha in linhas)
+                               + f', 1, {len(saida)}, stdout);')
+        self.codigo.extend(['\treturn 0;', '}'])
+
     def enterDeclaracao(self, ctx):
         """Processa declaração de variáveis"""
         if not self.em_funcao and not self.em_procedimento:
             self.processar_declaracao_variaveis(ctx.lista_variaveis())
-    
+
     def enterDeclaracao_constante(self, ctx):
         """Processa declaração de constantes"""
         nome_constante = ctx.IDENT().getText()
+        tipo_constante = ctx.tipo_base().getText()
         valor_constante = ctx.valor_constante()
-        
-        # Determina o valor da constante
-        if valor_constante.NUM_INT():
-            valor = int(valor_constante.NUM_INT().getText())
+
+        # Determina o valor da constante, já com o tipo C que ela terá nas expressões
+        if valor_constante.CADEIA():
+            valor = (valor_constante.CADEIA().getText(), 'literal')
+        elif valor_constante.getText() in ('verdadeiro', 'falso'):
+            valor = (1 if valor_constante.getText() == 'verdadeiro' else 0, 'int')
+        elif tipo_constante == 'real':
+            valor = (float(valor_constante.getText()), 'double')
         elif valor_constante.NUM_REAL():
-            valor = float(valor_constante.NUM_REAL().getText())
-        elif valor_constante.CADEIA():
-            valor = valor_constante.CADEIA().getText()
-        elif valor_constante.getText() == 'verdadeiro':
-            valor = 1
-        elif valor_constante.getText() == 'falso':
-            valor = 0
+            valor = self.converter_constante((float(valor_constante.getText()), 'double'), 'int')
         else:
-            valor = valor_constante.getText()
-        
+            valor = (int(valor_constante.getText()), 'int')
+
         # Armazena a constante
         self.constantes[nome_constante] = valor
-        
-        # Gera #define em C
-        if isinstance(valor, str) and valor.startswith('"'):
-            # String literal
-            self.defines.append(f'#define {nome_constante} {valor}')
+        self.tipos_variaveis[nome_constante] = tipo_constante
+
+        # Gera #define em C (usado nos tamanhos de vetores)
+        if valor is None:
+            self.defines.append(f'#define {nome_constante} {valor_constante.getText()}')
         else:
-            # Valor numérico
-            self.defines.append(f'#define {nome_constante} {valor}')
+            self.defines.append(f'#define {nome_constante} {self.literal_c(valor)}')
 
     def enterDeclaracao_tipo(self, ctx):
         """Processa declaração de tipos (structs)"""
         nome_tipo = ctx.IDENT().getText()
-        
+
         if ctx.tipo_registro():
             # Gera typedef struct
-            campos = []
+            tipos_campos = {}
             for campo_ctx in ctx.tipo_registro().lista_campos().campo():
-                tipo_campo_c = self.traduzir_tipo(campo_ctx.tipo_base().getText())
-                
+                tipo_campo = campo_ctx.tipo_base().getText()
+
                 # Processa todos os identificadores do campo
                 for ident in campo_ctx.IDENT():
-                    nome_campo = ident.getText()
-                    if tipo_campo_c == 'char':
-                        campos.append(f'\t{tipo_campo_c} {nome_campo}[80];')
-                    else:
-                        campos.append(f'\t{tipo_campo_c} {nome_campo};')
-            
+                    tipos_campos[ident.getText()] = tipo_campo
+
             # Adiciona typedef struct nas declarações globais
+            campos = self.campos_struct(nome_tipo, tipos_campos)
             struct_def = f'typedef struct {{\n' + '\n'.join(campos) + f'\n}} {nome_tipo};'
             self.tipos_structs.append(struct_def)
-        
+            self.campos_registro[nome_tipo] = tipos_campos
+
         elif ctx.tipo_identificado():
             # Typedef simples
+            self.tipos_alias[nome_tipo] = ctx.tipo_identificado().getText()
             tipo_base = self.traduzir_tipo(ctx.tipo_identificado().getText())
             typedef_def = f'typedef {tipo_base} {nome_tipo};'
             self.tipos_structs.append(typedef_def)
-    
+
     def processar_declaracao_variaveis(self, ctx_lista):
         """Processa lista de variáveis"""
         for variavel_ctx in ctx_lista.variavel():
             tipo_ctx = variavel_ctx.tipo()
             tipo_c = self.processar_tipo(tipo_ctx)
-            
-            # Debug: print dos tipos
-            # print(f"DEBUG: tipo_ctx.getText() = '{tipo_ctx.getText()}'")
-            # print(f"DEBUG: tipo_c = '{tipo_c}'")
-            
-            # Primeira variável
-            nome = variavel_ctx.IDENT(0).getText()
-            
-            # Verifica se é array
-            if variavel_ctx.ABRE_COLCHETE():
-                tamanho = variavel_ctx.NUM_INT(0).getText() if variavel_ctx.NUM_INT() else variavel_ctx.IDENT(1).getText()
-                if tipo_c == 'char':
-                    self.adicionar_declaracao(f'{tipo_c} {nome}[80];')
-                else:
-                    self.adicionar_declaracao(f'{tipo_c} {nome}[{tamanho}];')
+
+            # Tipo LA da variável (registros inline ganham um nome interno para os campos)
+            if hasattr(tipo_ctx, 'tipo_registro') and tipo_ctx.tipo_registro():
+                tipo_la = f'registro_inline_{variavel_ctx.IDENT(0).getText()}'
+                self.campos_registro[tipo_la] = {
+                    ident.getText(): campo_ctx.tipo_base().getText()
+                    for campo_ctx in tipo_ctx.tipo_registro().lista_campos().campo()
+                    for ident in campo_ctx.IDENT()
+                }
             else:
-                if tipo_c == 'char':
-                    self.adicionar_declaracao(f'{tipo_c} {nome}[80];')
+                tipo_la = tipo_ctx.getText()
+
+            # Percorre os filhos: cada IDENT é uma variável, opcionalmente seguida de [tamanho]
+            filhos = list(variavel_ctx.getChildren())
+            i = 0
+            while i < len(filhos) and filhos[i].getText() != ':':
+                if filhos[i].getText() in (',', '[', ']'):
+                    i += 1
+                    continue
+                nome = filhos[i].getText()
+                tamanho = None
+                if i + 1 < len(filhos) and filhos[i + 1].getText() == '[':
+                    tamanho = filhos[i + 2].getText()
+                    i += 3
+                i += 1
+
+                # Variáveis do algoritmo começam com o valor que o prefixo avaliado deixou
+                celula = None
+                if self.avaliacao is not None and not (self.em_funcao or self.em_procedimento):
+                    celula = self.avaliacao.globais.get(nome)
+                inicial = self.inicializador(celula) if celula is not None else None
+
+                if tamanho is not None and self.layout == 'soa' and self.aceita_soa(nome, tipo_la):
+                    declaracao = self.declarar_vetor_soa(tipo_la, nome, tamanho, celula)
+                elif tamanho is not None:
+                    declaracao = self.declarar_vetor(tipo_c, tipo_la, nome, tamanho, inicial)
+                elif inicial is not None:
+                    declaracao = f'{tipo_c} {nome} = {inicial};'
+                elif tipo_c == 'literal':
+                    # Começa vazia: o tamanho nunca fica indefinido
+                    declaracao = f'{tipo_c} {nome} = {{0}};'
                 else:
-                    self.adicionar_declaracao(f'{tipo_c} {nome};')
-            
-            self.tabela_simbolos[nome] = tipo_c
-            
-            # Variáveis adicionais na mesma linha
-            for i in range(1, len(variavel_ctx.IDENT())):
-                nome_extra = variavel_ctx.IDENT(i).getText()
-                if tipo_c == 'char':
-                    self.adicionar_declaracao(f'{tipo_c} {nome_extra}[80];')
+                    declaracao = f'{tipo_c} {nome};'
+                posicao = self.adicionar_declaracao(declaracao)
+                self.posicoes_declaracao.append((self.escopo_atual, nome, posicao))
+
+                self.tabela_simbolos[nome] = tipo_c
+                self.tipos_variaveis[nome] = tipo_la
+                if tamanho is not None:
+                    self.vetores[nome] = tamanho
                 else:
-                    self.adicionar_declaracao(f'{tipo_c} {nome_extra};')
-                self.tabela_simbolos[nome_extra] = tipo_c
+                    self.vetores.pop(nome, None)
+                self.valores_conhecidos.pop(nome, None)
+                if celula is not None and celula.valor is not None and self.eh_propagavel(nome):
+                    self.valores_conhecidos[nome] = (celula.valor, celula.tipo)
+
+    def declarar_vetor(self, tipo_c, tipo_la, nome, tamanho, inicial=None):
+        """Declaração de um vetor conforme o tamanho conhecido na compilação.
+
+        Até LIMITE_VETOR_PILHA bytes o vetor fica na pilha. Acima disso vai para
+        memória estática no main e, nos subprogramas, para o heap na primeira
+        chamada, zerado de novo a cada chamada seguinte: nada passa de uma
+        chamada para a outra. Subprogramas recursivos mantêm o vetor na pilha,
+        porque cada ativação precisa do seu. inicial é o inicializador dos elementos, quando
+        o vetor do algoritmo já tem valores avaliados na compilação.
+        """
+        avaliado = f' = {inicial}' if inicial is not None else ''
+        inicial = avaliado or (' = {0}' if tipo_c == 'literal' else '')
+        elementos = int(tamanho) if tamanho.isdigit() else (self.constantes.get(tamanho) or (None, None))[0]
+        if not isinstance(elementos, int) or elementos * self.tamanho_tipo(tipo_la) <= LIMITE_VETOR_PILHA:
+            return f'{tipo_c} {nome}[{tamanho}]{inicial};'
+        if not (self.em_funcao or self.em_procedimento):
+            return f'static {tipo_c} {nome}[{tamanho}]{avaliado};'
+        if self.escopo_atual in self.subprogramas_recursivos:
+            return f'{tipo_c} {nome}[{tamanho}]{inicial};'
+        self.usar_auxiliar('alocar_vetor')
+        return (f'static {tipo_c} *{nome}; if ({nome} == NULL) {nome} = alocar_vetor({tamanho}, sizeof *{nome}); '
+                f'else memset({nome}, 0, ({tamanho}) * sizeof *{nome});')
+
+    def aceita_soa(self, nome, tipo_la):
+        """Um vetor de registros pode ser guardado campo a campo se o escopo só
+        usa seus elementos em atribuições (v[i] <- r, r <- v[i]): nunca é
+        passado, lido, escrito nem tem o endereço tomado como um todo"""
+        if self.resolver_tipo(tipo_la) not in self.campos_registro:
+            return False
+        if self.em_funcao or self.em_procedimento:
+            escopo = self.subprograma
+        else:
+            escopo = self.programa.bloco_algoritmo()
+        for terminal in self.percorrer(escopo, TerminalNode):
+            if terminal.getSymbol().type != LALexer.IDENT or terminal.getText() != nome:
+                continue
+            acesso = terminal.parentCtx
+            if isinstance(acesso, LAParser.VariavelContext):
+                continue  # a própria declaração
+            if not isinstance(acesso, LAParser.Acesso_arrayContext):
+                return False
+            if isinstance(acesso.parentCtx, LAParser.AtribuicaoContext):
+                continue
+            atribuicao = acesso.parentCtx
+            while atribuicao is not None and not isinstance(atribuicao, LAParser.AtribuicaoContext):
+                atribuicao = atribuicao.parentCtx
+            if atribuicao is None or self.fator_unico(atribuicao.expressao()) is not acesso.parentCtx:
+                return False
+        return True
+
+    def declarar_vetor_soa(self, tipo_la, nome, tamanho, celula=None):
+        """Um vetor por campo do registro, cada um posicionado como um vetor comum
+        (celula: o vetor avaliado na compilação, de onde vêm os valores iniciais)"""
+        campos = self.campos_registro[self.resolver_tipo(tipo_la)]
+        vetores = {campo: self.nome_livre(f'{nome}_{campo}') for campo in campos}
+        self.vetores_soa[(self.escopo_atual, nome)] = vetores
+        iniciais = {campo: None for campo in campos}
+        if celula is not None:
+            iniciais = {campo: self.inicializador(Celula([elemento.valor[campo] for elemento in celula.valor],
+                                                         'vetor'))
+                        for campo in campos}
+        return '\n\t'.join(self.declarar_vetor(self.traduzir_tipo(tipo_campo), tipo_campo,
+                                                vetores[campo], tamanho, iniciais[campo])
+                            for campo, tipo_campo in campos.items())
+
+    def tamanho_tipo(self, tipo_la):
+        """Bytes aproximados de um valor do tipo LA no C gerado"""
+        tipo = self.resolver_tipo(tipo_la)
+        if tipo in ('inteiro', 'real', 'logico'):
+            return 4
+        if tipo == 'literal':
+            return (4 + self.max_literal + 1 + 3) // 4 * 4
+        if tipo in self.campos_registro:
+            return sum(self.tamanho_tipo(campo) for campo in self.campos_registro[tipo].values())
+        return 8  # ponteiros
 
     def processar_tipo(self, ctx_tipo):
         """Processa contexto de tipo"""
         # Verifica se é um registro inline
         if hasattr(ctx_tipo, 'tipo_registro') and ctx_tipo.tipo_registro():
             # Gera struct inline
-            campos = []
+            tipos_campos = {}
             for campo_ctx in ctx_tipo.tipo_registro().lista_campos().campo():
-                tipo_campo_c = self.traduzir_tipo(campo_ctx.tipo_base().getText())
-                
-                # Processa todos os identificadores do campo
                 for ident in campo_ctx.IDENT():
-                    nome_campo = ident.getText()
-                    if tipo_campo_c == 'char':
-                        campos.append(f'\t{tipo_campo_c} {nome_campo}[80];')
-                    else:
-                        campos.append(f'\t{tipo_campo_c} {nome_campo};')
-            
+                    tipos_campos[ident.getText()] = campo_ctx.tipo_base().getText()
+
             # Retorna definição de struct inline
+            nome = ctx_tipo.parentCtx.IDENT(0).getText()
+            campos = self.campos_struct(f'registro de {nome}', tipos_campos)
             struct_def = 'struct {\n' + '\n'.join(campos) + '\n}'
             return struct_def
-        
+
         # Usa o texto completo do contexto para preservar ^ de ponteiros
         tipo_texto = ctx_tipo.getText()
-        
+
         return self.traduzir_tipo(tipo_texto)
-    
-    def enterDeclaracao_funcao(self, ctx):
-        """Processa declaração de função"""
-        self.em_funcao = True
-        nome = ctx.IDENT().getText()
-        tipo_retorno = self.traduzir_tipo(ctx.tipo_base().getText())
-        
-        # Processa parâmetros
+
+    def campos_struct(self, nome, tipos_campos):
+        """Linhas dos campos de um struct, na ordem declarada (todo campo do LA
+        tem alinhamento 4, então nenhuma ordem tem menos preenchimento)"""
+        tipos = list(tipos_campos.values())
+        tamanho = self.tamanho_struct(tipos)
+        self.layouts_registros.append((nome, tamanho, tamanho - sum(self.medida_campo(t)[0] for t in tipos)))
+        return [f'\t{self.traduzir_tipo(tipo)} {campo};' for campo, tipo in tipos_campos.items()]
+
+    def medida_campo(self, tipo_la):
+        """(bytes, alinhamento) de um campo no C gerado (gcc x86-64)"""
+        if tipo_la.startswith('^'):
+            return 8, 8
+        return self.tamanho_tipo(tipo_la), 4
+
+    def tamanho_struct(self, tipos):
+        """sizeof de um struct com os campos na ordem dada"""
+        tamanho, alinhamento = 0, 1
+        for tipo in tipos:
+            bytes_campo, alinhamento_campo = self.medida_campo(tipo)
+            tamanho = -(-tamanho // alinhamento_campo) * alinhamento_campo + bytes_campo
+            alinhamento = max(alinhamento, alinhamento_campo)
+        return -(-tamanho // alinhamento) * alinhamento
+
+    def processar_parametros(self, ctx):
+        """Registra os parâmetros de um subprograma e devolve a lista em C"""
         parametros = []
         if ctx.parametros():
             for param_ctx in ctx.parametros().parametro():
                 param_nome = param_ctx.IDENT().getText()
                 if param_ctx.tipo_base():
-                    param_tipo = self.traduzir_tipo(param_ctx.tipo_base().getText(), eh_parametro=True)
+                    param_tipo_la = param_ctx.tipo_base().getText()
+                else:
+                    param_tipo_la = param_ctx.tipo_identificado().getText()
+                param_tipo = self.traduzir_tipo(param_tipo_la, eh_parametro=True)
+                modos = self.modos_parametros.get(ctx.IDENT().getText(), [])
+                modo = modos[len(parametros)] if len(parametros) < len(modos) else None
+                if modo is None:
+                    parametros.append(f'{param_tipo} {param_nome}')
                 else:
-                    param_tipo = self.traduzir_tipo(param_ctx.tipo_identificado().getText(), eh_parametro=True)
-                parametros.append(f'{param_tipo} {param_nome}')
+                    # Registros e literais vão por ponteiro: sem cópia a cada chamada
+                    parametros.append(f'{"const " if modo == "const" else ""}{param_tipo}* {param_nome}')
+                    self.parametros_ponteiro.add(param_nome)
                 # Adiciona parâmetro à tabela de símbolos local
                 self.tabela_simbolos[param_nome] = param_tipo.replace('*', '')
-        
+                self.tipos_variaveis[param_nome] = param_tipo_la
+                self.vetores.pop(param_nome, None)
+        return parametros
+
+    def entrar_subprograma(self, nome):
+        """Salva as tabelas do escopo externo ao entrar em função/procedimento"""
+        self.escopo_salvo = (dict(self.tabela_simbolos), dict(self.tipos_variaveis),
+                             dict(self.vetores), self.valores_conhecidos)
+        self.valores_conhecidos = {}
+        self.parametros_ponteiro = set()
+        self.bloco_encerrado = False
+        self.escopo_atual = nome
+        lista = self.lista_atual(self.codigo)
+        self.blocos_subprogramas[nome] = (lista, len(lista), None)
+
+    def sair_subprograma(self):
+        """Restaura as tabelas do escopo externo"""
+        self.tabela_simbolos, self.tipos_variaveis, self.vetores, self.valores_conhecidos = self.escopo_salvo
+        lista, inicio, _ = self.blocos_subprogramas[self.escopo_atual]
+        self.blocos_subprogramas[self.escopo_atual] = (lista, inicio, len(lista))
+        self.parametros_ponteiro = set()
+        # Os temporários ficam no início do corpo; sem eles a linha reservada some
+        lista_temporarios, indice = self.posicao_temporarios
+        lista_temporarios[indice] = '\n'.join(self.temporarios) if self.temporarios else None
+        self.temporarios = []
+        if self.recursao is not None:
+            lista_rotulo, indice = self.recursao['posicao_rotulo']
+            rotulo = self.recursao['rotulo']
+            lista_rotulo[indice] = f'{rotulo}:' if rotulo else None
+            self.recursao = None
+        self.bloco_encerrado = False
+        self.escopo_atual = 'global'
+
+    def enterDeclaracao_funcao(self, ctx):
+        """Processa declaração de função"""
+        self.em_funcao = True
+        self.subprograma = ctx
+        nome = ctx.IDENT().getText()
+        tipo_retorno = self.traduzir_tipo(ctx.tipo_base().getText())
+        self.tipos_funcoes[nome] = ctx.tipo_base().getText()
+        self.entrar_subprograma(nome)
+
+        # Processa parâmetros
+        parametros = self.processar_parametros(ctx)
         params_str = ', '.join(parametros) if parametros else ''
-        self.funcoes.append(f'{tipo_retorno} {nome}({params_str}) {{')
-        
-        # Salva declarações atuais
-        self.declaracoes_temp = self.declaracoes
-        self.declaracoes = []
-        
+        self.prototipos[nome] = f'static {tipo_retorno} {nome}({params_str});'
+        cabecalho = len(self.funcoes)
+        if nome in self.funcoes_memo:
+            # O corpo vira a função de cálculo; nome(...) passa a consultar a tabela
+            calculo = self.funcoes_memo[nome]
+            self.prototipos[nome] += f'\nstatic {tipo_retorno} {calculo}({params_str});'
+            self.funcoes.append(f'static {tipo_retorno} {calculo}({params_str}) {{')
+        else:
+            self.funcoes.append(f'static {tipo_retorno} {nome}({params_str}) {{')
+
         if ctx.declaracoes_locais():
             for decl_ctx in ctx.declaracoes_locais().lista_variaveis():
                 self.processar_declaracao_variaveis(decl_ctx)
-    
+        self.posicao_temporarios = self.adicionar_declaracao('')
+
+        # Autochamadas em cauda viram um salto para o início do corpo
+        self.recursao = self.analisar_recursao(ctx)
+        if self.recursao is not None:
+            self.recursao['posicao_rotulo'] = self.adicionar_declaracao('')
+
+        # Sem autochamadas que sobrevivam à eliminação, a função já é um laço e
+        # a tabela de memoização não evitaria chamada nenhuma
+        if nome in self.funcoes_memo and not self.ainda_recursiva(ctx, self.recursao):
+            del self.funcoes_memo[nome]
+            self.prototipos[nome] = f'static {tipo_retorno} {nome}({params_str});'
+            self.funcoes[cabecalho] = f'static {tipo_retorno} {nome}({params_str}) {{'
+            self.funcoes_reentrantes = self.coletar_funcoes_reentrantes(self.programa)
+
+    def analisar_recursao(self, ctx):
+        """Prepara a eliminação das autochamadas de uma função.
+
+        'retorne f(...)' vira reatribuição dos parâmetros e salto ao início. Se
+        a função é inteira e algum retorno tem a forma 'retorne e + f(...)' (ou
+        com *), com e puro, um acumulador guarda a parte já calculada:
+        'acc = acc + e' antes do salto e 'return acc + (x)' nos demais retornos.
+        """
+        nome = ctx.IDENT().getText()
+        modos = self.modos_parametros.get(nome, [])
+        parametros = [(p.IDENT().getText(), (p.tipo_base() or p.tipo_identificado()).getText(),
+                       modos[i] if i < len(modos) else None)
+                      for i, p in enumerate(ctx.parametros().parametro() if ctx.parametros() else [])]
+        recursao = {'funcao': nome, 'parametros': parametros, 'acumulador': None,
+                    'rotulo': None, 'posicao_rotulo': None}
+
+        em_cauda = False
+        operadores = set()
+        for retorne in self.percorrer(ctx.comandos(), LAParser.RetorneContext):
+            if self.chamada_em_cauda(self.chamada_direta(retorne.expressao()), recursao):
+                em_cauda = True
+            else:
+                parcela = self.parcela_acumulavel(retorne.expressao(), recursao)
+                if parcela is not None:
+                    operadores.add(parcela[0])
+        if len(operadores) == 1 and ctx.tipo_base().getText() == 'inteiro':
+            operador = operadores.pop()
+            acumulador = self.nome_livre('acumulador')
+            self.temporarios.append(f'\tint {acumulador} = {0 if operador == "+" else 1};')
+            recursao['acumulador'] = (acumulador, operador)
+        elif not em_cauda:
+            return None
+        return recursao
+
+    def ainda_recursiva(self, ctx, recursao):
+        """Se a função ainda pode chamar a si mesma (direta ou mutuamente) depois
+        que processar_retorne troca as autochamadas eliminadas por saltos"""
+        eliminadas = set()
+        for retorne in self.percorrer(ctx.comandos(), LAParser.RetorneContext):
+            if recursao is None:
+                break
+            chamada = self.chamada_direta(retorne.expressao())
+            if self.chamada_em_cauda(chamada, recursao):
+                eliminadas.add(id(chamada))
+            elif recursao['acumulador'] is not None:
+                parcela = self.parcela_acumulavel(retorne.expressao(), recursao)
+                if parcela is not None and parcela[0] == recursao['acumulador'][1]:
+                    eliminadas.add(id(parcela[2]))
+
+        chamadas = {}
+        tipos_chamada = (LAParser.Chamada_funcaoContext, LAParser.Chamada_procedimentoContext)
+        for sub in self.percorrer(self.programa, (LAParser.Declaracao_funcaoContext,
+                                                  LAParser.Declaracao_procedimentoContext)):
+            chamadas[sub.IDENT().getText()] = {chamada.IDENT().getText()
+                                               for chamada in self.percorrer(sub, tipos_chamada)
+                                               if id(chamada) not in eliminadas}
+        nome = ctx.IDENT().getText()
+        visitadas, pendentes = set(), list(chamadas.get(nome, ()))
+        while pendentes:
+            atual = pendentes.pop()
+            if atual in chamadas and atual not in visitadas:
+                visitadas.add(atual)
+                pendentes.extend(chamadas[atual])
+        return nome in visitadas
+
+    def chamada_direta(self, expr):
+        """A chamada de função que forma sozinha a expressão (None se não houver)"""
+        no = expr
+        while not isinstance(no, LAParser.FatorContext):
+            if no.getChildCount() != 1:
+                return None
+            no = no.getChild(0)
+        if no.ABREPAR():
+            return self.chamada_direta(no.expressao())
+        return no.chamada_funcao()
+
+    def chamada_em_cauda(self, chamada, recursao):
+        """Autochamada que pode virar salto. Parâmetros por ponteiro e cadeias só
+        podem receber a si mesmos: o novo valor apontaria para o quadro reutilizado"""
+        if chamada is None or chamada.IDENT().getText() != recursao['funcao']:
+            return False
+        expressoes = chamada.lista_expressao().expressao() if chamada.lista_expressao() else []
+        if len(expressoes) != len(recursao['parametros']):
+            return False
+        return all(expr.getText() == param
+                   for (param, tipo, modo), expr in zip(recursao['parametros'], expressoes)
+                   if modo is not None or self.resolver_tipo(tipo) == 'literal')
+
+    def parcela_acumulavel(self, expr, recursao):
+        """Reconhece 'e1 op ... op f(...) op ... en' com op só + ou só * e demais
+        operandos inteiros e puros (em f(n-1) + f(n-2), a última autochamada vira
+        o salto e a outra entra no acumulador).
+        Devolve (op, demais operandos, chamada) ou None."""
+        logica = expr.expressao_logica()
+        if logica.getChildCount() != 1 or logica.getChild(0).getChildCount() != 1:
+            return None
+        aritmetica = logica.getChild(0).getChild(0)
+        if aritmetica.getChildCount() > 1:
+            no = aritmetica
+        elif aritmetica.getChild(0).getChildCount() > 1:
+            no = aritmetica.getChild(0)
+        else:
+            return None
+        operadores = {no.getChild(i).getText() for i in range(1, no.getChildCount(), 2)}
+        if operadores not in ({'+'}, {'*'}):
+            return None
+        operandos = [no.getChild(i) for i in range(0, no.getChildCount(), 2)]
+        chamadas = [op for op in operandos if self.chamada_em_cauda(self.chamada_direta(op), recursao)]
+        if not chamadas:
+            return None
+        outros = [op for op in operandos if op is not chamadas[-1]]
+        for outro in outros:
+            if not self.eh_invariante(outro, set()) or self.resolver_tipo(self.tipo_expressao(outro)) not in ('inteiro', 'logico'):
+                return None
+        return operadores.pop(), outros, self.chamada_direta(chamadas[-1])
+
     def exitDeclaracao_funcao(self, ctx):
         """Finaliza declaração de função"""
-        self.funcoes.extend(self.declaracoes)
         self.funcoes.append('}')
         self.funcoes.append('')
-        self.declaracoes = self.declaracoes_temp
+        nome = ctx.IDENT().getText()
+        if nome in self.funcoes_memo:
+            parametros = [(self.traduzir_tipo(p.tipo_base().getText()), p.IDENT().getText())
+                          for p in ctx.parametros().parametro()]
+            self.funcoes.extend(self.gerar_memo(nome, self.traduzir_tipo(ctx.tipo_base().getText()), parametros))
+            self.funcoes.append('')
+        self.sair_subprograma()
         self.em_funcao = False
-    
+
     def enterDeclaracao_procedimento(self, ctx):
         """Processa declaração de procedimento"""
         self.em_procedimento = True
+        self.subprograma = ctx
         nome = ctx.IDENT().getText()
-        
+        self.entrar_subprograma(nome)
+
         # Processa parâmetros
-        parametros = []
-        if ctx.parametros():
-            for param_ctx in ctx.parametros().parametro():
-                param_nome = param_ctx.IDENT().getText()
-                if param_ctx.tipo_base():
-                    param_tipo = self.traduzir_tipo(param_ctx.tipo_base().getText(), eh_parametro=True)
-                else:
-                    param_tipo = self.traduzir_tipo(param_ctx.tipo_identificado().getText(), eh_parametro=True)
-                parametros.append(f'{param_tipo} {param_nome}')
-                # Adiciona parâmetro à tabela de símbolos local
-                self.tabela_simbolos[param_nome] = param_tipo.replace('*', '')
-        
+        parametros = self.processar_parametros(ctx)
         params_str = ', '.join(parametros) if parametros else ''
-        self.procedimentos.append(f'void {nome}({params_str}) {{')
-        
-        # Salva declarações atuais
-        self.declaracoes_temp = self.declaracoes
-        self.declaracoes = []
-        
+        self.prototipos[nome] = f'static void {nome}({params_str});'
+        self.procedimentos.append(f'static void {nome}({params_str}) {{')
+
         if ctx.declaracoes_locais():
             for decl_ctx in ctx.declaracoes_locais().lista_variaveis():
                 self.processar_declaracao_variaveis(decl_ctx)
-    
+        self.posicao_temporarios = self.adicionar_declaracao('')
+
     def exitDeclaracao_procedimento(self, ctx):
         """Finaliza declaração de procedimento"""
-        self.procedimentos.extend(self.declaracoes)
         self.procedimentos.append('}')
         self.procedimentos.append('')
-        self.declaracoes = self.declaracoes_temp
+        self.sair_subprograma()
         self.em_procedimento = False
-    
-    def enterChamada_procedimento(self, ctx):
-        """Processa chamada de procedimento"""
-        nome = ctx.IDENT().getText()
-        
-        # Processa argumentos
-        argumentos = []
-        if ctx.lista_expressao():
-            for expr_ctx in ctx.lista_expressao().expressao():
-                arg = self.processar_expressao(expr_ctx)
-                argumentos.append(arg)
-        
-        args_str = ', '.join(argumentos) if argumentos else ''
-        linha = f'{nome}({args_str});'
-        
-        if self.em_funcao:
-            self.funcoes.append(f'\t{linha}')
-        elif self.em_procedimento:
-            self.procedimentos.append(f'\t{linha}')
-        else:
-            self.adicionar_codigo(linha, 1)
-    
-    def enterRetorne(self, ctx):
-        """Processa comando return"""
-        expressao = self.processar_expressao(ctx.expressao())
-        if self.em_funcao:
-            self.funcoes.append(f'\treturn {expressao};')
-        else:
-            self.adicionar_codigo(f'return {expressao};', 1)
-    
-    def enterLeitura(self, ctx):
-        """Processa comando de leitura"""
-        # Se estamos bloqueando automático, não processa
-        if self.bloqueando_automatico:
+
+    def enterComando(self, ctx):
+        """Gera os comandos de nível mais externo; os aninhados são gerados recursivamente"""
+        if (self.profundidade_comando == 0 and self.avaliacao is not None
+                and not (self.em_funcao or self.em_procedimento)):
+            if id(ctx) in self.avaliacao.comandos_concluidos:
+                # Executado na compilação: o efeito já está nos valores iniciais
+                self.profundidade_comando += 1
+                return
+            self.emitir_estado_avaliado()
+        if self.profundidade_comando == 0 and id(ctx) not in self.lacos_fundidos:
+            if not self.bloco_encerrado:
+                self.processar_comando(ctx, 1)
+                # Nada depois de um retorne é executado
+                self.bloco_encerrado = bool(ctx.retorne()) and self.eliminar_mortos
+            elif self.bloco_encerrado is True:
+                self.removidos.append(f'comandos apos retorne na linha {ctx.start.line}')
+                self.bloco_encerrado = 'relatado'
+        self.profundidade_comando += 1
+
+    def exitComando(self, ctx):
+        self.profundidade_comando -= 1
+
+    def emitir_estado_avaliado(self):
+        """Antes do primeiro comando não avaliado: a saída do prefixo avaliado e
+        os ponteiros que ele deixou apontando"""
+        if self.estado_emitido:
             return
-            
-        for ident_ctx in ctx.lista_identificadores().children:
-            if hasattr(ident_ctx, 'getText'):
-                nome = ident_ctx.getText()
-                if nome != ',':
-                    tipo = self.tabela_simbolos.get(nome, 'int')
-                    formato = self.obter_formato_printf(tipo)
-                    
-                    if tipo == 'char':
-                        linha = f'fgets({nome}, 80, stdin);'
-                        self.adicionar_codigo(linha, 1)
-                        # Remove a quebra de linha do fgets
-                        linha = f'{nome}[strcspn({nome}, "\\n")] = \'\\0\';'
-                    else:
-                        linha = f'scanf("{formato}",&{nome});'
-                    
-                    self.adicionar_codigo(linha, 1)
-    
-    def enterEscrita(self, ctx):
-        """Processa comando de escrita"""
-        # Verifica se já foi processado manualmente
-        ctx_id = (id(ctx), ctx.start.line, ctx.start.column)
-        if ctx_id in self.contextos_processados:
+        self.estado_emitido = True
+        if self.avaliacao.saida:
+            self.escrever_constante(cadeia_c(self.avaliacao.saida), 1)
+        for ponteiro, alvo in self.ponteiros_avaliados:
+            self.registrar_uso(ponteiro)
+            self.registrar_uso(alvo.split('.')[0])
+            self.adicionar_codigo(f'{ponteiro} = &{alvo};', 1)
+        self.registrar_estatistica('avaliacao parcial', f'{len(self.avaliacao.comandos_concluidos)} '
+                                   'comandos executados na compilacao')
+
+    def processar_comandos(self, comandos_ctx, nivel):
+        """Processa uma lista de comandos em sequência"""
+        comandos = comandos_ctx.comando()
+        for i, comando in enumerate(comandos):
+            if id(comando) in self.lacos_fundidos:
+                continue
+            self.processar_comando(comando, nivel)
+            # Nada depois de um retorne é executado
+            if comando.retorne() and self.eliminar_mortos and i + 1 < len(comandos):
+                self.removidos.append(f'comandos apos retorne na linha {comandos[i + 1].start.line}')
+                break
+
+    def processar_comando(self, comando_ctx, nivel):
+        """Processa um comando individual"""
+        if self.eliminar_subexpressoes and self.eh_comando_simples(comando_ctx):
+            self.planejar_subexpressoes(comando_ctx, nivel)
+        self.gerar_comando(comando_ctx, nivel)
+        # Subexpressões cuja última ocorrência estava neste comando saem de uso
+        for plano in [plano for plano in self.subexpressoes if plano[0] is comando_ctx]:
+            for no in plano[1]:
+                self.substituicoes.pop(no, None)
+            self.subexpressoes.remove(plano)
+
+    def gerar_comando(self, comando_ctx, nivel):
+        """Gera o C de um comando conforme o seu tipo"""
+        if comando_ctx.escrita():
+            self.processar_escrita(comando_ctx.escrita(), nivel)
+        elif comando_ctx.leitura():
+            self.processar_leitura(comando_ctx.leitura(), nivel)
+        elif comando_ctx.atribuicao():
+            self.processar_atribuicao(comando_ctx.atribuicao(), nivel)
+        elif comando_ctx.comandose():
+            self.processar_se(comando_ctx.comandose(), nivel)
+        elif comando_ctx.comandocaso():
+            self.processar_caso(comando_ctx.comandocaso(), nivel)
+        elif comando_ctx.comandopara():
+            fundidos = self.lacos_a_fundir(comando_ctx) if self.fundir_lacos else []
+            self.lacos_fundidos.update(id(comando) for comando in fundidos)
+            self.processar_para(comando_ctx.comandopara(), nivel, [comando.comandopara() for comando in fundidos])
+        elif comando_ctx.comandoenquanto():
+            self.processar_enquanto(comando_ctx.comandoenquanto(), nivel)
+        elif comando_ctx.comandofaca():
+            self.processar_faca(comando_ctx.comandofaca(), nivel)
+        elif comando_ctx.chamada_procedimento():
+            self.processar_chamada_procedimento(comando_ctx.chamada_procedimento(), nivel)
+        elif comando_ctx.retorne():
+            self.processar_retorne(comando_ctx.retorne(), nivel)
+
+    def eh_comando_simples(self, comando_ctx):
+        """Comandos que não desviam o fluxo (formam blocos básicos em sequência)"""
+        return bool(comando_ctx.atribuicao() or comando_ctx.escrita() or comando_ctx.leitura()
+                    or comando_ctx.chamada_procedimento())
+
+    def planejar_subexpressoes(self, comando_ctx, nivel):
+        """Eliminação de subexpressões comuns no bloco básico que começa aqui.
+
+        Cada subexpressão pura e inteira (ou chamada de função pura) deste
+        comando que volta a aparecer, aqui ou nos comandos simples seguintes,
+        antes de alguma variável dela mudar, é calculada uma vez num temporário
+        antes do comando. As maiores são escolhidas primeiro. Só contam para o
+        cálculo antecipado ocorrências que sempre são avaliadas (fora do lado
+        direito de 'e'/'ou'), para não antecipar uma divisão protegida.
+        """
+        if self.tem_chamada_impura(comando_ctx):
             return
-            
-            # Verifica se é bloqueando automático, não processa
-        if hasattr(self, 'bloqueando_automatico') and self.bloqueando_automatico:
+        irmaos = comando_ctx.parentCtx.children
+        posicao = next(i for i, irmao in enumerate(irmaos) if irmao is comando_ctx)
+        bloco = []
+        for irmao in irmaos[posicao:]:
+            if not isinstance(irmao, LAParser.ComandoContext) or not self.eh_comando_simples(irmao):
+                break
+            bloco.append(irmao)
+
+        pendentes = [comando_ctx]
+        while pendentes:
+            no = pendentes.pop()
+            if id(no) in self.substituicoes or not isinstance(no, ParserRuleContext):
+                continue
+            tipo_c = self.tipo_subexpressao(no) if self.sempre_avaliada(no, comando_ctx) else None
+            if tipo_c is None:
+                pendentes.extend(reversed(no.children or []))
+                continue
+            ocorrencias, ultimo = self.ocorrencias_no_bloco(no, bloco)
+            if len(ocorrencias) < 2:
+                pendentes.extend(reversed(no.children or []))
+                continue
+            self.coletores_leitura.append(set())
+            texto, constante = self.traduzir_expressao(no)
+            leituras = self.coletores_leitura.pop()
+            if constante is not None:
+                pendentes.extend(reversed(no.children or []))
+                continue
+
+            temporario = self.novo_temporario('comum', tipo_c)
+            posicao_linha = self.adicionar_codigo(f'{temporario} = {texto};', nivel)
+            if self.eliminar_mortos:
+                self.definicoes.append((self.escopo_atual, temporario, leituras, posicao_linha))
+            else:
+                for nome in leituras:
+                    self.registrar_uso(nome)
+            for ocorrencia in ocorrencias:
+                self.substituicoes[id(ocorrencia)] = temporario
+            self.subexpressoes.append((ultimo, [id(ocorrencia) for ocorrencia in ocorrencias]))
+            self.registrar_estatistica('subexpressoes comuns', f'linha {no.start.line}: {no.getText()}')
+
+    def tipo_subexpressao(self, no):
+        """Tipo C do temporário de uma subexpressão candidata (None se ela não
+        vale um temporário: sem operação, não inteira, ou impura)"""
+        if isinstance(no, LAParser.FatorContext) and no.chamada_funcao():
+            nome = no.chamada_funcao().IDENT().getText()
+            if nome not in self.funcoes_puras or nome not in self.tipos_funcoes:
+                return None
+            return self.traduzir_tipo(self.tipos_funcoes[nome])
+        operacao = (isinstance(no, (LAParser.Expressao_logicaContext, LAParser.Expressao_relacionalContext,
+                                    LAParser.Expressao_aritmeticaContext, LAParser.TermoContext))
+                    and no.getChildCount() > 1) or (isinstance(no, LAParser.FatorContext) and no.potencia())
+        if not operacao or any(t.getSymbol().type == LALexer.CIRCUNFLEXO for t in self.percorrer(no, TerminalNode)):
+            return None
+        # Só inteiros: um real do C pode ser float ou double conforme os operandos
+        if self.resolver_tipo(self.tipo_expressao(no)) not in ('inteiro', 'logico'):
+            return None
+        return 'int'
+
+    def sempre_avaliada(self, no, comando_ctx):
+        """A subexpressão é avaliada sempre que o comando executa"""
+        while no is not comando_ctx:
+            pai = no.parentCtx
+            if isinstance(pai, LAParser.Expressao_logicaContext) and pai.getChild(0) is not no:
+                return False
+            no = pai
+        return True
+
+    def ocorrencias_no_bloco(self, no, bloco):
+        """Nós iguais a no nos comandos do bloco até o primeiro que muda algum
+        dos seus operandos (inclusive); devolve (nós, último comando com um deles)"""
+        classe, texto = type(no), no.getText()
+        nomes = {t.getText() for t in self.percorrer(no, TerminalNode) if t.getSymbol().type == LALexer.IDENT}
+        ocorrencias, ultimo = [], None
+        for comando in bloco:
+            if self.tem_chamada_impura(comando):
+                break
+            iguais = [outro for outro in self.percorrer(comando, classe)
+                      if outro.getText() == texto and id(outro) not in self.substituicoes]
+            if iguais:
+                ocorrencias.extend(iguais)
+                ultimo = comando
+            escritas = self.escritas_comando(comando)
+            if escritas is None or nomes & escritas:
+                break
+        return ocorrencias, ultimo
+
+    def escritas_comando(self, comando_ctx):
+        """Variáveis que um comando simples pode mudar (None: qualquer uma)"""
+        if comando_ctx.chamada_procedimento():
+            return None
+        if comando_ctx.atribuicao():
+            atrib = comando_ctx.atribuicao()
+            if atrib.CIRCUNFLEXO():
+                return None
+            return {atrib.getChild(0).getText().split('[')[0].split('.')[0]}
+        if comando_ctx.leitura():
+            if any(t.getSymbol().type == LALexer.CIRCUNFLEXO
+                   for t in self.percorrer(comando_ctx.leitura(), TerminalNode)):
+                return None
+            return {alvo.getText().split('[')[0].split('.')[0]
+                    for alvo in comando_ctx.leitura().lista_identificadores().getChildren()}
+        return set()
+
+    def tem_chamada_impura(self, ctx):
+        """A subárvore chama alguma função que pode ter efeitos colaterais"""
+        return any(chamada.IDENT().getText() not in self.funcoes_puras
+                   for chamada in self.percorrer(ctx, LAParser.Chamada_funcaoContext))
+
+    def processar_chamada_procedimento(self, ctx, nivel):
+        """Processa chamada de procedimento"""
+        nome = ctx.IDENT().getText()
+        self.registrar_chamada(nome)
+
+        # Processa argumentos
+        argumentos = self.traduzir_argumentos(nome, ctx.lista_expressao())
+        args_str = ', '.join(argumentos) if argumentos else ''
+        self.adicionar_codigo(f'{nome}({args_str});', nivel)
+
+    def traduzir_argumentos(self, nome, lista_expressao):
+        """Traduz os argumentos de uma chamada; registros e literais passados por
+        ponteiro recebem o endereço do argumento"""
+        if not lista_expressao:
+            return []
+        modos = self.modos_parametros.get(nome, [])
+        argumentos = []
+        for i, expr_ctx in enumerate(lista_expressao.expressao()):
+            if self.eh_literal(expr_ctx):
+                por_valor = i >= len(modos) or modos[i] is None
+                argumentos.append(self.valor_literal(expr_ctx) if por_valor else self.ponteiro_literal(expr_ctx))
+                continue
+            arg = self.processar_expressao(expr_ctx)
+            if i < len(modos) and modos[i] is not None:
+                # (*p) é um parâmetro que já é ponteiro
+                arg = arg[2:-1] if arg.startswith('(*') and self.fecha_no_fim(arg) else f'&{arg}'
+            elif arg.startswith('(') and self.fecha_no_fim(arg):
+                # Argumentos expandidos dispensam os parênteses externos
+                arg = arg[1:-1]
+            argumentos.append(arg)
+        return argumentos
+
+    def processar_retorne(self, ctx, nivel):
+        """Processa comando return"""
+        recursao = self.recursao if self.em_funcao else None
+        if recursao is not None:
+            chamada = self.chamada_direta(ctx.expressao())
+            if self.chamada_em_cauda(chamada, recursao):
+                self.saltar_para_inicio(chamada, nivel)
+                return
+            if recursao['acumulador'] is not None:
+                acumulador, operador = recursao['acumulador']
+                parcela = self.parcela_acumulavel(ctx.expressao(), recursao)
+                if parcela is not None and parcela[0] == operador:
+                    textos = [self.operando(self.traduzir_expressao(outro)[0]) for outro in parcela[1]]
+                    self.adicionar_codigo(f'{acumulador} = {acumulador}{operador}{operador.join(textos)};', nivel)
+                    self.saltar_para_inicio(parcela[2], nivel)
+                    return
+                expressao = self.processar_expressao(ctx.expressao())
+                if expressao == ('0' if operador == '+' else '1'):
+                    self.adicionar_codigo(f'return {acumulador};', nivel)
+                else:
+                    self.adicionar_codigo(f'return {acumulador}{operador}{self.entre_parenteses(expressao)};', nivel)
+                return
+
+        if self.eh_literal(ctx.expressao()):
+            self.adicionar_codigo(f'return {self.valor_literal(ctx.expressao())};', nivel)
             return
-            
-        expressoes = []
-        formatos = []
-        
+        expressao = self.processar_expressao(ctx.expressao())
+        self.adicionar_codigo(f'return {expressao};', nivel)
+
+    def saltar_para_inicio(self, chamada, nivel):
+        """Troca a autochamada em cauda pela reatribuição dos parâmetros e um goto"""
+        recursao = self.recursao
+        expressoes = chamada.lista_expressao().expressao() if chamada.lista_expressao() else []
+        calculos, atribuicoes, atribuidos = [], [], []
+        for (param, tipo, _), expr in zip(recursao['parametros'], expressoes):
+            if expr.getText() == param:
+                continue
+            texto = self.processar_expressao(expr)
+            # Todos os argumentos usam os valores antigos dos parâmetros
+            if any(re.search(rf'\b{re.escape(anterior)}\b', texto) for anterior in atribuidos):
+                temporario = self.novo_temporario(f'novo_{param}', self.traduzir_tipo(tipo))
+                calculos.append(f'{temporario} = {texto};')
+                texto = temporario
+            atribuicoes.append(f'{param} = {texto};')
+            atribuidos.append(param)
+        for linha in calculos + atribuicoes:
+            self.adicionar_codigo(linha, nivel)
+        if recursao['rotulo'] is None:
+            recursao['rotulo'] = self.nome_livre('inicio')
+        self.adicionar_codigo(f'goto {recursao["rotulo"]};', nivel)
+
+    def traduzir_alvo(self, ctx):
+        """Traduz o destino de uma leitura/atribuição; devolve (texto C, tipo LA)"""
+        if isinstance(ctx, LAParser.Acesso_campoContext):
+            self.registrar_uso(ctx.IDENT(0).getText())
+            return self.traduzir_campo(ctx), self.tipo_acesso_campo(ctx)
+        if isinstance(ctx, LAParser.Acesso_arrayContext):
+            nome = ctx.IDENT().getText()
+            self.registrar_uso(nome)
+            indice = self.processar_expressao(ctx.expressao())
+            return f'{nome}[{indice}]', self.tipos_variaveis.get(nome)
+        nome = ctx.getText()
+        if nome in self.parametros_ponteiro:
+            return f'(*{nome})', self.tipos_variaveis.get(nome)
+        return nome, self.tipos_variaveis.get(nome)
+
+    def traduzir_campo(self, ctx):
+        """Acesso a campo; em registros recebidos por ponteiro o acesso usa ->"""
+        if ctx.IDENT(0).getText() in self.parametros_ponteiro:
+            return ctx.getText().replace('.', '->', 1)
+        return ctx.getText()
+
+    def registrar_uso(self, nome):
+        """Marca a leitura de uma variável no escopo atual"""
+        if self.coletores_leitura:
+            self.coletores_leitura[-1].add(nome)
+        else:
+            self.usos.setdefault(self.escopo_atual, set()).add(nome)
+
+    def registrar_chamada(self, nome):
+        """Marca a chamada de um subprograma a partir do escopo atual"""
+        self.chamadas.setdefault(self.escopo_atual, set()).add(nome)
+
+    def processar_leitura(self, ctx, nivel):
+        """Processa comando de leitura"""
+        for ident_ctx in ctx.lista_identificadores().children:
+            if ident_ctx.getText() == ',':
+                continue
+            alvo, tipo_la = self.traduzir_alvo(ident_ctx)
+            self.valores_conhecidos.pop(alvo, None)
+            # A leitura consome a entrada, então a variável nunca é descartada
+            self.registrar_uso(alvo)
+            formato = self.formato_tipo_la(tipo_la) or self.obter_formato_printf(self.tabela_simbolos.get(alvo, 'int'))
+
+            if formato == '%s':
+                self.usar_auxiliar('leia_literal')
+                self.adicionar_codigo(f'leia_literal({self.endereco(alvo)});', nivel)
+            else:
+                funcao = LEITURA_POR_FORMATO.get(formato, 'leia_inteiro')
+                self.usar_auxiliar(funcao)
+                self.adicionar_codigo(f'{funcao}(&{alvo});', nivel)
+
+    def processar_escrita(self, ctx, nivel):
+        """Processa comando de escrita (uma chamada do runtime por parte).
+
+        Partes conhecidas na compilação (cadeias, constantes e valores
+        propagados) viram texto: as consecutivas, inclusive as do escreva logo
+        antes no mesmo bloco, saem em um único ESCREVA_CONSTANTE.
+        """
+        partes = []  # (constante, texto): corpo de cadeia C ou chamada do runtime
         for expr_ctx in ctx.expressao():
-            expr_text = self.processar_expressao(expr_ctx)
-            
-            # Verifica se é string literal
-            if expr_text.startswith('"') and expr_text.endswith('"'):
-                formatos.append('%s')
-                expressoes.append(expr_text)
-            # Verifica se é acesso a campo de struct (reg.nome)
-            elif '.' in expr_text:
-                # Para acesso a campos, assume que campos de char são strings (%s)
-                # e campos int são inteiros (%d)
-                partes = expr_text.split('.')
-                if len(partes) == 2:
-                    # Heurística: se o nome do campo sugere string, usa %s
-                    nome_campo = partes[1]
-                    if 'nome' in nome_campo.lower() or 'titulo' in nome_campo.lower() or 'descricao' in nome_campo.lower():
-                        formatos.append('%s')
-                    elif 'idade' in nome_campo.lower() or 'numero' in nome_campo.lower() or 'valor' in nome_campo.lower():
-                        formatos.append('%d')
+            if self.eh_literal(expr_ctx):
+                # Cada parte de uma concatenação é escrita direto, sem montar a cadeia
+                for texto, constante in self.pecas_literal(expr_ctx):
+                    if constante:
+                        partes.append((True, texto[1:-1]))
                     else:
-                        # Default: %s para campos de string
-                        formatos.append('%s')
-                else:
-                    formatos.append('%s')
-                expressoes.append(expr_text)
-            # Verifica se é variável conhecida
-            elif expr_text in self.tabela_simbolos:
-                tipo = self.tabela_simbolos[expr_text]
-                formato = self.obter_formato_printf(tipo)
-                formatos.append(formato)
-                expressoes.append(expr_text)
-            # Verifica se é constante
-            elif expr_text in self.constantes:
-                valor = self.constantes[expr_text]
-                if valor.isdigit():
-                    formatos.append('%d')
-                else:
-                    formatos.append('%s')
-                expressoes.append(valor)
-            # Expressão genérica
+                        self.usar_auxiliar('escreva_literal')
+                        partes.append((False, f'escreva_literal({texto});'))
+                continue
+            expr_text, constante = self.traduzir_expressao(expr_ctx)
+            formato = self.formato_tipo_la(self.tipo_expressao(expr_ctx))
+
+            if formato is None:
+                # Tipo desconhecido: tenta inferir o tipo pelas variáveis envolvidas
+                formato = self.inferir_tipo_expressao(expr_text)
+            texto = self.texto_constante(constante, formato)
+            if texto is not None:
+                partes.append((True, texto))
+                continue
+            funcao = ESCRITA_POR_FORMATO.get(formato, 'escreva_inteiro')
+            self.usar_auxiliar(funcao)
+            partes.append((False, f'{funcao}({expr_text});'))
+
+        for constante, texto in partes:
+            if constante:
+                self.escrever_constante(texto, nivel)
             else:
-                # Tenta determinar o tipo da expressão
-                if expr_text.replace('.','').replace('-','').isdigit() and '.' in expr_text:
-                    formatos.append('%f')
-                    expressoes.append(expr_text)
-                elif expr_text.replace('-','').isdigit():
-                    formatos.append('%d')
-                    expressoes.append(expr_text)
-                else:
-                    # Para expressões complexas, tenta inferir o tipo das variáveis
-                    formato_expr = self.inferir_tipo_expressao(expr_text)
-                    formatos.append(formato_expr)
-                    expressoes.append(expr_text)
-        
-        formato_str = ''.join(formatos)
-        if expressoes:
-            params = ','.join(expressoes)
-            linha = f'printf("{formato_str}",{params});'
-        else:
-            linha = f'printf("{formato_str}");'
-        
-        self.adicionar_codigo(linha, 1)
-    
+                self.adicionar_codigo(texto, nivel)
+
+    def texto_constante(self, constante, formato):
+        """O que o runtime escreveria para uma constante (None se não dobrável)"""
+        if constante is None:
+            return None
+        valor, tipo = constante
+        if formato == '%d' and tipo == 'int':
+            return str(valor)
+        if formato == '%f' and tipo != 'literal':
+            # O % do Python arredonda o valor exato como o printf("%f")
+            return '%f' % valor
+        return None
+
+    def escrever_constante(self, corpo, nivel):
+        """Escreve o corpo de uma cadeia C, juntando-o à escrita constante que for
+        a linha imediatamente anterior (sem comando, rótulo ou chave no meio)"""
+        self.usar_auxiliar('saida')
+        lista = self.lista_atual(self.codigo)
+        if self.escrita_constante is not None:
+            lista_anterior, indice, linha, corpo_anterior = self.escrita_constante
+            if lista_anterior is lista and indice == len(lista) - 1 and lista[indice] == linha:
+                corpo = self.juntar_cadeias_c(corpo_anterior, corpo)
+                lista.pop()
+        lista, indice = self.adicionar_codigo(f'ESCREVA_CONSTANTE("{corpo}");', nivel)
+        self.escrita_constante = (lista, indice, lista[indice], corpo)
+
+    def juntar_cadeias_c(self, esquerda, direita):
+        """Concatena corpos de cadeias C; se o fim da esquerda é um escape que
+        absorveria o começo da direita (\\1 + 2, \\x4 + 1), separa em "..." "..."."""
+        i, escape = 0, None
+        while i < len(esquerda):
+            if esquerda[i] != '\\':
+                i, escape = i + 1, None
+                continue
+            j = i + 1
+            if j < len(esquerda) and esquerda[j] in '01234567':
+                while j < len(esquerda) and j < i + 4 and esquerda[j] in '01234567':
+                    j += 1
+                escape = 'octal' if j - i < 4 else None
+            elif j < len(esquerda) and esquerda[j] == 'x':
+                j += 1
+                while j < len(esquerda) and esquerda[j] in string.hexdigits:
+                    j += 1
+                escape = 'hexa'
+            else:
+                j, escape = j + 1, None
+            i = j
+        if direita and ((escape == 'octal' and direita[0] in '01234567')
+                        or (escape == 'hexa' and direita[0] in string.hexdigits)):
+            return f'{esquerda}" "{direita}'
+        return esquerda + direita
+
     def inferir_tipo_expressao(self, expr_text):
         """Infere o tipo de uma expressão baseado nas variáveis envolvidas"""
         import re
-        
+
         # Extrai identificadores da expressão (variáveis)
         identificadores = re.findall(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', expr_text)
-        
+
         # Verifica o tipo das variáveis encontradas
         tem_real = False
         tem_inteiro = False
-        
+
         for ident in identificadores:
             tipo = self.tabela_simbolos.get(ident, '')
             if tipo == 'float':
                 tem_real = True
             elif tipo == 'int':
                 tem_inteiro = True
-        
+
         # Se tem pelo menos um real, a expressão é real
         if tem_real:
             return '%f'
@@ -903,426 +2442,3879 @@ class GeradorCodigo(LAListener):
         else:
             return '%d'  # default
 
-    def enterAtribuicao(self, ctx):
+    def processar_atribuicao(self, ctx, nivel):
         """Processa atribuição"""
-        # Se estamos bloqueando automático, não processa
-        if self.bloqueando_automatico:
+        # Atribuição a variável simples sem chamadas no lado direito pode ser
+        # descartada se a variável nunca for lida: guarda o que ela lê
+        removivel = (self.eliminar_mortos and ctx.IDENT() and not ctx.CIRCUNFLEXO()
+                     and ctx.IDENT().getText() not in self.parametros_ponteiro
+                     and not any(self.percorrer(ctx.expressao(), LAParser.Chamada_funcaoContext)))
+        if removivel:
+            self.coletores_leitura.append(set())
+        copia = self.copia_soa(ctx) if self.vetores_soa else None
+        literal = copia is None and self.eh_literal(ctx.expressao())
+        if literal:
+            pecas = self.pecas_literal(ctx.expressao())
+        elif copia is None:
+            expr, constante = self.traduzir_expressao(ctx.expressao())
+        leituras = self.coletores_leitura.pop() if removivel else None
+
+        if copia is not None:
+            posicao = self.adicionar_codigo(copia, nivel)
+            if removivel:
+                self.definicoes.append((self.escopo_atual, ctx.IDENT().getText(), leituras, posicao))
             return
-            
+
+        if literal:
+            if ctx.CIRCUNFLEXO():
+                self.registrar_uso(ctx.IDENT().getText())
+                self.adicionar_codigo(self.atribuir_literal(f'*{ctx.IDENT().getText()}', pecas), nivel)
+                return
+            var, _ = self.traduzir_alvo(ctx.getChild(0))
+            posicao = self.adicionar_codigo(self.atribuir_literal(var, pecas), nivel)
+            if removivel:
+                self.definicoes.append((self.escopo_atual, var, leituras, posicao))
+            elif ctx.IDENT():
+                self.registrar_uso(var)
+            return
+
         # Verifica se é ponteiro
-        if ctx.getChildCount() >= 3 and ctx.getChild(0).getText() == '^':
+        if ctx.CIRCUNFLEXO():
             # É um ponteiro: ^IDENT <- expressao
-            var = '*' + ctx.getChild(1).getText()
+            self.registrar_uso(ctx.IDENT().getText())
+            self.adicionar_codigo(f'*{ctx.IDENT().getText()} = {expr};', nivel)
+            return
+
+        var, tipo_la = self.traduzir_alvo(ctx.getChild(0))
+        posicao = self.adicionar_codigo(f'{var} = {expr};', nivel)
+
+        if removivel:
+            self.definicoes.append((self.escopo_atual, var, leituras, posicao))
+        elif ctx.IDENT():
+            self.registrar_uso(var)
+
+        # Propagação: guarda o valor se for uma variável escalar rastreável
+        if ctx.IDENT() and self.eh_propagavel(var):
+            tipo_c = 'float' if self.resolver_tipo(tipo_la) == 'real' else 'int'
+            valor = self.converter_constante(constante, tipo_c) if constante else None
+            if valor is not None:
+                self.valores_conhecidos[var] = valor
+            else:
+                self.valores_conhecidos.pop(var, None)
+
+    def vetor_soa(self, ctx):
+        """Vetores dos campos se ctx é elemento de um vetor guardado campo a campo"""
+        if isinstance(ctx, LAParser.Acesso_arrayContext):
+            return self.vetores_soa.get((self.escopo_atual, ctx.IDENT().getText()))
+        return None
+
+    def copia_soa(self, ctx):
+        """Atribuição de registro com um elemento de vetor guardado campo a campo
+        em algum dos lados: vira uma cópia por campo (None se não for o caso)"""
+        fator = self.fator_unico(ctx.expressao())
+        origem = fator.acesso_array() if fator is not None else None
+        alvo = ctx.getChild(0)
+        if self.vetor_soa(alvo) is None and self.vetor_soa(origem) is None:
+            return None
+
+        if origem is not None and self.vetor_soa(origem) is not None:
+            preparo_origem, ler = self.campos_soa(origem)
         else:
-            # Atribuição normal
-            var = ctx.children[0].getText()
-            
-        expr = self.processar_expressao(ctx.expressao())
-        
-        # Verifica se é atribuição para campo de string em struct
-        if '.' in var and expr.startswith('"') and expr.endswith('"'):
-            # É atribuição de string para campo de struct, usa strcpy
-            linha = f'strcpy({var}, {expr});'
+            ler = self.campos_registro_c(self.traduzir_expressao(ctx.expressao())[0])
+            preparo_origem = ''
+        if ctx.CIRCUNFLEXO():
+            self.registrar_uso(ctx.IDENT().getText())
+            preparo_alvo, escrever = '', self.campos_registro_c(f'(*{ctx.IDENT().getText()})')
+        elif self.vetor_soa(alvo) is not None:
+            preparo_alvo, escrever = self.campos_soa(alvo)
         else:
-            linha = f'{var} = {expr};'
-        
-        self.adicionar_codigo(linha, 1)
+            preparo_alvo, escrever = '', self.campos_registro_c(self.traduzir_alvo(alvo)[0])
+
+        vetor = alvo if self.vetor_soa(alvo) is not None else origem
+        tipo = self.resolver_tipo(self.tipos_variaveis.get(vetor.IDENT().getText()))
+        campos = list(self.campos_registro[tipo])
+        if isinstance(alvo, TerminalNode) and vetor is origem and alvo.getText() not in self.parametros_ponteiro:
+            # r <- v[i]: os campos de r que nunca são lidos ficam no vetor (nenhum
+            # lido: a cópia inteira, que a eliminação de código morto remove)
+            lidos = self.campos_lidos(alvo.getText())
+            campos = [campo for campo in campos if lidos is None or campo in lidos] or campos
+        copias = ' '.join(f'{escrever(campo)} = {ler(campo)};' for campo in campos)
+        return preparo_origem + preparo_alvo + copias
+
+    def campos_lidos(self, nome):
+        """Campos do registro nome lidos em algum ponto do programa (None se ele
+        é usado inteiro fora do alvo de uma atribuição: todos contam como lidos)"""
+        lidos = set()
+        for terminal in self.percorrer(self.programa, TerminalNode):
+            if terminal.getSymbol().type != LALexer.IDENT or terminal.getText() != nome:
+                continue
+            pai = terminal.parentCtx
+            if isinstance(pai, LAParser.VariavelContext):
+                continue  # a declaração
+            if isinstance(pai, LAParser.AtribuicaoContext) and pai.getChild(0) is terminal:
+                continue  # r <- ...
+            if not isinstance(pai, LAParser.Acesso_campoContext) or pai.IDENT(0) is not terminal:
+                return None
+            if not (isinstance(pai.parentCtx, LAParser.AtribuicaoContext) and pai.parentCtx.getChild(0) is pai):
+                lidos.add(pai.IDENT(1).getText())
+        return lidos
+
+    def campos_soa(self, ctx):
+        """(preparo, campo -> texto C) para o elemento v[i] de um vetor guardado
+        campo a campo; um índice que não é nome nem número é calculado uma vez"""
+        vetores = self.vetor_soa(ctx)
+        self.registrar_uso(ctx.IDENT().getText())
+        indice = self.processar_expressao(ctx.expressao())
+        preparo = ''
+        if not re.fullmatch(r'\w+', indice):
+            temporario = self.novo_temporario('indice', 'int')
+            preparo = f'{temporario} = {indice}; '
+            indice = temporario
+        return preparo, lambda campo: f'{vetores[campo]}[{indice}]'
+
+    def campos_registro_c(self, texto):
+        """campo -> texto C do campo de um registro dado pelo texto C"""
+        if re.fullmatch(r'\(\*\w+\)', texto):
+            return lambda campo: f'{texto[2:-1]}->{campo}'
+        if texto.startswith('*'):
+            return lambda campo: f'({texto}).{campo}'
+        return lambda campo: f'{texto}.{campo}'
+
+    def eh_propagavel(self, nome):
+        """Variáveis escalares numéricas/lógicas cujo endereço nunca é tomado"""
+        return (self.resolver_tipo(self.tipos_variaveis.get(nome)) in ('inteiro', 'real', 'logico')
+                and nome not in self.vetores
+                and nome not in self.enderecados
+                and nome not in self.constantes)
+
+    def variaveis_atribuidas(self, ctx):
+        """Variáveis simples que podem ser modificadas dentro da subárvore ctx"""
+        atribuidas = set()
+        for atrib in self.percorrer(ctx, LAParser.AtribuicaoContext):
+            if atrib.IDENT() and not atrib.CIRCUNFLEXO():
+                atribuidas.add(atrib.IDENT().getText())
+        for leitura in self.percorrer(ctx, LAParser.LeituraContext):
+            for ident in leitura.lista_identificadores().IDENT():
+                atribuidas.add(ident.getText())
+        for para in self.percorrer(ctx, LAParser.ComandoparaContext):
+            atribuidas.add(para.IDENT().getText())
+        return atribuidas
+
+    def esquecer_valores(self, nomes):
+        """Descarta os valores propagados das variáveis indicadas"""
+        for nome in nomes:
+            self.valores_conhecidos.pop(nome, None)
+
+    def juntar_valores(self, ambientes):
+        """Mantém apenas os valores iguais em todos os caminhos que se encontram"""
+        primeiro = ambientes[0]
+        return {nome: valor for nome, valor in primeiro.items()
+                if all(amb.get(nome) == valor for amb in ambientes[1:])}
+
+    def processar_se(self, ctx, nivel):
+        """Processa comando if"""
+        condicao, constante = self.traduzir_expressao(ctx.expressao())
+
+        # Condição conhecida: só o ramo que executa é gerado
+        if constante is not None and self.eliminar_mortos:
+            vivo = 0 if constante[0] else 1
+            morto = 'senao' if vivo == 0 else 'entao'
+            if vivo == 0 or len(ctx.comandos()) > 1:
+                self.removidos.append(f'ramo {morto} do se na linha {ctx.start.line} (condicao sempre {"verdadeira" if vivo == 0 else "falsa"})')
+            if vivo < len(ctx.comandos()):
+                self.processar_comandos(ctx.comandos(vivo), nivel)
+            return
+
+        # Abre o bloco if
+        self.adicionar_codigo(f'if ({condicao}) {{', nivel)
+
+        # Cada ramo parte dos valores conhecidos antes do se
+        valores_antes = dict(self.valores_conhecidos)
+        self.processar_comandos(ctx.comandos(0), nivel + 1)
+        ambientes = [self.valores_conhecidos]
+
+        # Verifica se tem bloco ELSE
+        self.valores_conhecidos = dict(valores_antes)
+        if len(ctx.comandos()) > 1:
+            self.adicionar_codigo('} else {', nivel)
+            self.processar_comandos(ctx.comandos(1), nivel + 1)
+        ambientes.append(self.valores_conhecidos)
+
+        # Fecha o bloco
+        self.adicionar_codigo('}', nivel)
+        self.valores_conhecidos = self.juntar_valores(ambientes)
+
+    def processar_caso(self, ctx, nivel):
+        """Processa comando caso (switch statement)"""
+        # Processa a expressão do switch
+        expr_result, constante = self.traduzir_expressao(ctx.expressao())
+
+        # Seletor conhecido: só a seleção escolhida é gerada
+        if constante is not None and constante[1] == 'int' and self.eliminar_mortos:
+            escolhidos = [selecao.comandos() for selecao in ctx.selecao()
+                          if self.selecao_contem(selecao, constante[0])]
+            escolhido = escolhidos[0] if escolhidos else ctx.comandos()
+            self.removidos.append(f'selecoes nao escolhidas do caso na linha {ctx.start.line} (seletor sempre {constante[0]})')
+            if escolhido is not None:
+                self.processar_comandos(escolhido, nivel)
+            return
+
+        # Gera o switch
+        self.adicionar_codigo(f'switch ({expr_result}) {{', nivel)
+
+        # Processa cada seleção (case), todas partindo dos valores anteriores ao caso
+        valores_antes = dict(self.valores_conhecidos)
+        ambientes = []
+        cobertos = []  # Faixas já tratadas por seleções anteriores (vale a primeira)
+        for selecao in ctx.selecao():
+            self.valores_conhecidos = dict(valores_antes)
+            if self.processar_selecao(selecao, nivel, cobertos):
+                ambientes.append(self.valores_conhecidos)
+
+        # Processa o bloco senao (default) se existir
+        self.valores_conhecidos = dict(valores_antes)
+        if ctx.comandos():
+            self.adicionar_codigo('default:', nivel + 1)
+            self.processar_comandos(ctx.comandos(), nivel + 2)
+            self.adicionar_codigo('break;', nivel + 2)
+        ambientes.append(self.valores_conhecidos)
+
+        # Fecha o switch
+        self.adicionar_codigo('}', nivel)
+        self.valores_conhecidos = self.juntar_valores(ambientes)
+
+    def selecao_contem(self, selecao_ctx, valor):
+        """Indica se o valor está entre as constantes/faixas de uma seleção"""
+        for constante in selecao_ctx.constantes().constante():
+            limites = [int(num.getText()) for num in constante.NUM_INT()]
+            if limites[0] <= valor <= limites[-1]:
+                return True
+        return False
+
+    def faixas_selecao(self, selecao_ctx, cobertos):
+        """Faixas (inicio, fim) de uma seleção ainda não cobertas pelas seleções anteriores"""
+        faixas = []
+        for constante in selecao_ctx.constantes().constante():
+            limites = [int(num.getText()) for num in constante.NUM_INT()]
+            pendentes = [(limites[0], limites[-1])] if limites[0] <= limites[-1] else []
+            for inicio_coberto, fim_coberto in cobertos:
+                pendentes = [parte for inicio, fim in pendentes
+                             for parte in ((inicio, min(fim, inicio_coberto - 1)), (max(inicio, fim_coberto + 1), fim))
+                             if parte[0] <= parte[1]]
+            faixas.extend(pendentes)
+            cobertos.extend(pendentes)
+        return sorted(faixas)
+
+    def processar_selecao(self, selecao_ctx, nivel, cobertos):
+        """Processa uma seleção (case) do comando caso; devolve False se ela nunca é escolhida"""
+        faixas = self.faixas_selecao(selecao_ctx, cobertos)
+        if not faixas:
+            return False
+
+        # O custo de uma faixa é uma linha por valor: faixas pequenas viram cases
+        # individuais e as grandes usam 'case a ... b:' do gcc, que escolhe sozinho
+        # entre tabela de saltos e busca binária conforme a densidade
+        for inicio, fim in faixas:
+            if fim - inicio < LIMITE_CASES_POR_VALOR:
+                for valor in range(inicio, fim + 1):
+                    self.adicionar_codigo(f'case {valor}:', nivel + 1)
+            else:
+                self.adicionar_codigo(f'case {inicio} ... {fim}:', nivel + 1)
+
+        # Processa comandos da seleção
+        self.processar_comandos(selecao_ctx.comandos(), nivel + 2)
+
+        # Adiciona break
+        self.adicionar_codigo('break;', nivel + 2)
+        return True
+
+    def processar_para(self, ctx, nivel, fundidos=()):
+        """Processa loop for; os laços fundidos (ver pode_fundir) têm os mesmos
+        limites e seus corpos entram em sequência no mesmo for"""
+        lacos = [ctx, *fundidos]
+        var = ctx.IDENT().getText()
+        inicio, constante_inicio = self.traduzir_expressao(ctx.expressao(0))
+        iteracoes = self.iteracoes_conhecidas(lacos, constante_inicio) if self.desenrolar else None
+        if iteracoes is not None and self.desenrolar_laco(lacos, constante_inicio[0], iteracoes, nivel):
+            return
+        self.registrar_uso(var)
+
+        # O que é modificado no corpo não tem valor conhecido em nenhuma iteração
+        for laco in lacos:
+            self.esquecer_valores(self.variaveis_atribuidas(laco))
+        fim, constante_fim = self.traduzir_expressao(ctx.expressao(1))
+        valores_laco = dict(self.valores_conhecidos)
+
+        # Laço que nunca executa: resta apenas a inicialização da variável
+        if (self.eliminar_mortos and constante_inicio is not None and constante_fim is not None
+                and self.operar_constantes('>', constante_inicio, constante_fim) == (1, 'int')
+                and not any(self.percorrer(ctx.expressao(1), LAParser.Chamada_funcaoContext))):
+            for laco in lacos:
+                self.removidos.append(f'laco para na linha {laco.start.line} (nunca executa)')
+            self.adicionar_codigo(f'{var} = {inicio};', nivel)
+            return
+
+        # O limite é avaliado uma única vez: se o corpo pode alterá-lo ou ele tem
+        # chamadas, seu valor é guardado num temporário antes do laço
+        modificadas = set().union(*(self.modificadas_no_laco(laco) for laco in lacos))
+        limite_fixo = constante_fim is not None or (self.eh_invariante(ctx.expressao(1), modificadas)
+                                                    and not self.eh_custosa(ctx.expressao(1)))
+        paralelo = None
+        if self.paralelo and not self.em_paralelo and limite_fixo:
+            paralelo = self.analisar_paralelismo(lacos, constante_inicio, constante_fim)
+        if paralelo is not None:
+            # Laço vazio deixa a variável com o valor inicial, como no laço serial
+            self.adicionar_codigo(f'{var} = {inicio};', nivel)
+            posicao_pragma = self.adicionar_codigo('', nivel)
+            nomes_antes = set(self.identificadores)
+            self.em_paralelo = True
+
+        elif self.eh_vetorizavel(lacos):
+            # Sem dependências entre iterações: o gcc dispensa o teste de sobreposição
+            self.adicionar_codigo('#pragma GCC ivdep', nivel)
+            self.registrar_estatistica('lacos com #pragma GCC ivdep', f'linha {ctx.start.line}')
+
+        if not limite_fixo:
+            tipo_fim = self.resolver_tipo(self.tipo_expressao(ctx.expressao(1)))
+            limite = self.novo_temporario('limite', 'double' if tipo_fim == 'real' else 'int')
+            self.adicionar_codigo(f'for ({var} = {inicio}, {limite} = {fim}; {var} <= {limite}; {var}++) {{'
+                                  f'{self.marca_linha(ctx)}', nivel)
+        else:
+            self.adicionar_codigo(f'for ({var} = {inicio}; {var} <= {fim}; {var}++) {{{self.marca_linha(ctx)}', nivel)
+        for laco in lacos:
+            self.processar_comandos(laco.comandos(), nivel + 1)
+        self.adicionar_codigo('}', nivel)
+        self.valores_conhecidos = valores_laco
+        if fundidos:
+            linhas = ', '.join(str(laco.start.line) for laco in lacos)
+            self.registrar_estatistica('lacos fundidos', f'linhas {linhas}')
+
+        if paralelo is not None:
+            self.em_paralelo = False
+            reducoes, privados = paralelo
+            clausulas = []
+            if constante_inicio is not None and constante_fim is None:
+                clausulas.append(f'if({fim} >= {constante_inicio[0] + LIMITE_ITERACOES_PARALELO})')
+            elif constante_inicio is None:
+                inicio_c = inicio if re.fullmatch(r'\w+', inicio) else f'({inicio})'
+                clausulas.append(f'if({fim} - {inicio_c} >= {LIMITE_ITERACOES_PARALELO})')
+            clausulas.append(f'lastprivate({", ".join([var] + privados)})')
+            # Temporários criados no corpo guardam valores de uma só iteração
+            temporarios = sorted(self.identificadores - nomes_antes)
+            if temporarios:
+                clausulas.append(f'private({", ".join(temporarios)})')
+            clausulas.extend(f'reduction({operador}:{nome})' for nome, operador in reducoes)
+            lista, indice = posicao_pragma
+            lista[indice] = '\t' * nivel + f'#pragma omp parallel for {" ".join(clausulas)}'
+            self.usa_openmp = True
+            self.registrar_estatistica('lacos paralelizados (OpenMP)', f'linha {ctx.start.line}')
+
+    def iteracoes_conhecidas(self, lacos, constante_inicio):
+        """Número de iterações de um laço para com limites constantes que não
+        altera a variável nem o limite (None se não for o caso)"""
+        ctx = lacos[0]
+        var = ctx.IDENT().getText()
+        if constante_inicio is None or constante_inicio[1] != 'int' or not self.eh_propagavel(var):
+            return None
+        modificadas = set().union(*(self.modificadas_no_laco(laco) for laco in lacos))
+        if (self.eh_custosa(ctx.expressao(1)) or not self.eh_invariante(ctx.expressao(1), modificadas)
+                or any(var in self.variaveis_atribuidas(laco.comandos()) for laco in lacos)
+                or any(any(self.percorrer(laco.comandos(), LAParser.RetorneContext)) for laco in lacos)):
+            return None
+        _, constante_fim = self.traduzir_expressao(ctx.expressao(1))
+        if constante_fim is None or constante_fim[1] != 'int' or constante_fim[0] < constante_inicio[0]:
+            return None
+        return constante_fim[0] - constante_inicio[0] + 1
+
+    def desenrolar_laco(self, lacos, inicio, iteracoes, nivel):
+        """Gera o laço desenrolado; devolve False se ele não compensa.
+
+        Até LIMITE_DESENROLAR_COMPLETO iterações o corpo é copiado uma vez por
+        iteração, com a variável propagada como constante. Laços maiores, sem
+        laços internos, repetem o corpo FATOR_DESENROLAR vezes por volta e as
+        iterações que sobram são copiadas depois do for. Ao final a variável
+        recebe o valor que o laço deixaria (atribuição removível se nunca lida).
+        """
+        ctx = lacos[0]
+        var = ctx.IDENT().getText()
+        tokens = sum(len(list(self.percorrer(laco.comandos(), TerminalNode))) for laco in lacos)
+        fim = inicio + iteracoes - 1
+        if iteracoes <= LIMITE_DESENROLAR_COMPLETO and iteracoes * tokens <= LIMITE_TOKENS_DESENROLADOS:
+            voltas = 0
+        elif (FATOR_DESENROLAR * tokens <= LIMITE_TOKENS_DESENROLADOS
+              and not any(any(self.percorrer(laco.comandos(), (LAParser.ComandoparaContext, LAParser.ComandoenquantoContext,
+                                                               LAParser.ComandofacaContext))) for laco in lacos)
+              and not (self.paralelo and not self.em_paralelo and iteracoes > LIMITE_ITERACOES_PARALELO)
+              and not self.eh_vetorizavel(lacos)):
+            voltas = iteracoes // FATOR_DESENROLAR
+        else:
+            return False
+
+        proximo = inicio
+        if voltas:
+            # Cada volta executa FATOR_DESENROLAR iterações seguidas
+            self.registrar_uso(var)
+            for laco in lacos:
+                self.esquecer_valores(self.variaveis_atribuidas(laco))
+            valores_laco = dict(self.valores_conhecidos)
+            ultimo = inicio + voltas * FATOR_DESENROLAR - 1
+            self.adicionar_codigo(f'for ({var} = {inicio}; {var} <= {ultimo}; ) {{{self.marca_linha(ctx)}', nivel)
+            for _ in range(FATOR_DESENROLAR):
+                for laco in lacos:
+                    self.processar_comandos(laco.comandos(), nivel + 1)
+                self.adicionar_codigo(f'{var}++;', nivel + 1)
+            self.adicionar_codigo('}', nivel)
+            self.valores_conhecidos = valores_laco
+            proximo = ultimo + 1
+            self.registrar_estatistica(f'lacos desenrolados por {FATOR_DESENROLAR}', f'linha {ctx.start.line}')
+        else:
+            self.registrar_estatistica('lacos desenrolados por completo', f'linha {ctx.start.line}')
+
+        # Iterações restantes (todas, no desenrolamento completo) em linha reta
+        for valor in range(proximo, fim + 1):
+            self.valores_conhecidos[var] = (valor, 'int')
+            for laco in lacos:
+                self.processar_comandos(laco.comandos(), nivel)
+        if proximo <= fim:
+            posicao = self.adicionar_codigo(f'{var} = {fim + 1};', nivel)
+            if self.eliminar_mortos:
+                self.definicoes.append((self.escopo_atual, var, set(), posicao))
+        self.valores_conhecidos[var] = (fim + 1, 'int')
+        return True
+
+    def lacos_a_fundir(self, comando_ctx):
+        """Comandos para logo após este que podem ser fundidos a ele (e entre si)"""
+        irmaos = comando_ctx.parentCtx.children
+        posicao = next(i for i, irmao in enumerate(irmaos) if irmao is comando_ctx)
+        grupo, fundidos = [comando_ctx.comandopara()], []
+        for irmao in irmaos[posicao + 1:]:
+            if not (isinstance(irmao, LAParser.ComandoContext) and irmao.comandopara()
+                    and all(self.pode_fundir(anterior, irmao.comandopara()) for anterior in grupo)):
+                break
+            grupo.append(irmao.comandopara())
+            fundidos.append(irmao)
+        return fundidos
+
+    def pode_fundir(self, anterior, laco):
+        """Dois laços para em sequência podem virar um só: mesma variável e os
+        mesmos limites, que nenhum dos dois altera, e nenhuma dependência que a
+        nova ordem (iteração i do segundo logo após a i do primeiro) quebraria.
+
+        Um vetor modificado por um corpo e usado pelo outro só pode ser acessado
+        com um mesmo índice var, var + k ou var - k. Um escalar modificado por um
+        e usado pelo outro tem de ser atribuído antes de lido nos dois corpos.
+        Não pode haver chamadas a procedimentos ou funções impuras, ponteiros,
+        retorne, nem escritas (ou leituras) nos dois corpos.
+        """
+        var = anterior.IDENT().getText()
+        if (laco.IDENT().getText() != var
+                or [expr.getText() for expr in laco.expressao()] != [expr.getText() for expr in anterior.expressao()]
+                or any(self.eh_custosa(expr) for expr in anterior.expressao())):
+            return False
+        corpos = [anterior.comandos(), laco.comandos()]
+        for corpo in corpos:
+            if any(self.percorrer(corpo, (LAParser.Chamada_procedimentoContext, LAParser.RetorneContext))):
+                return False
+            if any(t.getSymbol().type in (LALexer.CIRCUNFLEXO, LALexer.E_COMERCIAL)
+                   for t in self.percorrer(corpo, TerminalNode)):
+                return False
+            if any(chamada.IDENT().getText() not in self.funcoes_puras
+                   for chamada in self.percorrer(corpo, LAParser.Chamada_funcaoContext)):
+                return False
+            if var in self.variaveis_atribuidas(corpo):
+                return False
+        for comando in (LAParser.EscritaContext, LAParser.LeituraContext):
+            if all(any(self.percorrer(corpo, comando)) for corpo in corpos):
+                return False
+
+        escritos = [self.modificadas_no_laco(corpo) - {var} for corpo in corpos]
+        todos_escritos = escritos[0] | escritos[1] | {var}
+        if not all(self.eh_invariante(expr, todos_escritos) for expr in anterior.expressao()):
+            return False
+        mencionados = [{t.getText() for t in self.percorrer(corpo, TerminalNode)
+                        if t.getSymbol().type == LALexer.IDENT} for corpo in corpos]
+        compartilhados = (escritos[0] & mencionados[1]) | (escritos[1] & mencionados[0])
+        for nome in compartilhados:
+            if nome in self.vetores:
+                indices = {acesso.expressao().getText() for corpo in corpos
+                           for acesso in self.percorrer(corpo, LAParser.Acesso_arrayContext)
+                           if acesso.IDENT().getText() == nome}
+                if len(indices) != 1 or not self.indice_da_iteracao(indices.pop(), var, todos_escritos):
+                    return False
+            elif not all(self.atribuida_antes_de_ler(corpo, nome) for corpo in corpos):
+                return False
+        return True
+
+    def registrar_estatistica(self, passo, onde):
+        """Anota onde um passo de otimização foi aplicado (--pass-stats)"""
+        ondes = self.estatisticas.setdefault(passo, [])
+        if onde not in ondes:
+            ondes.append(onde)
+
+    def marca_linha(self, ctx):
+        """Comentário com a linha LA do laço (só ao gerar o relatório de vetorização)"""
+        return f' /* linha {ctx.start.line} */' if self.marcar_linhas else ''
+
+    def eh_vetorizavel(self, lacos):
+        """Laço para mais interno sobre vetores cujas iterações são independentes"""
+        corpos = [laco.comandos() for laco in lacos]
+        return (any(any(self.percorrer(corpo, LAParser.Acesso_arrayContext)) for corpo in corpos)
+                and not any(any(self.percorrer(corpo, (LAParser.ComandoparaContext, LAParser.ComandoenquantoContext,
+                                                       LAParser.ComandofacaContext))) for corpo in corpos)
+                and self.lacos_independentes(lacos) is not None)
+
+    def lacos_independentes(self, lacos):
+        """iteracoes_independentes de um laço com corpos fundidos: a fusão só
+        junta corpos sem dependência entre iterações diferentes, então basta
+        que cada um seja independente"""
+        reducoes, privados = [], set()
+        for laco in lacos:
+            resultado = self.iteracoes_independentes(laco)
+            if resultado is None:
+                return None
+            reducoes += [reducao for reducao in resultado[0] if reducao not in reducoes]
+            privados.update(resultado[1])
+        return reducoes, sorted(privados)
+
+    def analisar_paralelismo(self, lacos, constante_inicio, constante_fim):
+        """Cláusulas de um laço para que vale a pena dividir entre threads
+        (ver iteracoes_independentes); None se ele deve continuar serial"""
+        ctx = lacos[0]
+        # Forma canônica do OpenMP: limites inteiros; o início é avaliado duas vezes
+        if (self.resolver_tipo(self.tipo_expressao(ctx.expressao(1))) != 'inteiro'
+                or any(self.percorrer(ctx.expressao(0), LAParser.Chamada_funcaoContext))):
+            return None
+        if (constante_inicio is not None and constante_fim is not None
+                and constante_fim[0] - constante_inicio[0] < LIMITE_ITERACOES_PARALELO):
+            return None
+        return self.lacos_independentes(lacos)
+
+    def iteracoes_independentes(self, ctx):
+        """Acumuladores e escalares privados de um laço para cujas iterações
+        são independentes; None se alguma iteração pode depender de outra.
+
+        O corpo não tem E/S, retorne, ponteiros nem chamadas a procedimentos ou
+        a funções que não sejam reentrantes. Todo acesso a um vetor modificado
+        usa o mesmo índice var, var + k ou var - k (k invariante). Cada escalar
+        modificado é um acumulador inteiro ou lógico (s <- s + e, lido só ali)
+        ou é atribuído antes de ser lido em toda iteração.
+        """
+        var = ctx.IDENT().getText()
+        corpo = ctx.comandos()
+        if any(self.percorrer(corpo, (LAParser.LeituraContext, LAParser.EscritaContext,
+                                      LAParser.Chamada_procedimentoContext, LAParser.RetorneContext))):
+            return None
+        if any(t.getSymbol().type in (LALexer.CIRCUNFLEXO, LALexer.E_COMERCIAL)
+               for t in self.percorrer(corpo, TerminalNode)):
+            return None
+        if any(chamada.IDENT().getText() not in self.funcoes_reentrantes
+               for chamada in self.percorrer(corpo, LAParser.Chamada_funcaoContext)):
+            return None
+
+        atribuicoes = list(self.percorrer(corpo, LAParser.AtribuicaoContext))
+        if any(atrib.acesso_campo() or (atrib.IDENT() and atrib.IDENT().getText() in self.parametros_ponteiro)
+               for atrib in atribuicoes):
+            return None
+
+        modificadas = self.modificadas_no_laco(ctx)
+        indices = {}
+        for acesso in self.percorrer(corpo, LAParser.Acesso_arrayContext):
+            indices.setdefault(acesso.IDENT().getText(), set()).add(acesso.expressao().getText())
+        for vetor in {atrib.acesso_array().IDENT().getText() for atrib in atribuicoes if atrib.acesso_array()}:
+            if len(indices[vetor]) != 1 or not self.indice_da_iteracao(next(iter(indices[vetor])), var, modificadas):
+                return None
+
+        escalares = {atrib.IDENT().getText() for atrib in atribuicoes if atrib.IDENT()}
+        escalares |= {para.IDENT().getText() for para in self.percorrer(corpo, LAParser.ComandoparaContext)}
+        if var in escalares:
+            return None
+        reducoes, privados = [], []
+        for nome in sorted(escalares):
+            operador = self.operador_reducao(corpo, nome)
+            if operador is not None:
+                reducoes.append((nome, operador))
+            elif self.atribuida_antes_de_ler(corpo, nome):
+                privados.append(nome)
+            else:
+                return None
+        return reducoes, privados
+
+    def indice_da_iteracao(self, indice, var, modificadas):
+        """O índice é var, var + k, var - k ou k + var, com k invariante"""
+        partes = re.fullmatch(rf'{var}(?:[+-](\w+))?|(\w+)\+{var}', indice)
+        if partes is None:
+            return False
+        k = partes.group(1) or partes.group(2)
+        return k is None or k.isdigit() or (k not in modificadas and k in self.tipos_variaveis
+                                            and self.resolver_tipo(self.tipos_variaveis[k]) == 'inteiro'
+                                            and k not in self.vetores)
+
+    def mencoes(self, ctx, nome):
+        """Quantas vezes o identificador aparece na subárvore"""
+        return sum(1 for t in self.percorrer(ctx, TerminalNode)
+                   if t.getSymbol().type == LALexer.IDENT and t.getText() == nome)
+
+    def operador_reducao(self, corpo, nome):
+        """Operador C de redução se toda ocorrência do escalar no corpo está em
+        acumulações 's <- s op e' com o mesmo op associativo (None se não)"""
+        tipo = self.resolver_tipo(self.tipos_variaveis.get(nome))
+        if tipo not in ('inteiro', 'logico') or nome in self.vetores or nome in self.parametros_ponteiro:
+            return None
+        acumulacoes = [atrib for atrib in self.percorrer(corpo, LAParser.AtribuicaoContext)
+                       if atrib.IDENT() and atrib.IDENT().getText() == nome]
+        if not acumulacoes or self.mencoes(corpo, nome) != 2 * len(acumulacoes):
+            return None
+        operadores = {self.operador_acumulado(atrib.expressao(), nome) for atrib in acumulacoes}
+        if len(operadores) != 1 or any(self.resolver_tipo(self.tipo_expressao(atrib.expressao())) != tipo
+                                       for atrib in acumulacoes):
+            return None
+        return operadores.pop()
+
+    def operador_acumulado(self, ctx, nome):
+        """Operador que combina o escalar (um operando inteiro da expressão) com o
+        resto: '+' em somas e subtrações em que ele é somado, '*' em produtos e
+        '&&'/'||' em cadeias só de 'e'/'ou'"""
+        logica = ctx.expressao_logica()
+        relacionais = logica.expressao_relacional()
+        if len(relacionais) > 1:
+            operadores = {logica.getChild(i).getText() for i in range(1, logica.getChildCount(), 2)}
+            if len(operadores) == 1 and any(r.getText() == nome for r in relacionais):
+                return {'e': '&&', 'ou': '||'}[operadores.pop()]
+            return None
+        if relacionais[0].getChildCount() != 1:
+            return None
+        aritmetica = relacionais[0].expressao_aritmetica(0)
+        termos = aritmetica.termo()
+        if len(termos) > 1:
+            for k, termo in enumerate(termos):
+                if termo.getText() == nome and (k == 0 or aritmetica.getChild(2 * k - 1).getText() == '+'):
+                    return '+'
+            return None
+        fatores = termos[0].fator()
+        operadores = {termos[0].getChild(i).getText() for i in range(1, termos[0].getChildCount(), 2)}
+        if operadores == {'*'} and any(fator.getText() == nome for fator in fatores):
+            return '*'
+        return None
+
+    def atribuida_antes_de_ler(self, corpo, nome):
+        """O primeiro comando do corpo que menciona o escalar sempre executa e
+        lhe dá um valor sem lê-lo (atribuição ou laço para com essa variável)"""
+        for comando in corpo.comando():
+            if not self.mencoes(comando, nome):
+                continue
+            no = comando.getChild(0)
+            if isinstance(no, LAParser.AtribuicaoContext) and no.IDENT() and not no.CIRCUNFLEXO():
+                return no.IDENT().getText() == nome and not self.mencoes(no.expressao(), nome)
+            if isinstance(no, LAParser.ComandoparaContext):
+                return (no.IDENT().getText() == nome
+                        and not any(self.mencoes(expr, nome) for expr in no.expressao()))
+            return False
+        return False
+
+    def processar_enquanto(self, ctx, nivel):
+        """Processa loop while"""
+        self.esquecer_valores(self.variaveis_atribuidas(ctx))
+        valores_laco = dict(self.valores_conhecidos)
+        condicao, constante = self.traduzir_expressao(ctx.expressao())
+
+        # Laço que nunca executa
+        if constante is not None and not constante[0] and self.eliminar_mortos:
+            self.removidos.append(f'laco enquanto na linha {ctx.start.line} (condicao sempre falsa)')
+            return
+
+        # Chamadas invariantes na condição são calculadas uma vez antes do laço
+        invariantes = self.invariantes_custosos(ctx.expressao(), self.modificadas_no_laco(ctx))
+        if invariantes:
+            for no in invariantes:
+                texto, _ = self.traduzir_expressao(no)
+                tipo = self.resolver_tipo(self.tipo_expressao(no))
+                nome = self.novo_temporario('invariante', 'double' if tipo == 'real' else 'int')
+                self.adicionar_codigo(f'{nome} = {texto};', nivel)
+                self.substituicoes[id(no)] = nome
+            condicao, _ = self.traduzir_expressao(ctx.expressao())
+            for no in invariantes:
+                del self.substituicoes[id(no)]
+
+        self.adicionar_codigo(f'while ({condicao}) {{{self.marca_linha(ctx)}', nivel)
+        self.processar_comandos(ctx.comandos(), nivel + 1)
+        self.adicionar_codigo('}', nivel)
+        self.valores_conhecidos = valores_laco
+
+    def modificadas_no_laco(self, ctx):
+        """Variáveis (inclusive vetores e registros) que um laço pode modificar.
+
+        A entrada especial None indica que o laço chama subprogramas impuros, que
+        podem alterar as cadeias recebidas (passadas por referência).
+        """
+        modificadas = self.variaveis_atribuidas(ctx)
+        for atrib in self.percorrer(ctx, LAParser.AtribuicaoContext):
+            alvo = atrib.IDENT() if atrib.CIRCUNFLEXO() else atrib.getChild(0)
+            modificadas.add(alvo.getText().split('[')[0].split('.')[0])
+        for leitura in self.percorrer(ctx, LAParser.LeituraContext):
+            for alvo in leitura.lista_identificadores().getChildren():
+                modificadas.add(alvo.getText().split('[')[0].split('.')[0])
+        for chamada in self.percorrer(ctx, (LAParser.Chamada_funcaoContext, LAParser.Chamada_procedimentoContext)):
+            expressoes = chamada.lista_expressao().expressao() if chamada.lista_expressao() else []
+            for modo, expr in zip(self.modos_parametros.get(chamada.IDENT().getText(), []), expressoes):
+                if modo == 'var':
+                    modificadas.add(expr.getText().split('[')[0].lstrip('^'))
+        if any(self.percorrer(ctx, LAParser.Chamada_procedimentoContext)) or any(
+                chamada.IDENT().getText() not in self.funcoes_puras
+                for chamada in self.percorrer(ctx, LAParser.Chamada_funcaoContext)):
+            modificadas.add(None)
+        return modificadas
+
+    def eh_invariante(self, ctx, modificadas):
+        """A expressão tem o mesmo valor em todas as iterações de um laço que
+        modifica as variáveis indicadas"""
+        for terminal in self.percorrer(ctx, TerminalNode):
+            tipo_token = terminal.getSymbol().type
+            if tipo_token in (LALexer.CIRCUNFLEXO, LALexer.E_COMERCIAL):
+                return False
+            if tipo_token != LALexer.IDENT:
+                continue
+            pai, nome = terminal.getParent(), terminal.getText()
+            if isinstance(pai, LAParser.Chamada_funcaoContext):
+                if nome not in self.funcoes_puras:
+                    return False
+            elif isinstance(pai, LAParser.Acesso_campoContext) and terminal is not pai.IDENT(0):
+                continue  # nome de campo
+            elif nome in modificadas or nome in self.enderecados:
+                return False
+            elif None in modificadas and self.resolver_tipo(self.tipos_variaveis.get(nome)) == 'literal':
+                return False
+        return True
+
+    def eh_custosa(self, ctx):
+        """Expressões com chamadas ou potências valem a pena sair do laço"""
+        return any(self.percorrer(ctx, (LAParser.Chamada_funcaoContext, LAParser.PotenciaContext)))
+
+    def invariantes_custosos(self, ctx, modificadas):
+        """Maiores subexpressões invariantes e custosas que são sempre avaliadas
+        (operandos à direita de 'e'/'ou' podem nem ser calculados)"""
+        if isinstance(ctx, (LAParser.Expressao_logicaContext, LAParser.Expressao_relacionalContext,
+                            LAParser.Expressao_aritmeticaContext, LAParser.TermoContext, LAParser.FatorContext)) \
+                and self.eh_custosa(ctx) and self.eh_invariante(ctx, modificadas) \
+                and self.resolver_tipo(self.tipo_expressao(ctx)) in ('inteiro', 'real', 'logico'):
+            return [ctx]
+        if isinstance(ctx, LAParser.Expressao_logicaContext):
+            filhos = [ctx.getChild(0)]
+        elif isinstance(ctx, ParserRuleContext):
+            filhos = [filho for filho in ctx.getChildren() if isinstance(filho, ParserRuleContext)]
+        else:
+            filhos = []
+        return [no for filho in filhos for no in self.invariantes_custosos(filho, modificadas)]
+
+    def processar_faca(self, ctx, nivel):
+        """Processa loop do-while"""
+        self.esquecer_valores(self.variaveis_atribuidas(ctx))
+
+        self.adicionar_codigo(f'do {{{self.marca_linha(ctx)}', nivel)
+        self.processar_comandos(ctx.comandos(), nivel + 1)
+        condicao = self.processar_expressao(ctx.expressao())
+
+        # Para faca-ate, a condição já vem negada (nao (...)), então não negamos novamente
+        # Ao sair, valem os valores do fim da última iteração
+        self.adicionar_codigo(f'}} while ({condicao});', nivel)
+
+    def processar_expressao(self, ctx):
+        """Processa expressão e retorna código C"""
+        if not ctx:
+            return ""
+        return self.traduzir_expressao(ctx)[0]
+
+    def traduzir_expressao(self, ctx):
+        """Traduz a árvore de uma expressão para C, dobrando subexpressões constantes.
+
+        Devolve (texto C, constante), onde constante é (valor, tipo C) quando a
+        expressão é conhecida em tempo de compilação e None caso contrário.
+        """
+        if id(ctx) in self.substituicoes:
+            self.registrar_uso(self.substituicoes[id(ctx)])
+            return self.substituicoes[id(ctx)], None
+
+        if isinstance(ctx, LAParser.ExpressaoContext):
+            return self.traduzir_expressao(ctx.expressao_logica())
+
+        if isinstance(ctx, LAParser.Expressao_logicaContext):
+            texto, constante = self.traduzir_expressao(ctx.getChild(0))
+            operador_anterior = None
+            for i in range(1, ctx.getChildCount(), 2):
+                operador = '&&' if ctx.getChild(i).getText() == 'e' else '||'
+                texto_dir, constante_dir = self.traduzir_expressao(ctx.getChild(i + 1))
+                # 'e' e 'ou' têm a mesma precedência em LA e associam à esquerda
+                if operador_anterior not in (None, operador):
+                    texto = f'({texto})'
+                texto = f'{texto} {operador} {texto_dir}'
+                constante = self.operar_constantes(operador, constante, constante_dir)
+                operador_anterior = operador
+            return self.resultado_expressao(texto, constante)
+
+        if isinstance(ctx, LAParser.Expressao_relacionalContext):
+            if ctx.getChildCount() == 1:
+                return self.traduzir_expressao(ctx.expressao_aritmetica(0))
+            operador = {'=': '==', '<>': '!='}.get(ctx.getChild(1).getText(), ctx.getChild(1).getText())
+            if self.eh_literal(ctx.expressao_aritmetica(0)):
+                # Cadeias são comparadas pelo conteúdo; tamanhos diferentes já decidem a igualdade
+                esquerda = self.visao_literal(self.pecas_literal(ctx.expressao_aritmetica(0)))
+                direita = self.visao_literal(self.pecas_literal(ctx.expressao_aritmetica(1)))
+                if operador in ('==', '!='):
+                    return f'{"!" if operador == "!=" else ""}literal_igual({esquerda}, {direita})', None
+                return f'literal_comparar({esquerda}, {direita}){operador}0', None
+            texto, constante = self.traduzir_expressao(ctx.expressao_aritmetica(0))
+            texto_dir, constante_dir = self.traduzir_expressao(ctx.expressao_aritmetica(1))
+            constante = self.operar_constantes(operador, constante, constante_dir)
+            return self.resultado_expressao(f'{texto}{operador}{self.operando(texto_dir)}', constante)
+
+        if isinstance(ctx, (LAParser.Expressao_aritmeticaContext, LAParser.TermoContext)):
+            texto, constante = self.traduzir_expressao(ctx.getChild(0))
+            for i in range(1, ctx.getChildCount(), 2):
+                operador = ctx.getChild(i).getText()
+                texto_dir, constante_dir = self.traduzir_expressao(ctx.getChild(i + 1))
+                # Dobra o prefixo constante (associatividade à esquerda, como em C)
+                constante = self.operar_constantes(operador, constante, constante_dir)
+                if constante is not None:
+                    texto = self.literal_c(constante)
+                else:
+                    texto = f'{texto}{operador}{self.operando(texto_dir)}'
+            return self.resultado_expressao(texto, constante)
+
+        if isinstance(ctx, LAParser.FatorContext):
+            return self.traduzir_fator(ctx)
+
+        return ctx.getText(), None
+
+    def traduzir_fator(self, ctx):
+        """Traduz um fator de expressão"""
+        primeiro = ctx.getChild(0).getText()
+
+        if ctx.getChildCount() == 2 and primeiro == '-':
+            texto, constante = self.traduzir_expressao(ctx.fator())
+            if constante is not None:
+                return self.resultado_expressao(texto, self.negar_constante(constante))
+            return f'-{self.operando(texto)}', None
+        if ctx.getChildCount() == 2 and primeiro == 'nao':
+            texto, constante = self.traduzir_expressao(ctx.fator())
+            if constante is not None and constante[1] != 'literal':
+                return self.resultado_expressao(texto, (int(not constante[0]), 'int'))
+            return f'!{self.operando(texto)}', None
+        if ctx.E_COMERCIAL():
+            self.registrar_uso(ctx.getChild(1).getText().split('.')[0])
+            if ctx.acesso_campo():
+                return '&' + self.traduzir_campo(ctx.acesso_campo()), None
+            return '&' + ctx.getChild(1).getText(), None
+        if ctx.ABREPAR():
+            texto, constante = self.traduzir_expressao(ctx.expressao())
+            if constante is not None:
+                return self.resultado_expressao(texto, constante)
+            return f'({texto})', None
+        if ctx.CIRCUNFLEXO():
+            self.registrar_uso(ctx.IDENT().getText())
+            return '*' + ctx.IDENT().getText(), None
+        if ctx.chamada_funcao():
+            chamada = ctx.chamada_funcao()
+            expandida = self.expandir_funcao(chamada)
+            if expandida is not None:
+                return expandida
+            self.registrar_chamada(chamada.IDENT().getText())
+            argumentos = self.traduzir_argumentos(chamada.IDENT().getText(), chamada.lista_expressao())
+            return f'{chamada.IDENT().getText()}({",".join(argumentos)})', None
+        if ctx.potencia():
+            return self.traduzir_potencia(ctx.potencia())
+        if ctx.acesso_array():
+            return self.traduzir_alvo(ctx.acesso_array())[0], None
+        if ctx.acesso_campo():
+            return self.traduzir_alvo(ctx.acesso_campo())[0], None
+        if ctx.IDENT():
+            nome = ctx.IDENT().getText()
+            if nome in self.argumentos_inline:
+                return self.argumentos_inline[nome]
+            if nome in self.parametros_ponteiro:
+                self.registrar_uso(nome)
+                return f'(*{nome})', None
+            # Constantes e valores propagados viram literais
+            constante = self.constantes.get(nome) or self.valores_conhecidos.get(nome)
+            if constante is not None:
+                return self.literal_c(constante), (None if constante[1] == 'literal' else constante)
+            self.registrar_uso(nome)
+            return nome, None
+        if ctx.NUM_INT():
+            valor = int(ctx.NUM_INT().getText())
+            return ctx.getText(), ((valor, 'int') if INT_MIN <= valor <= INT_MAX else None)
+        if ctx.NUM_REAL():
+            return ctx.getText(), (float(ctx.getText()), 'double')
+        if primeiro in ('verdadeiro', 'falso'):
+            valor = 1 if primeiro == 'verdadeiro' else 0
+            return str(valor), (valor, 'int')
+
+        # Cadeias e subLiteral seguem como texto
+        for terminal in self.percorrer(ctx, TerminalNode):
+            if terminal.getSymbol().type == LALexer.IDENT:
+                self.registrar_uso(terminal.getText())
+        return ctx.getText(), None
+
+    def eh_literal(self, ctx):
+        """A expressão é uma cadeia (gerada com o runtime de literal)"""
+        return self.resolver_tipo(self.tipo_expressao(ctx)) == 'literal'
+
+    def pecas_literal(self, ctx):
+        """Partes de uma expressão literal concatenada com +, na ordem.
+
+        Cada parte é (texto C, constante): constantes são o próprio "..." do C e
+        as demais são literal_visao, que apontam para os dados sem copiá-los.
+        """
+        if isinstance(ctx, LAParser.ExpressaoContext):
+            return self.pecas_literal(ctx.expressao_logica())
+        if isinstance(ctx, (LAParser.Expressao_logicaContext, LAParser.Expressao_relacionalContext,
+                            LAParser.TermoContext)):
+            return self.pecas_literal(ctx.getChild(0))
+        if isinstance(ctx, LAParser.Expressao_aritmeticaContext):
+            return [peca for termo in ctx.termo() for peca in self.pecas_literal(termo)]
+
+        if ctx.CADEIA():
+            return [(ctx.getText(), True)]
+        if ctx.ABREPAR():
+            return self.pecas_literal(ctx.expressao())
+        self.usar_auxiliar('literal')
+        if ctx.subliteral():
+            subliteral = ctx.subliteral()
+            cadeia = self.visao_literal(self.pecas_literal(subliteral.expressao()))
+            inicio, tamanho = (numero.getText() for numero in subliteral.NUM_INT())
+            return [(f'visao_fatia({cadeia}, {inicio}, {tamanho})', False)]
+
+        texto, _ = self.traduzir_fator(ctx)
+        if texto.startswith('"'):
+            # Constante literal
+            return [(texto, True)]
+        if ctx.chamada_funcao():
+            # O resultado precisa de um endereço para a visão
+            temporario = self.novo_temporario('cadeia', 'literal')
+            return [(f'({temporario} = {texto}, visao_literal(&{temporario}))', False)]
+        return [(f'visao_literal({self.endereco(texto)})', False)]
+
+    def fator_unico(self, ctx):
+        """O fator que forma sozinho a expressão (None se houver operadores)"""
+        while not isinstance(ctx, LAParser.FatorContext):
+            if not isinstance(ctx, ParserRuleContext) or ctx.getChildCount() != 1:
+                return None
+            ctx = ctx.getChild(0)
+        return ctx
+
+    def visao_literal(self, pecas):
+        """Uma literal_visao para a expressão inteira (concatenações são montadas
+        em um temporário)"""
+        self.usar_auxiliar('literal')
+        if len(pecas) == 1:
+            texto, constante = pecas[0]
+            return f'LITERAL_CONSTANTE({texto})' if constante else texto
+        temporario = self.novo_temporario('cadeia', 'literal')
+        return f'({", ".join(self.montar_literal(temporario, pecas))}, visao_literal(&{temporario}))'
+
+    def montar_literal(self, destino, pecas):
+        """Chamadas que copiam as partes, em ordem, para a variável destino"""
+        self.usar_auxiliar('literal')
+        visoes = [f'LITERAL_CONSTANTE({texto})' if constante else texto for texto, constante in pecas]
+        endereco = self.endereco(destino)
+        return ([f'literal_atribuir({endereco}, {visoes[0]})']
+                + [f'literal_anexar({endereco}, {visao})' for visao in visoes[1:]])
+
+    def valor_literal(self, ctx):
+        """A expressão literal como valor do tipo literal (retorno e passagem por cópia)"""
+        fator = self.fator_unico(ctx)
+        if fator is not None and fator.chamada_funcao():
+            return self.traduzir_fator(fator)[0]
+        pecas = self.pecas_literal(ctx)
+        if len(pecas) == 1 and pecas[0][0].startswith('visao_literal('):
+            return self.valor_apontado(pecas[0][0][len('visao_literal('):-1])
+        temporario = self.novo_temporario('cadeia', 'literal')
+        return f'({", ".join(self.montar_literal(temporario, pecas))}, {temporario})'
+
+    def ponteiro_literal(self, ctx):
+        """Endereço de um literal com o valor da expressão (argumento por ponteiro)"""
+        pecas = self.pecas_literal(ctx)
+        if len(pecas) == 1 and pecas[0][0].startswith('visao_literal('):
+            return pecas[0][0][len('visao_literal('):-1]
+        temporario = self.novo_temporario('cadeia', 'literal')
+        return f'({", ".join(self.montar_literal(temporario, pecas))}, &{temporario})'
+
+    def atribuir_literal(self, alvo, pecas):
+        """Comandos (em uma linha) de 'alvo <- p1 + p2 + ...'.
+
+        'x <- x + ...' só anexa ao fim de x. Se alguma parte depois da primeira
+        pode ler o próprio alvo (ou é uma chamada, que poderia alterá-lo), a
+        cadeia é montada em um temporário antes da cópia.
+        """
+        propria = f'visao_literal({self.endereco(alvo)})'
+        if pecas[0] == (propria, False) and len(pecas) > 1:
+            comandos = self.montar_literal(alvo, pecas)[1:]
+        elif any(not constante and self.pode_apontar_para(texto, alvo) for texto, constante in pecas[1:]):
+            temporario = self.novo_temporario('cadeia', 'literal')
+            comandos = self.montar_literal(temporario, pecas)
+            comandos.append(f'literal_atribuir({self.endereco(alvo)}, visao_literal(&{temporario}))')
+        else:
+            comandos = self.montar_literal(alvo, pecas)
+        return ' '.join(f'{comando};' for comando in comandos)
+
+    def pode_apontar_para(self, visao, alvo):
+        """A visão pode ler os dados do alvo (mesma variável, ponteiros ou chamadas)"""
+        raiz = re.match(r'[(*&]*(\w+)', alvo).group(1)
+        if re.search(rf'\b{re.escape(raiz)}\b', visao) or ' = ' in visao:
+            return True
+        por_ponteiro = lambda texto: bool(re.search(r'\(\*|->|visao_literal\([^&]', texto)) or texto.startswith('*')
+        return por_ponteiro(alvo) and por_ponteiro(visao)
+
+    def endereco(self, alvo):
+        """Endereço de um lvalue C ((*p) e *p já são o ponteiro p)"""
+        if alvo.startswith('(*') and self.fecha_no_fim(alvo):
+            return alvo[2:-1]
+        if alvo.startswith('*'):
+            return alvo[1:]
+        return f'&{alvo}'
+
+    def valor_apontado(self, endereco):
+        """Inverso de endereco: o lvalue que o ponteiro indica"""
+        return endereco[1:] if endereco.startswith('&') else f'(*{endereco})'
+
+    def traduzir_potencia(self, ctx):
+        """Traduz pot(base, expoente) conforme o tipo do expoente.
+
+        Expoente inteiro constante e pequeno vira uma cadeia de multiplicações,
+        expoente inteiro em tempo de execução usa exponenciação por quadrados
+        (pot_inteiro/pot_real) e só expoente real recorre ao pow da libm.
+        """
+        expr_base, expr_expoente = ctx.expressao()
+        base, constante_base = self.traduzir_expressao(expr_base)
+        expoente, constante_expoente = self.traduzir_expressao(expr_expoente)
+        tipo_base = self.resolver_tipo(self.tipo_expressao(expr_base))
+        tipo_expoente = self.resolver_tipo(self.tipo_expressao(expr_expoente))
+        inteiros = ('inteiro', 'logico')
+
+        if tipo_base not in inteiros + ('real',) or tipo_expoente not in inteiros:
+            self.usa_math = True
+            constante = self.potencia_constante(constante_base, constante_expoente, 'pow')
+            return self.resultado_expressao(f'pow({base},{expoente})', constante)
+
+        auxiliar = 'pot_inteiro' if tipo_base in inteiros else 'pot_real'
+        texto_base = expr_base.getText()
+        if (auxiliar == 'pot_real' and constante_base is not None and constante_expoente is not None
+                and 0 <= constante_expoente[0] <= LIMITE_POT_INLINE
+                and re.fullmatch(r'[\w.\[\]]+', texto_base)
+                and not re.fullmatch(r'\d+(\.\d+)?', texto_base) and texto_base not in self.constantes):
+            # Valor conhecido só por propagação: sem ele o C seria a cadeia de
+            # multiplicações no tipo da base, então dobra com a mesma precisão
+            constante = (1.0, 'double')
+            for vez in range(constante_expoente[0]):
+                constante = constante_base if vez == 0 else self.operar_constantes('*', constante, constante_base)
+        else:
+            constante = self.potencia_constante(constante_base, constante_expoente, auxiliar)
+        if constante is not None:
+            return self.resultado_expressao(base, constante)
+
+        if constante_expoente is not None and 0 <= constante_expoente[0] <= LIMITE_POT_INLINE \
+                and re.fullmatch(r'[\w.\[\]]+', base):
+            # Base sem efeitos colaterais: pode ser repetida
+            if constante_expoente[0] == 0:
+                return ('1' if auxiliar == 'pot_inteiro' else '1.0'), None
+            return f'({"*".join([base] * constante_expoente[0])})', None
+
+        self.usar_auxiliar(auxiliar)
+        return f'{auxiliar}({base},{expoente})', None
+
+    def usar_auxiliar(self, nome):
+        """Marca uma função auxiliar como usada (depois das que ela precisa)"""
+        if nome in self.auxiliares:
+            return
+        for dependencia in DEPENDENCIAS_AUXILIARES.get(nome, []):
+            self.usar_auxiliar(dependencia)
+        self.auxiliares.append(nome)
+
+    def potencia_constante(self, base, expoente, funcao):
+        """Dobra pot() com os mesmos resultados que a função C escolhida daria"""
+        if base is None or expoente is None or 'literal' in (base[1], expoente[1]):
+            return None
+        if funcao == 'pow':
+            try:
+                resultado = math.pow(float(base[0]), float(expoente[0]))
+            except (OverflowError, ValueError):
+                return None
+            return None if math.isinf(resultado) else (resultado, 'double')
+
+        valor, n = base[0], expoente[0]
+        if funcao == 'pot_inteiro':
+            return (potencia_c(valor, n, funcao), 'int')
+
+        # pot_real: mesma sequência de multiplicações em double
+        valor = float(valor)
+        if n < 0:
+            if valor == 0:
+                return None
+            valor, n = 1.0 / valor, -n
+        resultado = 1.0
+        while n > 0:
+            if n & 1:
+                resultado *= valor
+            valor *= valor
+            n >>= 1
+        return None if math.isinf(resultado) else (resultado, 'double')
+
+    def expandir_funcao(self, chamada):
+        """Expande a chamada de uma função pequena no lugar, com os parâmetros
+        trocados pelos argumentos convertidos como numa chamada em C.
+
+        Devolve None quando a expansão mudaria a semântica: argumento complexo
+        usado mais de uma vez ou argumento com efeitos que seria descartado.
+        """
+        nome = chamada.IDENT().getText()
+        if nome not in self.funcoes_inline or nome in self.expandindo:
+            return None
+        parametros, corpo, tipo_retorno = self.funcoes_inline[nome]
+        expressoes = chamada.lista_expressao().expressao() if chamada.lista_expressao() else []
+        if len(expressoes) != len(parametros):
+            return None
+
+        usos = {}
+        for terminal in self.percorrer(corpo, TerminalNode):
+            if terminal.getSymbol().type == LALexer.IDENT and isinstance(terminal.getParent(), LAParser.FatorContext):
+                usos[terminal.getText()] = usos.get(terminal.getText(), 0) + 1
+
+        argumentos = {}
+        for (param, tipo_param), expr in zip(parametros, expressoes):
+            texto, constante = self.traduzir_expressao(expr)
+            tipo_c = 'float' if tipo_param == 'real' else 'int'
+            if constante is not None:
+                constante = self.converter_constante(constante, tipo_c)
+                if constante is None:
+                    return None
+                argumentos[param] = (self.literal_c(constante), constante)
+                continue
+            simples = re.fullmatch(r'[\w.]+', texto) is not None
+            if usos.get(param, 0) > 1 and not simples:
+                return None
+            if not usos.get(param) and not self.eh_invariante(expr, set()):
+                return None
+            tipo_arg = self.resolver_tipo(self.tipo_expressao(expr))
+            if tipo_c == 'float' and not (simples and tipo_arg == 'real'):
+                texto = f'((float)({texto}))'
+            elif tipo_c == 'int' and tipo_arg not in ('inteiro', 'logico'):
+                texto = f'((int)({texto}))'
+            elif not simples:
+                texto = self.entre_parenteses(texto)
+            argumentos[param] = (texto, None)
+
+        # O corpo é traduzido com os tipos dos parâmetros e sem os valores do chamador
+        salvos = (self.tipos_variaveis, self.valores_conhecidos, self.argumentos_inline)
+        self.tipos_variaveis = {**self.tipos_variaveis, **dict(parametros)}
+        self.valores_conhecidos = {}
+        self.argumentos_inline = argumentos
+        self.expandindo.add(nome)
+        texto, constante = self.traduzir_expressao(corpo)
+        tipo_corpo = self.resolver_tipo(self.tipo_expressao(corpo))
+        self.expandindo.discard(nome)
+        self.tipos_variaveis, self.valores_conhecidos, self.argumentos_inline = salvos
+
+        # Conversão do valor retornado, como no 'return' da função
+        tipo_c = 'float' if tipo_retorno == 'real' else 'int'
+        if constante is not None:
+            constante = self.converter_constante(constante, tipo_c)
+            return (self.literal_c(constante), constante) if constante is not None else None
+        if tipo_c == 'float':
+            return f'((float)({texto}))', None
+        if tipo_corpo not in ('inteiro', 'logico'):
+            return f'((int)({texto}))', None
+        return self.entre_parenteses(texto), None
+
+    def entre_parenteses(self, texto):
+        """Envolve a expressão em parênteses, a menos que ela já seja atômica
+        (nome, chamada ou expressão toda entre parênteses)"""
+        inicio = texto.find('(')
+        if inicio < 0:
+            atomica = re.fullmatch(r'[\w.]+', texto)
+        else:
+            atomica = re.fullmatch(r'[\w.]*', texto[:inicio]) and self.fecha_no_fim(texto[inicio:])
+        return texto if atomica else f'({texto})'
+
+    def fecha_no_fim(self, texto):
+        """O parêntese que abre o texto só é fechado no último caractere"""
+        profundidade = 0
+        for i, caractere in enumerate(texto):
+            profundidade += {'(': 1, ')': -1}.get(caractere, 0)
+            if profundidade == 0:
+                return i == len(texto) - 1
+        return False
+
+    def resultado_expressao(self, texto, constante):
+        """Substitui o texto pelo literal quando a expressão foi dobrada"""
+        if constante is None:
+            return texto, None
+        return self.literal_c(constante), constante
+
+    def operando(self, texto):
+        """Protege operandos negativos à direita de um operador (evita 'a--1')"""
+        return f'({texto})' if texto.startswith('-') else texto
+
+    def literal_c(self, constante):
+        """Escreve uma constante dobrada como literal C do mesmo tipo"""
+        valor, tipo = constante
+        if tipo == 'literal':
+            return valor
+        if tipo == 'int':
+            # -2147483648 seria o negativo de um long
+            return str(valor) if valor != INT_MIN else f'({INT_MIN + 1}-1)'
+        if tipo == 'double':
+            return repr(valor)
+        # float: menor representação decimal que volta exatamente ao mesmo float
+        for digitos in range(1, 10):
+            texto = f'{valor:.{digitos}g}'
+            if arredondar_float(float(texto)) == valor:
+                break
+        if '.' not in texto and 'e' not in texto:
+            texto += '.0'
+        return texto + 'f'
+
+    def converter_constante(self, constante, tipo):
+        """Converte uma constante para o tipo C de destino, como faria o C"""
+        if constante is None or constante[1] == 'literal':
+            return None
+        valor, _ = constante
+        if tipo == 'int':
+            if not math.isfinite(valor):
+                return None
+            valor = int(valor)  # trunca em direção a zero
+            return (valor, 'int') if INT_MIN <= valor <= INT_MAX else None
+        if not math.isfinite(valor):
+            return None  # inf e NaN não têm literal em C
+        if tipo == 'float':
+            valor = arredondar_float(float(valor))
+            return None if valor is None else (valor, 'float')
+        return (float(valor), 'double')
+
+    def negar_constante(self, constante):
+        valor, tipo = constante
+        if tipo == 'literal':
+            return None
+        if tipo == 'int':
+            return (inteiro_c(-valor), tipo)
+        return (-valor, tipo)
+
+    def operar_constantes(self, operador, esquerda, direita):
+        """Avalia um operador binário sobre duas constantes com a semântica do C gerado.
+
+        Inteiros usam divisão truncada e resto com o sinal do dividendo; reais
+        respeitam a precisão float/double de cada operando. Devolve None quando
+        o resultado não pode ser dobrado com segurança (divisão por zero,
+        estouro de reais, cadeias). +, - e * de inteiros que estouram dão a volta
+        em 32 bits: deixá-los sem dobrar poria o estouro no C com as constantes
+        propagadas.
+        """
+        if esquerda is None or direita is None or 'literal' in (esquerda[1], direita[1]):
+            return None
+        tipo = max(esquerda[1], direita[1], key=('int', 'float', 'double').index)
+        a = self.converter_constante(esquerda, tipo)
+        b = self.converter_constante(direita, tipo)
+        if a is None or b is None:
+            return None
+        a, b = a[0], b[0]
+
+        if operador in ('&&', '||'):
+            resultado = (a != 0 and b != 0) if operador == '&&' else (a != 0 or b != 0)
+            return (int(resultado), 'int')
+        comparacoes = {
+            '==': a == b, '!=': a != b, '<': a < b,
+            '<=': a <= b, '>': a > b, '>=': a >= b,
+        }
+        if operador in comparacoes:
+            return (int(comparacoes[operador]), 'int')
+
+        if operador in ('/', '%') and b == 0:
+            return None
+        if tipo == 'int':
+            if operador == '+':
+                resultado = a + b
+            elif operador == '-':
+                resultado = a - b
+            elif operador == '*':
+                resultado = a * b
+            elif operador == '/':
+                resultado = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+            else:
+                resultado = abs(a) % abs(b) * (-1 if a < 0 else 1)
+            if operador in '+-*':
+                return (inteiro_c(resultado), 'int')
+            # INT_MIN / -1 interrompe o programa: fica para a execução
+            return (resultado, 'int') if INT_MIN <= resultado <= INT_MAX else None
+
+        if operador == '%':
+            return None
+        resultado = {'+': a + b, '-': a - b, '*': a * b, '/': a / b if b else 0}[operador]
+        if tipo == 'float':
+            resultado = arredondar_float(resultado)
+        if resultado is None or resultado != resultado or abs(resultado) == float('inf'):
+            return None
+        return (resultado, tipo)
+
+    def tipo_acesso_campo(self, ctx):
+        """Tipo LA de reg.campo"""
+        nome_var, nome_campo = ctx.IDENT(0).getText(), ctx.IDENT(1).getText()
+        tipo_registro = self.resolver_tipo(self.tipos_variaveis.get(nome_var))
+        return self.campos_registro.get(tipo_registro, {}).get(nome_campo)
+
+    def tipo_expressao(self, ctx):
+        """Determina o tipo LA de uma expressão (None se não for possível)"""
+        if isinstance(ctx, LAParser.ExpressaoContext):
+            return self.tipo_expressao(ctx.expressao_logica())
+
+        if isinstance(ctx, (LAParser.Expressao_logicaContext, LAParser.Expressao_relacionalContext)):
+            if ctx.getChildCount() > 1:
+                return 'logico'
+            return self.tipo_expressao(ctx.getChild(0))
+
+        if isinstance(ctx, (LAParser.Expressao_aritmeticaContext, LAParser.TermoContext)):
+            tipos = [self.resolver_tipo(self.tipo_expressao(ctx.getChild(i)))
+                     for i in range(0, ctx.getChildCount(), 2)]
+            if len(tipos) == 1:
+                return tipos[0]
+            if 'real' in tipos:
+                return 'real'
+            if all(t in ('inteiro', 'logico') for t in tipos):
+                return 'inteiro'
+            return tipos[0] if all(t == tipos[0] for t in tipos) else None
+
+        if isinstance(ctx, LAParser.FatorContext):
+            primeiro = ctx.getChild(0).getText()
+            if ctx.getChildCount() == 2 and primeiro == 'nao':
+                return 'logico'
+            if ctx.getChildCount() == 2 and primeiro == '-':
+                return self.tipo_expressao(ctx.fator())
+            if ctx.E_COMERCIAL():
+                alvo = ctx.getChild(1)
+                tipo = self.tipo_acesso_campo(alvo) if ctx.acesso_campo() else self.tipos_variaveis.get(alvo.getText())
+                return f'^{tipo}'
+            if ctx.ABREPAR():
+                return self.tipo_expressao(ctx.expressao())
+            if ctx.CIRCUNFLEXO():
+                tipo = self.tipos_variaveis.get(ctx.IDENT().getText()) or ''
+                return tipo[1:] if tipo.startswith('^') else None
+            if ctx.chamada_funcao():
+                return self.tipos_funcoes.get(ctx.chamada_funcao().IDENT().getText())
+            if ctx.potencia():
+                tipos = [self.resolver_tipo(self.tipo_expressao(e)) for e in ctx.potencia().expressao()]
+                return 'inteiro' if all(t in ('inteiro', 'logico') for t in tipos) else 'real'
+            if ctx.acesso_campo():
+                return self.tipo_acesso_campo(ctx.acesso_campo())
+            if ctx.acesso_array():
+                return self.tipos_variaveis.get(ctx.acesso_array().IDENT().getText())
+            if ctx.IDENT():
+                return self.tipos_variaveis.get(ctx.IDENT().getText())
+            if ctx.NUM_INT():
+                return 'inteiro'
+            if ctx.NUM_REAL():
+                return 'real'
+            if ctx.CADEIA() or ctx.subliteral():
+                return 'literal'
+            if primeiro in ('verdadeiro', 'falso'):
+                return 'logico'
+        return None
+
+
+def arredondar_float(valor):
+    """Arredonda um double para a precisão de um float C (None se estourar)"""
+    try:
+        arredondado = struct.unpack('f', struct.pack('f', valor))[0]
+    except OverflowError:
+        return None
+    # Conforme a versão, o pack devolve inf em vez de levantar OverflowError
+    return None if math.isinf(arredondado) and not math.isinf(valor) else arredondado
+
+
+# NaN que o x86 produz em 0.0/0.0 e inf - inf: com o bit de sinal ligado, o
+# printf da glibc o escreve como "-nan"
+NAN_C = struct.unpack('<d', bytes.fromhex('000000000000f8ff'))[0]
+
+
+def inteiro_c(valor):
+    """Reduz um inteiro ao int de 32 bits do C gerado, em complemento de dois
+    como o gcc faz com +, - e * que estouram"""
+    return (valor - INT_MIN) % (1 << 32) + INT_MIN
+
+
+def float_c(valor):
+    """Como arredondar_float, mas estourando para ±inf como a conversão do C"""
+    try:
+        return struct.unpack('f', struct.pack('f', valor))[0]
+    except OverflowError:
+        return math.copysign(math.inf, valor)
+
+
+def dividir_real(a, b):
+    """a / b em ponto flutuante IEEE, como no C: por zero dá ±inf ou NaN"""
+    if b:
+        return a / b
+    if a != a:
+        return a
+    if a == 0:
+        return NAN_C
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+def operar_reais(operador, a, b, tipo):
+    """+ - * / e comparações de reais no tipo C 'float' ou 'double' com
+    infinitos e NaN, o que operar_constantes recusa por não poder dobrar"""
+    if tipo == 'float':
+        a, b = float_c(a), float_c(b)
+    else:
+        a, b = float(a), float(b)
+    comparacoes = {'==': a == b, '!=': a != b, '<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b}
+    if operador in comparacoes:
+        return (int(comparacoes[operador]), 'int')
+    resultado = (a + b if operador == '+' else a - b if operador == '-'
+                 else a * b if operador == '*' else dividir_real(a, b))
+    return (float_c(resultado) if tipo == 'float' else resultado, tipo)
+
+
+def potencia_c(base, expoente, funcao):
+    """Valor de pot_inteiro, pot_real ou pow do C gerado para qualquer
+    argumento: inteiros em aritmética unsigned de 32 bits, reais com ±inf e NaN"""
+    if funcao == 'pot_inteiro':
+        if expoente < 0:
+            return (-1 if expoente % 2 else 1) if base == -1 else int(base == 1)
+        resultado = pow(base, expoente, 1 << 32)
+        return resultado - (1 << 32) if resultado > INT_MAX else resultado
+    if funcao == 'pot_real':
+        n = abs(expoente)
+        if expoente < 0:
+            base = dividir_real(1.0, base)
+        resultado = 1.0
+        while n > 0:
+            if n & 1:
+                resultado *= base
+            base *= base
+            n >>= 1
+        return resultado
+    impar = math.isfinite(expoente) and expoente == math.floor(expoente) and math.fmod(expoente, 2) != 0
+    try:
+        return math.pow(base, expoente)
+    except OverflowError:
+        return -math.inf if base < 0 and impar else math.inf
+    except ValueError:
+        if base == 0:
+            # Zero com expoente negativo: o sinal de -0.0 só fica com expoente ímpar
+            return -math.inf if math.copysign(1.0, base) < 0 and impar else math.inf
+        return NAN_C
+
+
+def formatar_real(valor):
+    """Texto de printf("%f"), inclusive o -nan da glibc"""
+    if valor != valor and math.copysign(1.0, valor) < 0:
+        return '-nan'
+    return '%f' % valor
+
+
+def decodificar_cadeia_c(texto):
+    """Bytes de uma CADEIA do LA como o C gerado os vê: o texto vai entre aspas
+    no .c, então escapes do C valem e "" junta duas cadeias adjacentes"""
+    corpo = texto[1:-1].replace('""', '').encode('utf-8')
+    resultado, i = bytearray(), 0
+    simples = {ord(c): ord(v) for c, v in zip('ntrabfv\\\'"?', '\n\t\r\a\b\f\v\\\'"?')}
+    while i < len(corpo):
+        if corpo[i] != ord('\\') or i + 1 == len(corpo):
+            resultado.append(corpo[i])
+            i += 1
+            continue
+        i += 1
+        if chr(corpo[i]) in '01234567':
+            fim = i
+            while fim < len(corpo) and fim < i + 3 and chr(corpo[fim]) in '01234567':
+                fim += 1
+            resultado.append(int(corpo[i:fim], 8) & 0xFF)
+            i = fim
+        elif corpo[i] == ord('x') and i + 1 < len(corpo) and chr(corpo[i + 1]) in string.hexdigits:
+            fim = i + 1
+            while fim < len(corpo) and chr(corpo[fim]) in string.hexdigits:
+                fim += 1
+            resultado.append(int(corpo[i + 1:fim], 16) & 0xFF)
+            i = fim
+        else:
+            resultado.append(simples.get(corpo[i], corpo[i]))
+            i += 1
+    return bytes(resultado)
+
+def cadeia_c(dados):
+    """Corpo de uma cadeia C com exatamente os bytes dados (octais sempre com
+    três dígitos, para não absorverem um dígito seguinte)"""
+    partes = []
+    for byte in dados:
+        caractere = chr(byte)
+        if caractere in '"\\':
+            partes.append('\\' + caractere)
+        elif caractere == '\n':
+            partes.append('\\n')
+        elif caractere == '\t':
+            partes.append('\\t')
+        elif 32 <= byte < 127:
+            partes.append(caractere)
+        else:
+            partes.append(f'\\{byte:03o}')
+    return ''.join(partes)
+
+
+class ErroAvaliacao(Exception):
+    """O programa não pode seguir sendo interpretado (precisa de entrada, passou
+    do orçamento ou faria algo cujo resultado o C não define)"""
+
+
+class Retorno(Exception):
+    """'retorne' em execução: desvia até a chamada da função"""
+    def __init__(self, valor):
+        super().__init__()
+        self.valor = valor
+
+
+class EntradaPadrao:
+    """A entrada do programa consumida como o runtime C gerado a consome
+    (espiar_entrada, leia_inteiro, leia_real e leia_literal de AUXILIARES_C)"""
+
+    def __init__(self, descritor=0, ao_esperar=None):
+        self.descritor = descritor
+        self.ao_esperar = ao_esperar  # Chamado antes de esperar por mais entrada
+        self.buffer = b''
+        self.inicio = 0
+
+    def espiar(self):
+        """Próximo byte sem consumi-lo (None no fim da entrada)"""
+        if self.inicio == len(self.buffer):
+            if self.ao_esperar is not None:
+                self.ao_esperar()
+            self.buffer = os.read(self.descritor, 1 << 16)
+            self.inicio = 0
+            if not self.buffer:
+                return None
+        return self.buffer[self.inicio]
+
+    def pular_espacos(self):
+        c = self.espiar()
+        while c is not None and (c == 32 or 9 <= c <= 13):
+            self.inicio += 1
+            c = self.espiar()
+        return c
+
+    def ler_inteiro(self):
+        """Como scanf("%d") com estouro em 32 bits; None se não há número"""
+        c = self.pular_espacos()
+        negativo = False
+        if c in (ord('-'), ord('+')):
+            negativo = c == ord('-')
+            self.inicio += 1
+            c = self.espiar()
+        if c is None or not ord('0') <= c <= ord('9'):
+            return None
+        valor = 0
+        while c is not None and ord('0') <= c <= ord('9'):
+            valor = (valor * 10 + c - ord('0')) & 0xFFFFFFFF
+            self.inicio += 1
+            c = self.espiar()
+        if negativo:
+            valor = -valor & 0xFFFFFFFF
+        return valor - (1 << 32) if valor > INT_MAX else valor
+
+    def ler_real(self):
+        """Recorta o número como leia_real e converte como strtof; None se não há dígitos"""
+        texto, digitos = bytearray(), 0
+        c = self.pular_espacos()
+
+        def guardar(c):
+            if len(texto) < 63:
+                texto.append(c)
+            self.inicio += 1
+            return self.espiar()
+
+        if c in (ord('-'), ord('+')):
+            c = guardar(c)
+        while c is not None and ord('0') <= c <= ord('9'):
+            c, digitos = guardar(c), digitos + 1
+        if c == ord('.'):
+            c = guardar(c)
+            while c is not None and ord('0') <= c <= ord('9'):
+                c, digitos = guardar(c), digitos + 1
+        if digitos > 0 and c in (ord('e'), ord('E')):
+            c = guardar(c)
+            if c in (ord('-'), ord('+')):
+                c = guardar(c)
+            while c is not None and ord('0') <= c <= ord('9'):
+                c = guardar(c)
+        if digitos == 0:
+            return None
+        numero = re.match(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?', texto.decode('ascii'))
+        return float_mais_proximo(fractions.Fraction(numero.group(0)))
+
+    def ler_literal(self, max_literal):
+        """Como fgets sem o '\\n': até o fim da linha ou max_literal bytes; None no fim da entrada"""
+        dados, c = bytearray(), 0
+        while len(dados) < max_literal:
+            c = self.espiar()
+            if c is None:
+                break
+            self.inicio += 1
+            if c == ord('\n'):
+                break
+            dados.append(c)
+        return bytes(dados) if dados or c == ord('\n') else None
+
+
+def float_mais_proximo(numero):
+    """O float C mais próximo de um racional, empates para o par (como strtof)"""
+    try:
+        aproximado = arredondar_float(float(numero))
+    except OverflowError:
+        aproximado = None
+    if aproximado is None:
+        return math.copysign(math.inf, numero)
+    # float() já arredondou uma vez para double: confere os vizinhos em float
+    bits = struct.unpack('<i', struct.pack('<f', aproximado))[0]
+    candidatos = []
+    for vizinho in (bits - 1, bits, bits + 1):
+        try:
+            valor = struct.unpack('<f', struct.pack('<i', vizinho))[0]
+        except struct.error:
+            continue
+        if math.isfinite(valor) and (valor >= 0) == (aproximado >= 0):
+            candidatos.append((abs(fractions.Fraction(valor) - numero), vizinho % 2, valor))
+    return min(candidatos)[2]
+
+
+# Valor de uma célula nunca atribuída quando a execução não é estrita (--run)
+VALORES_ZERO = {'int': 0, 'float': 0.0, 'literal': b''}
+
+
+class Celula:
+    """Uma posição de memória do programa interpretado. tipo é o tipo C do que
+    ela guarda ('int', 'float', 'literal', 'ponteiro', 'registro' ou 'vetor');
+    valor None é um valor indefinido (variável nunca atribuída)"""
+    __slots__ = ('valor', 'tipo')
+
+    def __init__(self, valor, tipo):
+        self.valor = valor
+        self.tipo = tipo
+
+
+class Interpretador:
+    """Executa um programa LA com a semântica do C gerado.
+
+    Os valores são os pares (valor, tipo C) do dobramento de constantes do
+    GeradorCodigo, e as operações são as mesmas dele: float e double com a
+    precisão de cada operando, divisão inteira truncada, cadeias como bytes
+    limitados a max_literal. Variáveis, elementos e campos são Celulas, o que
+    dá o comportamento de &x, ^p e dos parâmetros passados por referência.
+
+    Tudo o que o C gerado não define ou que o interpretador não reproduz
+    (leitura sem entrada, valor indefinido, estouro, divisão por zero, acesso
+    fora do vetor, orçamento de passos esgotado) levanta ErroAvaliacao.
+
+    Com limite_passos (avaliação na compilação) a execução é estrita: também
+    limita saída e vetores e não aceita estouro de inteiros. Sem ele (--run),
+    estouros em + - * dão a volta em 32 bits como no binário do gcc, a saída
+    vai para o arquivo saida_fd e a entrada vem de entrada (uma EntradaPadrao).
+    """
+
+    def __init__(self, programa, max_literal=MAX_LITERAL_PADRAO, limite_passos=None, entrada=None,
+                 saida_fd=None):
+        self.programa = programa
+        self.max_literal = max_literal
+        self.limite_passos = limite_passos
+        self.estrito = limite_passos is not None
+        self.entrada = entrada
+        self.saida_fd = saida_fd
+        self.passos = 0
+        self.operacoes = GeradorCodigo(max_literal=max_literal)  # dobramento com a semântica do C
+        self.saida = bytearray()
+        self.tipos_alias = {}
+        self.registros = {}  # tipo registro -> {campo: tipo LA}
+        self.constantes = {}  # nome -> (valor, tipo C)
+        self.subprogramas = {}  # nome -> contexto da declaração
+        self.globais = {}  # variáveis do algoritmo: nome -> Celula
+        self.quadros = [self.globais]  # variáveis visíveis: as do subprograma em execução
+        self.itens_concluidos = 0  # Itens do corpo do algoritmo já executados
+        self.comandos_concluidos = set()  # id dos comandos do corpo do algoritmo já executados
+        self.completo = False
+        self.reduzidos = {}  # id do nó da expressão -> primeiro nó com mais de um filho
+        self.formas = {}  # id do fator -> (forma, dado), ver classificar_fator
+
+    def executar(self, ate=None):
+        """Executa as declarações preliminares e o corpo do algoritmo (só os
+        'ate' primeiros itens do corpo, se dado)"""
+        try:
+            if self.programa.declaracoes_preliminares():
+                for item in self.programa.declaracoes_preliminares().getChildren():
+                    self.executar_item(item)
+            itens = [item for item in self.programa.bloco_algoritmo().corpo_algoritmo().getChildren()
+                     if isinstance(item, ParserRuleContext)]
+            for numero, item in enumerate(itens):
+                if numero == ate:
+                    return
+                self.executar_item(item)
+                self.itens_concluidos = numero + 1
+                if isinstance(item, LAParser.ComandoContext):
+                    self.comandos_concluidos.add(id(item))
+            self.completo = True
+        except RecursionError:
+            raise ErroAvaliacao('recursao profunda demais')
+
+    def executar_item(self, item):
+        """Uma declaração (de tipo, constante, variável ou subprograma) ou comando"""
+        if isinstance(item, LAParser.ComandoContext):
+            self.executar_comando(item)
+        elif isinstance(item, LAParser.DeclaracaoContext):
+            self.declarar_variaveis(item.lista_variaveis(), self.globais)
+        elif isinstance(item, LAParser.Declaracao_constanteContext):
+            self.declarar_constante(item)
+        elif isinstance(item, LAParser.Declaracao_tipoContext):
+            nome = item.IDENT().getText()
+            if item.tipo_registro():
+                self.registros[nome] = self.campos(item.tipo_registro())
+            else:
+                self.tipos_alias[nome] = item.tipo_identificado().getText()
+        elif isinstance(item, (LAParser.Declaracao_funcaoContext, LAParser.Declaracao_procedimentoContext)):
+            self.subprogramas[item.IDENT().getText()] = item
+
+    def declarar_constante(self, ctx):
+        """Mesmo valor e tipo C que a constante tem no código gerado"""
+        valor = ctx.valor_constante()
+        if valor.CADEIA():
+            constante = (decodificar_cadeia_c(valor.CADEIA().getText()), 'literal')
+        elif valor.getText() in ('verdadeiro', 'falso'):
+            constante = (int(valor.getText() == 'verdadeiro'), 'int')
+        elif ctx.tipo_base().getText() == 'real':
+            constante = (float(valor.getText()), 'double')
+        elif valor.NUM_REAL():
+            constante = self.operacoes.converter_constante((float(valor.getText()), 'double'), 'int')
+        else:
+            constante = (int(valor.getText()), 'int')
+        if constante is None:
+            raise ErroAvaliacao(f'constante {ctx.IDENT().getText()}')
+        self.constantes[ctx.IDENT().getText()] = constante
+
+    def campos(self, tipo_registro):
+        return {ident.getText(): campo.tipo_base().getText()
+                for campo in tipo_registro.lista_campos().campo() for ident in campo.IDENT()}
+
+    def resolver_tipo(self, tipo_la):
+        visitados = set()
+        while tipo_la in self.tipos_alias and tipo_la not in visitados:
+            visitados.add(tipo_la)
+            tipo_la = self.tipos_alias[tipo_la]
+        return tipo_la
+
+    def nova_celula(self, tipo_la, campos=None, literal_vazio=True):
+        """Célula nova de um tipo LA (campos: os de um registro declarado no
+        lugar). Como no C gerado, só as variáveis literal começam definidas (vazias)"""
+        tipo = self.resolver_tipo(tipo_la)
+        if campos is None and tipo in self.registros:
+            campos = self.registros[tipo]
+        if tipo.startswith('^'):
+            return Celula(None, 'ponteiro')
+        if campos is not None:
+            return Celula({campo: self.nova_celula(tipo_campo, literal_vazio=False)
+                           for campo, tipo_campo in campos.items()}, 'registro')
+        if tipo in ('inteiro', 'logico'):
+            return Celula(None, 'int')
+        if tipo == 'real':
+            return Celula(None, 'float')
+        if tipo == 'literal':
+            return Celula(b'' if literal_vazio else None, 'literal')
+        raise ErroAvaliacao(f'tipo {tipo_la}')
+
+    def declarar_variaveis(self, lista, quadro):
+        for variavel in lista.variavel():
+            tipo_ctx = variavel.tipo()
+            campos = None
+            if isinstance(tipo_ctx, LAParser.TipoRegistroContext):
+                campos = self.campos(tipo_ctx.tipo_registro())
+            filhos = list(variavel.getChildren())
+            i = 0
+            while filhos[i].getText() != ':':
+                if filhos[i].getText() == ',':
+                    i += 1
+                    continue
+                nome = filhos[i].getText()
+                if i + 1 < len(filhos) and filhos[i + 1].getText() == '[':
+                    tamanho = filhos[i + 2].getText()
+                    elementos = int(tamanho) if tamanho.isdigit() else self.constantes.get(tamanho, (None,))[0]
+                    if not isinstance(elementos, int) or elementos <= 0 or (
+                            self.estrito and elementos > LIMITE_ELEMENTOS_AVALIACAO):
+                        raise ErroAvaliacao(f'vetor {nome}')
+                    quadro[nome] = Celula([self.nova_celula(tipo_ctx.getText(), campos)
+                                           for _ in range(elementos)], 'vetor')
+                    i += 4
+                else:
+                    quadro[nome] = self.nova_celula(tipo_ctx.getText(), campos)
+                    i += 1
+
+    def passo(self):
+        self.passos += 1
+        if self.limite_passos is not None and self.passos > self.limite_passos:
+            raise ErroAvaliacao('orcamento de passos esgotado')
+
+    # Comandos
+
+    def executar_comandos(self, comandos):
+        for comando in comandos.comando():
+            self.executar_comando(comando)
+
+    def executar_comando(self, ctx):
+        self.passo()
+        if ctx.atribuicao():
+            atribuicao = ctx.atribuicao()
+            valor = self.avaliar(atribuicao.expressao())
+            if atribuicao.CIRCUNFLEXO():
+                alvo = self.apontada(atribuicao.IDENT().getText())
+            else:
+                alvo = self.celula_alvo(atribuicao.getChild(0))
+            self.atribuir(alvo, valor)
+        elif ctx.escrita():
+            for expr in ctx.escrita().expressao():
+                self.escrever(self.avaliar(expr))
+        elif ctx.leitura():
+            self.ler(ctx.leitura())
+        elif ctx.comandose():
+            se = ctx.comandose()
+            if self.verdadeiro(self.avaliar(se.expressao())):
+                self.executar_comandos(se.comandos(0))
+            elif len(se.comandos()) > 1:
+                self.executar_comandos(se.comandos(1))
+        elif ctx.comandocaso():
+            self.executar_caso(ctx.comandocaso())
+        elif ctx.comandopara():
+            self.executar_para(ctx.comandopara())
+        elif ctx.comandoenquanto():
+            enquanto = ctx.comandoenquanto()
+            while self.verdadeiro(self.avaliar(enquanto.expressao())):
+                self.executar_comandos(enquanto.comandos())
+                self.passo()
+        elif ctx.comandofaca():
+            # Como no C gerado: repete enquanto a condição do 'ate' for verdadeira
+            faca = ctx.comandofaca()
+            self.executar_comandos(faca.comandos())
+            while self.verdadeiro(self.avaliar(faca.expressao())):
+                self.passo()
+                self.executar_comandos(faca.comandos())
+        elif ctx.chamada_procedimento():
+            self.chamar(ctx.chamada_procedimento())
+        elif ctx.retorne():
+            raise Retorno(self.avaliar(ctx.retorne().expressao()))
+
+    def executar_caso(self, ctx):
+        seletor = self.avaliar(ctx.expressao())
+        if seletor[1] != 'int':
+            raise ErroAvaliacao('caso com seletor nao inteiro')
+        for selecao in ctx.selecao():
+            if self.operacoes.selecao_contem(selecao, seletor[0]):
+                self.executar_comandos(selecao.comandos())
+                return
+        if ctx.comandos():
+            self.executar_comandos(ctx.comandos())
+
+    def executar_para(self, ctx):
+        """for (var = inicio; var <= fim; var++) com o limite avaliado uma vez"""
+        variavel = self.celula_alvo(ctx.IDENT())
+        self.atribuir(variavel, self.avaliar(ctx.expressao(0)))
+        limite = self.avaliar(ctx.expressao(1))
+        while self.verdadeiro(self.operar('<=', self.valor_celula(variavel), limite)):
+            self.executar_comandos(ctx.comandos())
+            self.passo()
+            self.atribuir(variavel, self.operar('+', self.valor_celula(variavel), (1, 'int')))
+
+    def ler(self, ctx):
+        """leia_inteiro/leia_real/leia_literal conforme o tipo de cada alvo; sem
+        valor na entrada, o alvo fica como estava"""
+        if self.entrada is None:
+            raise ErroAvaliacao('leitura da entrada')
+        for alvo in ctx.lista_identificadores().getChildren():
+            if alvo.getText() == ',':
+                continue
+            celula = self.celula_alvo(alvo)
+            if celula.tipo == 'int':
+                valor = self.entrada.ler_inteiro()
+            elif celula.tipo == 'float':
+                valor = self.entrada.ler_real()
+            elif celula.tipo == 'literal':
+                valor = self.entrada.ler_literal(self.max_literal)
+            else:
+                raise ErroAvaliacao(f'leitura de {celula.tipo}')
+            if valor is not None:
+                celula.valor = valor
+
+    def descarregar(self):
+        """Escreve no saida_fd o que foi escrito até aqui"""
+        if self.saida_fd is not None and self.saida:
+            os.write(self.saida_fd, self.saida)
+            self.saida.clear()
+
+    def escrever(self, valor):
+        """O que escreva_inteiro/escreva_real/escreva_literal escreveriam"""
+        dados, tipo = valor
+        if tipo == 'literal':
+            self.saida += dados
+        elif tipo == 'int':
+            self.saida += str(dados).encode()
+        elif tipo in ('float', 'double'):
+            self.saida += formatar_real(dados).encode()
+        else:
+            raise ErroAvaliacao(f'escrita de {tipo}')
+        if len(self.saida) > LIMITE_SAIDA_AVALIACAO:
+            if self.estrito:
+                raise ErroAvaliacao('saida grande demais')
+            self.descarregar()
+
+    def chamar(self, chamada):
+        """Executa um subprograma; devolve o valor retornado (None em procedimentos)"""
+        nome = chamada.IDENT().getText()
+        subprograma = self.subprogramas.get(nome)
+        if subprograma is None:
+            raise ErroAvaliacao(f'subprograma {nome}')
+        parametros = subprograma.parametros().parametro() if subprograma.parametros() else []
+        expressoes = chamada.lista_expressao().expressao() if chamada.lista_expressao() else []
+        if len(parametros) != len(expressoes):
+            raise ErroAvaliacao(f'argumentos de {nome}')
+
+        # Registros e literais 'var' são passados por referência; o resto, por cópia
+        quadro = {}
+        for parametro, expr in zip(parametros, expressoes):
+            tipo_la = (parametro.tipo_base() or parametro.tipo_identificado()).getText()
+            tipo = self.resolver_tipo(tipo_la)
+            if parametro.getChild(0).getText() == 'var' and (tipo == 'literal' or tipo in self.registros):
+                fator = self.operacoes.fator_unico(expr)
+                alvo = fator and (fator.acesso_campo() or fator.acesso_array() or fator.IDENT())
+                if alvo is None or fator.getChildCount() != 1:
+                    raise ErroAvaliacao(f'argumento var de {nome}')
+                quadro[parametro.IDENT().getText()] = self.celula_alvo(alvo)
+            else:
+                celula = self.nova_celula(tipo_la)
+                self.atribuir(celula, self.avaliar(expr))
+                quadro[parametro.IDENT().getText()] = celula
+
+        if len(self.quadros) > LIMITE_CHAMADAS_ARVORE:
+            raise ErroAvaliacao('recursao profunda demais')
+        self.quadros.append(quadro)
+        try:
+            if subprograma.declaracoes_locais():
+                for lista in subprograma.declaracoes_locais().lista_variaveis():
+                    self.declarar_variaveis(lista, quadro)
+            self.executar_comandos(subprograma.comandos())
+        except Retorno as retorno:
+            if isinstance(subprograma, LAParser.Declaracao_procedimentoContext):
+                return None
+            resultado = self.nova_celula(subprograma.tipo_base().getText())
+            self.atribuir(resultado, retorno.valor)
+            return self.valor_celula(resultado)
+        finally:
+            self.quadros.pop()
+        if isinstance(subprograma, LAParser.Declaracao_funcaoContext):
+            raise ErroAvaliacao(f'funcao {nome} terminou sem retorne')
+        return None
+
+    # Memória
+
+    def celula(self, nome):
+        quadro = self.quadros[-1]
+        if nome not in quadro:
+            raise ErroAvaliacao(f'variavel {nome}')
+        return quadro[nome]
+
+    def celula_alvo(self, ctx):
+        """Célula de IDENT, reg.campo ou v[i]"""
+        if isinstance(ctx, LAParser.Acesso_campoContext):
+            registro = self.celula(ctx.IDENT(0).getText())
+            for campo in ctx.IDENT()[1:]:
+                if registro.tipo != 'registro' or campo.getText() not in registro.valor:
+                    raise ErroAvaliacao(f'campo {ctx.getText()}')
+                registro = registro.valor[campo.getText()]
+            return registro
+        if isinstance(ctx, LAParser.Acesso_arrayContext):
+            vetor = self.celula(ctx.IDENT().getText())
+            indice, tipo = self.avaliar(ctx.expressao())
+            if vetor.tipo != 'vetor' or tipo != 'int' or not 0 <= indice < len(vetor.valor):
+                raise ErroAvaliacao(f'acesso {ctx.getText()} fora do vetor')
+            return vetor.valor[indice]
+        return self.celula(ctx.getText())
+
+    def apontada(self, nome):
+        """Célula para onde o ponteiro aponta"""
+        ponteiro = self.celula(nome)
+        if ponteiro.tipo != 'ponteiro' or ponteiro.valor is None:
+            raise ErroAvaliacao(f'ponteiro {nome} indefinido')
+        return ponteiro.valor
+
+    def valor_celula(self, celula):
+        if celula.valor is None:
+            # Sem avaliação estrita, um valor nunca atribuído vale zero (o que a
+            # memória estática e a pilha nova do binário costumam ter)
+            if self.estrito or celula.tipo not in VALORES_ZERO:
+                raise ErroAvaliacao('valor indefinido')
+            return VALORES_ZERO[celula.tipo], celula.tipo
+        return celula.valor, celula.tipo
+
+    def atribuir(self, celula, valor):
+        """Guarda o valor com a conversão que a atribuição C faria"""
+        dados, tipo = valor
+        if celula.tipo in ('int', 'float'):
+            convertido = self.operacoes.converter_constante(valor, celula.tipo)
+            if convertido is None and not self.estrito and celula.tipo == 'float' and tipo in ('float', 'double'):
+                convertido = (float_c(dados), 'float')
+            if convertido is None:
+                raise ErroAvaliacao(f'conversao de {tipo} para {celula.tipo}')
+            celula.valor = convertido[0]
+        elif celula.tipo != tipo:
+            raise ErroAvaliacao(f'atribuicao de {tipo} a {celula.tipo}')
+        elif tipo == 'literal':
+            celula.valor = dados[:self.max_literal]
+        elif tipo == 'registro':
+            if dados is not celula.valor:
+                for campo, destino in celula.valor.items():
+                    destino.valor = dados[campo].valor
+        elif tipo == 'ponteiro':
+            celula.valor = dados
+        else:
+            raise ErroAvaliacao(f'atribuicao de {tipo}')
+
+    # Expressões
+
+    def operar(self, operador, esquerda, direita):
+        resultado = self.operacoes.operar_constantes(operador, esquerda, direita)
+        tipos = {esquerda[1], direita[1]}
+        if (resultado is None and not self.estrito and operador in ('+', '-', '*', '/', '==', '!=', '<', '<=', '>', '>=')
+                and tipos <= {'int', 'float', 'double'} and tipos != {'int'}):
+            # Reais seguem o IEEE como no binário: x / 0.0 é ±inf, 0.0 / 0.0 é NaN
+            resultado = operar_reais(operador, esquerda[0], direita[0],
+                                     'double' if 'double' in tipos else 'float')
+        if resultado is None:
+            raise ErroAvaliacao(f'operacao {operador} indefinida')
+        return resultado
+
+    def verdadeiro(self, valor):
+        dados, tipo = valor
+        if tipo in ('int', 'float', 'double'):
+            return dados != 0
+        if tipo == 'ponteiro':
+            return dados is not None
+        raise ErroAvaliacao(f'condicao do tipo {tipo}')
+
+    def avaliar(self, ctx):
+        """Valor (valor, tipo C) de uma expressão"""
+        # Regras de um filho só (expressao -> ... -> fator) são puladas de uma vez
+        no = self.reduzidos.get(id(ctx))
+        if no is None:
+            no = ctx
+            while not isinstance(no, LAParser.FatorContext) and no.getChildCount() == 1:
+                no = no.getChild(0)
+            self.reduzidos[id(ctx)] = no
+        ctx = no
+
+        if isinstance(ctx, LAParser.Expressao_logicaContext):
+            valor = self.avaliar(ctx.getChild(0))
+            for i in range(1, ctx.getChildCount(), 2):
+                # 'e'/'ou' com curto-circuito, associando à esquerda
+                if (ctx.getChild(i).getText() == 'e') == self.verdadeiro(valor):
+                    valor = (int(self.verdadeiro(self.avaliar(ctx.getChild(i + 1)))), 'int')
+                else:
+                    valor = (int(self.verdadeiro(valor)), 'int')
+            return valor
+
+        if isinstance(ctx, LAParser.Expressao_relacionalContext):
+            if ctx.getChildCount() == 1:
+                return self.avaliar(ctx.getChild(0))
+            operador = {'=': '==', '<>': '!='}.get(ctx.getChild(1).getText(), ctx.getChild(1).getText())
+            esquerda, direita = (self.avaliar_comparado(e) for e in ctx.expressao_aritmetica())
+            if esquerda[1] == 'literal' and direita[1] == 'literal':
+                a, b = esquerda[0], direita[0]
+                comparacoes = {'==': a == b, '!=': a != b, '<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b}
+                return int(comparacoes[operador]), 'int'
+            return self.operar(operador, esquerda, direita)
+
+        if isinstance(ctx, (LAParser.Expressao_aritmeticaContext, LAParser.TermoContext)):
+            valor = self.avaliar(ctx.getChild(0))
+            for i in range(1, ctx.getChildCount(), 2):
+                operador, direita = ctx.getChild(i).getText(), self.avaliar(ctx.getChild(i + 1))
+                if valor[1] == 'literal' and direita[1] == 'literal' and operador == '+':
+                    valor = (valor[0] + direita[0], 'literal')
+                else:
+                    valor = self.operar(operador, valor, direita)
+            return valor
+
+        return self.avaliar_fator(ctx)
+
+    def avaliar_comparado(self, ctx):
+        """Operando de comparação: concatenações são montadas (e truncadas) antes"""
+        valor = self.avaliar(ctx)
+        fator = self.operacoes.fator_unico(ctx)
+        while fator is not None and fator.ABREPAR():
+            fator = self.operacoes.fator_unico(fator.expressao())
+        if valor[1] == 'literal' and fator is None:
+            return valor[0][:self.max_literal], 'literal'
+        return valor
+
+    def avaliar_fator(self, ctx):
+        forma, dado = self.formas.get(id(ctx)) or self.classificar_fator(ctx)
+        if forma == 'constante':
+            return dado
+        if forma == 'nome':
+            if dado in self.constantes and dado not in self.quadros[-1]:
+                return self.constantes[dado]
+            return self.valor_celula(self.celula(dado))
+        if forma == 'acesso':
+            return self.valor_celula(self.celula_alvo(dado))
+        if forma == 'parenteses':
+            return self.avaliar(dado)
+        if forma == 'negacao':
+            valor = self.avaliar(dado)
+            negado = self.operacoes.negar_constante(valor) if valor[1] in ('int', 'float', 'double') else None
+            if negado is None:
+                raise ErroAvaliacao('negacao indefinida')
+            return negado
+        if forma == 'nao':
+            return int(not self.verdadeiro(self.avaliar(dado))), 'int'
+        if forma == 'endereco':
+            return self.celula_alvo(dado), 'ponteiro'
+        if forma == 'apontado':
+            return self.valor_celula(self.apontada(dado))
+        if forma == 'chamada':
+            return self.chamar(dado)
+        if forma == 'potencia':
+            return self.avaliar_potencia(dado)
+        if forma == 'subliteral':
+            cadeia = self.avaliar_comparado(dado.expressao())
+            if cadeia[1] != 'literal':
+                raise ErroAvaliacao('subLiteral de nao literal')
+            inicio, tamanho = (int(numero.getText()) for numero in dado.NUM_INT())
+            inicio = min(max(inicio - 1, 0), len(cadeia[0]))
+            return cadeia[0][inicio:inicio + max(tamanho, 0)], 'literal'
+        raise ErroAvaliacao(dado)
+
+    def classificar_fator(self, ctx):
+        """(forma, dado) de um fator, guardado para as próximas avaliações dele"""
+        primeiro = ctx.getChild(0).getText()
+        if ctx.getChildCount() == 2 and primeiro in ('-', 'nao'):
+            forma = ('negacao' if primeiro == '-' else 'nao', ctx.fator())
+        elif ctx.E_COMERCIAL():
+            forma = ('endereco', ctx.getChild(1))
+        elif ctx.ABREPAR():
+            forma = ('parenteses', ctx.expressao())
+        elif ctx.CIRCUNFLEXO():
+            forma = ('apontado', ctx.IDENT().getText())
+        elif ctx.chamada_funcao():
+            forma = ('chamada', ctx.chamada_funcao())
+        elif ctx.potencia():
+            forma = ('potencia', ctx.potencia())
+        elif ctx.acesso_campo() or ctx.acesso_array():
+            forma = ('acesso', ctx.acesso_campo() or ctx.acesso_array())
+        elif ctx.IDENT():
+            forma = ('nome', ctx.IDENT().getText())
+        elif ctx.NUM_INT():
+            valor = int(ctx.NUM_INT().getText())
+            forma = ('constante', (valor, 'int')) if valor <= INT_MAX else ('erro', 'inteiro grande demais')
+        elif ctx.NUM_REAL():
+            forma = ('constante', (float(ctx.getText()), 'double'))
+        elif ctx.CADEIA():
+            forma = ('constante', (decodificar_cadeia_c(ctx.CADEIA().getText()), 'literal'))
+        elif ctx.subliteral():
+            forma = ('subliteral', ctx.subliteral())
+        elif primeiro in ('verdadeiro', 'falso'):
+            forma = ('constante', (int(primeiro == 'verdadeiro'), 'int'))
+        else:
+            forma = ('erro', f'expressao {ctx.getText()}')
+        self.formas[id(ctx)] = forma
+        return forma
+
+    def avaliar_potencia(self, ctx):
+        """pot() como o gerador o traduz: dobrado, multiplicações em linha para
+        expoente constante pequeno, pot_inteiro/pot_real ou pow"""
+        expr_base, expr_expoente = ctx.expressao()
+        base, expoente = self.avaliar(expr_base), self.avaliar(expr_expoente)
+        if 'literal' in (base[1], expoente[1]):
+            raise ErroAvaliacao('pot de literal')
+        if expoente[1] != 'int':
+            funcao = 'pow'
+        else:
+            funcao = 'pot_inteiro' if base[1] == 'int' else 'pot_real'
+        constante = lambda expr: re.fullmatch(r'\d+(\.\d+)?', expr.getText()) or expr.getText() in self.constantes
+        if (funcao != 'pow' and not constante(expr_base) and constante(expr_expoente)
+                and 0 <= expoente[0] <= LIMITE_POT_INLINE and re.fullmatch(r'[\w.\[\]]+', expr_base.getText())):
+            if expoente[0] == 0:
+                return (1, 'int') if funcao == 'pot_inteiro' else (1.0, 'double')
+            resultado = base
+            for _ in range(expoente[0] - 1):
+                resultado = self.operar('*', resultado, base)
+            return resultado
+        resultado = self.operacoes.potencia_constante(base, expoente, funcao)
+        if resultado is None and not self.estrito:
+            tipo = 'int' if funcao == 'pot_inteiro' else 'double'
+            resultado = (potencia_c(base[0], expoente[0], funcao), tipo)
+        if resultado is None:
+            raise ErroAvaliacao('pot indefinida')
+        return resultado
+
+
+def avaliar_parcialmente(programa, max_literal=MAX_LITERAL_PADRAO):
+    """Executa na compilação o que o programa faz antes de precisar da entrada.
+
+    Devolve o Interpretador parado no fim do maior prefixo do corpo do algoritmo
+    que executa por inteiro dentro de LIMITE_PASSOS_AVALIACAO (completo se for o
+    programa todo), ou None se nenhum comando pôde ser executado. O prefixo é
+    executado de novo do início: o item que falhou pode ter deixado metade do
+    seu efeito no estado.
+    """
+    interpretador = Interpretador(programa, max_literal, LIMITE_PASSOS_AVALIACAO)
+    try:
+        interpretador.executar()
+        return interpretador
+    except ErroAvaliacao:
+        pass
+    if not interpretador.comandos_concluidos:
+        return None
+    prefixo = Interpretador(programa, max_literal, LIMITE_PASSOS_AVALIACAO)
+    try:
+        prefixo.executar(ate=interpretador.itens_concluidos)
+    except ErroAvaliacao:
+        return None
+    return prefixo
+
+
+# Bytecode do --run. Cada instrução são quatro inteiros (operação, a, b, c); os
+# operandos são, conforme a operação, registradores do quadro da função (variáveis,
+# constantes e temporários), endereços de desvio, posições de campo ou índices
+# na tabela de dados do programa
+(B_MOV, B_SOMA_I, B_SUB_I, B_MUL_I, B_DIV_I, B_MOD_I,
+ B_SOMA_F, B_SUB_F, B_MUL_F, B_DIV_F, B_SOMA_D, B_SUB_D, B_MUL_D, B_DIV_D,
+ B_NEG_I, B_NEG_R, B_NAO, B_LOGICO, B_F32, B_INTEIRO,
+ B_MENOR, B_MENOR_IGUAL, B_MAIOR, B_MAIOR_IGUAL, B_IGUAL, B_DIFERENTE,
+ B_SALTA, B_SE_FALSO, B_SE_VERDADE,
+ B_SALTA_MENOR, B_SALTA_MENOR_IGUAL, B_SALTA_MAIOR, B_SALTA_MAIOR_IGUAL, B_SALTA_IGUAL, B_SALTA_DIFERENTE,
+ B_PARA_PASSO, B_SOMA_V_I,
+ B_CONCATENA, B_TRUNCA, B_SUBLITERAL,
+ B_LE_V, B_GRAVA_V, B_GRAVA_V_REG, B_LE_CAMPO, B_GRAVA_CAMPO, B_COPIA_REG, B_NOVO_REG, B_NOVO_VETOR,
+ B_REF, B_REF_CAMPO, B_REF_ELEM, B_LE_REF, B_GRAVA_REF,
+ B_ESCREVE_I, B_ESCREVE_R, B_ESCREVE_L, B_LEIA_I, B_LEIA_R, B_LEIA_L,
+ B_POT_I, B_POT_R, B_POW,
+ B_CHAMA, B_RETORNA, B_RETORNA_NADA, B_COPIA_PARAM, B_ERRO, B_FIM) = range(68)
+
+ARITMETICAS_BYTECODE = {
+    ('+', 'int'): B_SOMA_I, ('-', 'int'): B_SUB_I, ('*', 'int'): B_MUL_I,
+    ('/', 'int'): B_DIV_I, ('%', 'int'): B_MOD_I,
+    ('+', 'float'): B_SOMA_F, ('-', 'float'): B_SUB_F, ('*', 'float'): B_MUL_F, ('/', 'float'): B_DIV_F,
+    ('+', 'double'): B_SOMA_D, ('-', 'double'): B_SUB_D, ('*', 'double'): B_MUL_D, ('/', 'double'): B_DIV_D,
+}
+COMPARACOES_BYTECODE = {'<': B_MENOR, '<=': B_MENOR_IGUAL, '>': B_MAIOR, '>=': B_MAIOR_IGUAL,
+                        '==': B_IGUAL, '!=': B_DIFERENTE}
+SALTOS_BYTECODE = {'<': B_SALTA_MENOR, '<=': B_SALTA_MENOR_IGUAL, '>': B_SALTA_MAIOR,
+                   '>=': B_SALTA_MAIOR_IGUAL, '==': B_SALTA_IGUAL, '!=': B_SALTA_DIFERENTE}
+COMPARACAO_INVERSA = {'<': '>=', '<=': '>', '>': '<=', '>=': '<', '==': '!=', '!=': '=='}
+
+# Descritor dos literais passados com 'var': o registrador guarda uma referência
+REF_LITERAL = ('ref', 'literal')
+NUMERICOS = ('int', 'float', 'double')
+
+
+class ProgramaBytecode:
+    """Um programa compilado para a MaquinaVirtual.
+
+    codigo é um array de inteiros, quatro por instrução; funcoes[f] é
+    (entrada, modelo): o endereço da primeira instrução da função f e os valores
+    iniciais dos seus registradores (constantes e zeros das variáveis; a função
+    0 é o algoritmo). dados guarda o que não cabe num operando: tabelas de
+    argumentos, modelos de registros e vetores, faixas de subLiteral e mensagens.
+    """
+
+    def __init__(self, codigo, funcoes, dados, max_literal):
+        self.codigo = codigo
+        self.funcoes = funcoes
+        self.dados = dados
+        self.max_literal = max_literal
+
+    def serializar(self):
+        return marshal.dumps((MARCA_BYTECODE, VERSAO_BYTECODE, self.max_literal, self.codigo.tobytes(),
+                              self.funcoes, self.dados))
+
+
+class CompiladorBytecode:
+    """Traduz um programa LA analisado para um ProgramaBytecode.
+
+    Cada subprograma tem um quadro de registradores endereçados por posição:
+    parâmetros primeiro, depois variáveis, constantes e temporários (reusados
+    de um comando para o outro). Os tipos são resolvidos aqui, então cada
+    instrução já é a operação do tipo C certo e a máquina virtual não consulta
+    tipos. A semântica é a do Interpretador sem limite de passos; construções
+    que este compilador não traduz levantam ErroAvaliacao, e o --run volta ao
+    Interpretador.
+
+    Descritores de tipo: 'int', 'float', 'double', 'literal', ('^', apontado),
+    ('registro', ((campo, descritor), ...)), ('vetor', elemento) e REF_LITERAL.
+    """
+
+    def __init__(self, programa, max_literal=MAX_LITERAL_PADRAO):
+        self.programa = programa
+        self.max_literal = max_literal
+        self.tabelas = Interpretador(programa, max_literal)  # tipos, constantes e subprogramas
+        self.codigo = []  # instruções [operação, a, b, c]
+        self.dados = []
+        self.indices_dados = {}
+        self.funcoes = [None]  # (entrada, modelo) por função; a 0 é o algoritmo
+        self.indices_funcoes = {}  # nome do subprograma -> índice em funcoes
+        self.assinaturas = {}  # nome -> ([(parâmetro, modo, descritor)], descritor do retorno)
+        self.retorno = None  # (descritor do retorno, é procedimento) do subprograma em compilação
+
+    def compilar(self):
+        itens = []
+        if self.programa.declaracoes_preliminares():
+            itens += list(self.programa.declaracoes_preliminares().getChildren())
+        itens += [item for item in self.programa.bloco_algoritmo().corpo_algoritmo().getChildren()
+                  if isinstance(item, ParserRuleContext)]
+        for item in itens:
+            if not isinstance(item, (LAParser.ComandoContext, LAParser.DeclaracaoContext)):
+                self.tabelas.executar_item(item)
+        for nome, subprograma in self.tabelas.subprogramas.items():
+            self.indices_funcoes[nome] = len(self.funcoes)
+            self.funcoes.append(None)
+            self.assinaturas[nome] = self.assinatura(subprograma)
+
+        self.abrir_quadro()
+        for item in itens:
+            if isinstance(item, LAParser.DeclaracaoContext):
+                self.declarar_variaveis(item.lista_variaveis())
+            elif isinstance(item, LAParser.ComandoContext):
+                self.comando(item)
+        self.emitir(B_FIM)
+        self.funcoes[0] = (0, tuple(self.modelo))
+        for nome, subprograma in self.tabelas.subprogramas.items():
+            self.compilar_subprograma(nome, subprograma)
+
+        codigo = array.array('i', [operando for instrucao in self.codigo for operando in instrucao])
+        return ProgramaBytecode(codigo, self.funcoes, self.dados, self.max_literal)
+
+    # Tipos e quadros
+
+    def descritor(self, tipo_la, campos=None):
+        if tipo_la.startswith('^'):
+            return ('^', self.descritor(tipo_la[1:]))
+        tipo = self.tabelas.resolver_tipo(tipo_la)
+        if tipo.startswith('^'):
+            return ('^', self.descritor(tipo[1:]))
+        if campos is None:
+            campos = self.tabelas.registros.get(tipo)
+        if campos is not None:
+            return ('registro', tuple((campo, self.descritor(tipo_campo)) for campo, tipo_campo in campos.items()))
+        if tipo in ('inteiro', 'logico'):
+            return 'int'
+        if tipo == 'real':
+            return 'float'
+        if tipo == 'literal':
+            return 'literal'
+        raise ErroAvaliacao(f'tipo {tipo_la}')
+
+    def assinatura(self, subprograma):
+        """Registros e literais 'var' são passados por referência; o resto, por cópia"""
+        parametros = []
+        for parametro in (subprograma.parametros().parametro() if subprograma.parametros() else []):
+            descritor = self.descritor((parametro.tipo_base() or parametro.tipo_identificado()).getText())
+            modo = 'valor'
+            if parametro.getChild(0).getText() == 'var' and descritor == 'literal':
+                modo = 'ref'
+            elif parametro.getChild(0).getText() == 'var' and eh_registro(descritor):
+                modo = 'alias'
+            parametros.append((parametro.IDENT().getText(), modo, descritor))
+        retorno = None
+        if isinstance(subprograma, LAParser.Declaracao_funcaoContext):
+            retorno = self.descritor(subprograma.tipo_base().getText())
+        return parametros, retorno
+
+    def abrir_quadro(self):
+        self.simbolos = {}  # nome -> (registrador, descritor)
+        self.modelo = []  # valor inicial de cada registrador
+        self.variaveis = set()
+        self.constantes = {}  # (tipo, valor) -> registrador
+        self.valores_constantes = {}  # registrador -> valor
+        self.livres = []  # temporários que nenhum comando em compilação usa
+        self.temporarios = [[]]  # temporários de cada comando aberto
+
+    def registrador(self, inicial=None):
+        self.modelo.append(inicial)
+        return len(self.modelo) - 1
+
+    def variavel(self, nome, descritor):
+        inicial = VALORES_ZERO.get(descritor) if isinstance(descritor, str) else None
+        registrador = self.registrador(inicial)
+        self.simbolos[nome] = (registrador, descritor)
+        self.variaveis.add(registrador)
+        return registrador
 
-    def enterComandose(self, ctx):
-        """Processa comando if - processamento manual completo"""
-        # Bloqueia processamento automático durante este comando
-        self.bloqueando_automatico = True
-        
-        condicao = self.processar_expressao(ctx.expressao())
-        
-        # Abre o bloco if
-        if self.em_funcao:
-            self.funcoes.append(f'\tif ({condicao}) {{')
-        elif self.em_procedimento:
-            self.procedimentos.append(f'\tif ({condicao}) {{')
+    def constante(self, valor, tipo):
+        chave = (tipo, repr(valor))
+        if chave not in self.constantes:
+            self.constantes[chave] = self.registrador(valor)
+            self.valores_constantes[self.constantes[chave]] = valor
+        return self.constantes[chave]
+
+    def temporario(self):
+        registrador = self.livres.pop() if self.livres else self.registrador()
+        self.temporarios[-1].append(registrador)
+        return registrador
+
+    def destino(self, destino):
+        return self.temporario() if destino is None else destino
+
+    def dado(self, valor):
+        chave = repr(valor)
+        if chave not in self.indices_dados:
+            self.indices_dados[chave] = len(self.dados)
+            self.dados.append(valor)
+        return self.indices_dados[chave]
+
+    def modelo_valor(self, descritor):
+        """Valor inicial de um elemento de vetor (tupla: modelo de um registro)"""
+        if eh_registro(descritor):
+            return tuple(self.modelo_valor(tipo) for _, tipo in descritor[1])
+        return VALORES_ZERO.get(descritor) if isinstance(descritor, str) else None
+
+    def declarar_variaveis(self, lista):
+        for variavel in lista.variavel():
+            tipo_ctx = variavel.tipo()
+            campos = None
+            if isinstance(tipo_ctx, LAParser.TipoRegistroContext):
+                campos = self.tabelas.campos(tipo_ctx.tipo_registro())
+            descritor = self.descritor(tipo_ctx.getText(), campos)
+            filhos = list(variavel.getChildren())
+            i = 0
+            while filhos[i].getText() != ':':
+                if filhos[i].getText() == ',':
+                    i += 1
+                    continue
+                nome = filhos[i].getText()
+                if i + 1 < len(filhos) and filhos[i + 1].getText() == '[':
+                    tamanho = filhos[i + 2].getText()
+                    elementos = int(tamanho) if tamanho.isdigit() else self.tabelas.constantes.get(tamanho, (None,))[0]
+                    if not isinstance(elementos, int) or elementos <= 0:
+                        raise ErroAvaliacao(f'vetor {nome}')
+                    registrador = self.variavel(nome, ('vetor', descritor))
+                    self.emitir(B_NOVO_VETOR, registrador, self.dado((elementos, self.modelo_valor(descritor))))
+                    i += 4
+                else:
+                    registrador = self.variavel(nome, descritor)
+                    if eh_registro(descritor):
+                        self.emitir(B_NOVO_REG, registrador, self.dado(self.modelo_valor(descritor)))
+                    i += 1
+
+    def compilar_subprograma(self, nome, subprograma):
+        self.abrir_quadro()
+        parametros, retorno = self.assinaturas[nome]
+        self.retorno = (retorno, isinstance(subprograma, LAParser.Declaracao_procedimentoContext))
+        for parametro, modo, descritor in parametros:
+            self.variavel(parametro, REF_LITERAL if modo == 'ref' else descritor)
+        entrada = len(self.codigo)
+        for registrador, (_, modo, descritor) in enumerate(parametros):
+            if modo == 'valor' and eh_registro(descritor):
+                self.emitir(B_COPIA_PARAM, registrador)
+        if subprograma.declaracoes_locais():
+            for lista in subprograma.declaracoes_locais().lista_variaveis():
+                self.declarar_variaveis(lista)
+        self.comandos(subprograma.comandos())
+        if retorno is None:
+            self.emitir(B_RETORNA_NADA)
         else:
-            self.adicionar_codigo(f'if ({condicao}) {{', 1)
-        
-        # Processa comandos do bloco THEN (primeiro bloco de comandos)
-        comandos_then = ctx.comandos(0)
-        for comando in comandos_then.comando():
-            self.processar_comando_manual(comando)
-        
-        # Verifica se tem bloco ELSE
-        if len(ctx.comandos()) > 1:
-            # Abre o bloco else
-            if self.em_funcao:
-                self.funcoes.append('\t} else {')
-            elif self.em_procedimento:
-                self.procedimentos.append('\t} else {')
+            self.emitir(B_ERRO, self.dado(f'funcao {nome} terminou sem retorne'))
+        self.funcoes[self.indices_funcoes[nome]] = (entrada, tuple(self.modelo))
+        self.retorno = None
+
+    # Emissão
+
+    def emitir(self, operacao, a=0, b=0, c=0):
+        self.codigo.append([operacao, a, b, c])
+        return len(self.codigo) - 1
+
+    def corrigir(self, saltos, alvo):
+        """Preenche o destino dos desvios (instrução, operando) emitidos antes do alvo ser conhecido"""
+        for instrucao, operando in saltos:
+            self.codigo[instrucao][operando] = alvo
+
+    # Comandos
+
+    def comandos(self, ctx):
+        for comando in ctx.comando():
+            self.comando(comando)
+
+    def comando(self, ctx):
+        self.temporarios.append([])
+        if ctx.atribuicao():
+            self.atribuicao(ctx.atribuicao())
+        elif ctx.escrita():
+            for expr in ctx.escrita().expressao():
+                registrador, tipo = self.expressao(expr)
+                operacao = {'int': B_ESCREVE_I, 'float': B_ESCREVE_R, 'double': B_ESCREVE_R,
+                            'literal': B_ESCREVE_L}.get(tipo)
+                if operacao is None:
+                    raise ErroAvaliacao(f'escrita de {tipo}')
+                self.emitir(operacao, registrador)
+        elif ctx.leitura():
+            self.leitura(ctx.leitura())
+        elif ctx.comandose():
+            se = ctx.comandose()
+            senao = self.desvio(se.expressao(), False)
+            self.comandos(se.comandos(0))
+            if len(se.comandos()) > 1:
+                fim = self.emitir(B_SALTA)
+                self.corrigir(senao, len(self.codigo))
+                self.comandos(se.comandos(1))
+                self.corrigir([(fim, 1)], len(self.codigo))
             else:
-                self.adicionar_codigo('} else {', 1)
-            
-            # Processa comandos do bloco ELSE (segundo bloco de comandos)
-            comandos_else = ctx.comandos(1)
-            for comando in comandos_else.comando():
-                self.processar_comando_manual(comando)
-        
-        # Fecha o bloco
-        if self.em_funcao:
-            self.funcoes.append('\t}')
-        elif self.em_procedimento:
-            self.procedimentos.append('\t}')
-        else:
-            self.adicionar_codigo('}', 1)
-        
-        # Reativa processamento automático
-        self.bloqueando_automatico = False
-    
-    def enterComandocaso(self, ctx):
-        """Processa comando caso (switch statement)"""
-        # Marca este comando como processado manualmente
-        cmd_id = f"caso_{ctx.start.line}_{ctx.start.column}"
-        if not hasattr(self, 'contextos_processados'):
-            self.contextos_processados = set()
-        self.contextos_processados.add(ctx)
-        
-        # Processa a expressão do switch
-        expr_result = self.processar_expressao(ctx.expressao())
-        
-        # Gera o switch
-        if self.em_funcao:
-            self.funcoes.append(f'\tswitch ({expr_result}) {{')
-        elif self.em_procedimento:
-            self.procedimentos.append(f'\tswitch ({expr_result}) {{')
-        else:
-            self.adicionar_codigo(f'switch ({expr_result}) {{', 1)
-        
-        # Processa cada seleção (case)
-        for selecao in ctx.selecao():
-            self.processar_selecao(selecao)
-        
-        # Processa o bloco senao (default) se existir
-        if ctx.comandos():
-            if self.em_funcao:
-                self.funcoes.append('\t\tdefault:')
-            elif self.em_procedimento:
-                self.procedimentos.append('\t\tdefault:')
+                self.corrigir(senao, len(self.codigo))
+        elif ctx.comandocaso():
+            self.caso(ctx.comandocaso())
+        elif ctx.comandopara():
+            self.para(ctx.comandopara())
+        elif ctx.comandoenquanto():
+            # O teste fica no fim do laço: um desvio por volta
+            enquanto = ctx.comandoenquanto()
+            teste = self.emitir(B_SALTA)
+            corpo = len(self.codigo)
+            self.comandos(enquanto.comandos())
+            self.corrigir([(teste, 1)], len(self.codigo))
+            self.corrigir(self.desvio(enquanto.expressao(), True), corpo)
+        elif ctx.comandofaca():
+            # Como no C gerado: repete enquanto a condição do 'ate' for verdadeira
+            faca = ctx.comandofaca()
+            corpo = len(self.codigo)
+            self.comandos(faca.comandos())
+            self.corrigir(self.desvio(faca.expressao(), True), corpo)
+        elif ctx.chamada_procedimento():
+            self.chamada(ctx.chamada_procedimento(), descartar=True)
+        elif ctx.retorne():
+            if self.retorno is None:
+                raise ErroAvaliacao('retorne fora de subprograma')
+            valor = self.expressao(ctx.retorne().expressao())
+            descritor, procedimento = self.retorno
+            if procedimento:
+                self.emitir(B_RETORNA_NADA)
             else:
-                self.adicionar_codigo('default:', 2)
-            
-            # Processa comandos do default
-            for comando in ctx.comandos().comando():
-                self.processar_comando_manual(comando)
-            
-            # Adiciona break para o default
-            if self.em_funcao:
-                self.funcoes.append('\t\t\tbreak;')
-            elif self.em_procedimento:
-                self.procedimentos.append('\t\t\tbreak;')
+                self.emitir(B_RETORNA, self.converter(valor, descritor))
+        self.livres.extend(self.temporarios.pop())
+
+    def atribuicao(self, ctx):
+        """O valor é calculado antes do alvo, como no Interpretador"""
+        expr = ctx.expressao()
+        alvo = ctx.getChild(0)
+        if ctx.CIRCUNFLEXO():
+            valor = self.expressao(expr)
+            ponteiro, tipo = self.nome(ctx.IDENT().getText())
+            if not eh_ponteiro(tipo):
+                raise ErroAvaliacao(f'^{ctx.IDENT().getText()} de nao ponteiro')
+            if eh_registro(tipo[1]):
+                self.verificar_tipo(valor[1], tipo[1])
+                registro = self.temporario()
+                self.emitir(B_LE_REF, registro, ponteiro)
+                self.emitir(B_COPIA_REG, registro, valor[0])
             else:
-                self.adicionar_codigo('break;', 3)
-        
-        # Fecha o switch
-        if self.em_funcao:
-            self.funcoes.append('\t}')
-        elif self.em_procedimento:
-            self.procedimentos.append('\t}')
-        else:
-            self.adicionar_codigo('}', 1)
-    
-    def processar_selecao(self, selecao_ctx):
-        """Processa uma seleção (case) do comando caso"""
-        # Processa as constantes
-        constantes = selecao_ctx.constantes()
-        for constante in constantes.constante():
-            if constante.NUM_INT():
-                if len(constante.NUM_INT()) == 1:
-                    # Constante simples: case N:
-                    valor = constante.NUM_INT(0).getText()
-                    if self.em_funcao:
-                        self.funcoes.append(f'\t\tcase {valor}:')
-                    elif self.em_procedimento:
-                        self.procedimentos.append(f'\t\tcase {valor}:')
-                    else:
-                        self.adicionar_codigo(f'case {valor}:', 2)
-                else:
-                    # Faixa de valores: case N..M: (convertido para múltiplos cases)
-                    inicio = int(constante.NUM_INT(0).getText())
-                    fim = int(constante.NUM_INT(1).getText())
-                    for valor in range(inicio, fim + 1):
-                        if self.em_funcao:
-                            self.funcoes.append(f'\t\tcase {valor}:')
-                        elif self.em_procedimento:
-                            self.procedimentos.append(f'\t\tcase {valor}:')
-                        else:
-                            self.adicionar_codigo(f'case {valor}:', 2)
-        
-        # Processa comandos da seleção
-        for comando in selecao_ctx.comandos().comando():
-            self.processar_comando_manual(comando)
-        
-        # Adiciona break
-        if self.em_funcao:
-            self.funcoes.append('\t\t\tbreak;')
-        elif self.em_procedimento:
-            self.procedimentos.append('\t\t\tbreak;')
+                self.emitir(B_GRAVA_REF, ponteiro, self.converter(valor, tipo[1]))
+        elif isinstance(alvo, LAParser.Acesso_campoContext):
+            valor = self.expressao(expr)
+            registro, posicao, descritor = self.campo(alvo)
+            self.emitir(B_GRAVA_CAMPO, registro, posicao, self.converter(valor, descritor))
+        elif isinstance(alvo, LAParser.Acesso_arrayContext):
+            valor = self.fixar(self.expressao(expr), alvo.expressao())
+            vetor, elemento, indice = self.elemento(alvo)
+            if eh_registro(elemento):
+                self.verificar_tipo(valor[1], elemento)
+                self.emitir(B_GRAVA_V_REG, vetor, indice, valor[0])
+            else:
+                self.emitir(B_GRAVA_V, vetor, indice, self.converter(valor, elemento))
         else:
-            self.adicionar_codigo('break;', 3)
-    
-    def processar_comando_manual(self, comando_ctx):
-        """Processa um comando individual manualmente"""
-        if comando_ctx.escrita():
-            self.processar_escrita_manual(comando_ctx.escrita())
-        elif comando_ctx.leitura():
-            self.processar_leitura_manual(comando_ctx.leitura())
-        elif comando_ctx.atribuicao():
-            self.processar_atribuicao_manual(comando_ctx.atribuicao())
-        # Adicione outros tipos de comando conforme necessário
-    
-    def processar_escrita_manual(self, ctx):
-        """Processa comando de escrita manualmente"""
-        # Marca este contexto como processado
-        ctx_id = (id(ctx), ctx.start.line, ctx.start.column)
-        self.contextos_processados.add(ctx_id)
-        
-        expressoes = []
-        formatos = []
-        
-        for expr_ctx in ctx.expressao():
-            expr_text = self.processar_expressao(expr_ctx)
-            
-            # Verifica se é string literal
-            if expr_text.startswith('"') and expr_text.endswith('"'):
-                formatos.append('%s')
-                expressoes.append(expr_text)
-            # Verifica se é variável conhecida
-            elif expr_text in self.tabela_simbolos:
-                tipo = self.tabela_simbolos[expr_text]
-                formato = self.obter_formato_printf(tipo)
-                formatos.append(formato)
-                expressoes.append(expr_text)
-            # Verifica se é constante
-            elif expr_text in self.constantes:
-                valor = self.constantes[expr_text]
-                if valor.isdigit():
-                    formatos.append('%d')
-                else:
-                    formatos.append('%s')
-                expressoes.append(valor)
-            # Expressão genérica
+            nome = alvo.getText()
+            if nome not in self.simbolos:
+                raise ErroAvaliacao(f'variavel {nome}')
+            registrador, descritor = self.simbolos[nome]
+            if descritor == REF_LITERAL:
+                self.emitir(B_GRAVA_REF, registrador, self.converter(self.expressao(expr), 'literal'))
+            elif eh_registro(descritor):
+                valor = self.expressao(expr)
+                self.verificar_tipo(valor[1], descritor)
+                self.emitir(B_COPIA_REG, registrador, valor[0])
+            elif eh_vetor(descritor):
+                raise ErroAvaliacao(f'atribuicao ao vetor {nome}')
+            else:
+                # A última operação da expressão escreve direto na variável
+                inicio = len(self.codigo)
+                valor = self.expressao(expr, None if descritor == 'literal' else registrador)
+                resultado = self.converter(valor, descritor, registrador)
+                if resultado != registrador:
+                    self.emitir(B_MOV, registrador, resultado)
+                self.acumular_elemento(inicio, registrador)
+
+    def acumular_elemento(self, inicio, registrador):
+        """x <- x + v[i] inteiro vira uma instrução só (SOMA_V_I)"""
+        if len(self.codigo) - inicio != 2:
+            return
+        leitura, soma = self.codigo[inicio:]
+        temporario = leitura[1]
+        if (leitura[0] == B_LE_V and soma[0] == B_SOMA_I and soma[1] == registrador
+                and sorted(soma[2:]) == sorted((registrador, temporario)) and temporario not in self.variaveis):
+            self.codigo[inicio:] = [[B_SOMA_V_I, registrador, leitura[2], leitura[3]]]
+
+    def leitura(self, ctx):
+        for alvo in ctx.lista_identificadores().getChildren():
+            if alvo.getText() == ',':
+                continue
+            if isinstance(alvo, LAParser.Acesso_campoContext):
+                registro, posicao, descritor = self.campo(alvo)
+                valor = self.temporario()
+                self.emitir(B_LE_CAMPO, valor, registro, posicao)
+                self.ler(valor, descritor)
+                self.emitir(B_GRAVA_CAMPO, registro, posicao, valor)
+            elif isinstance(alvo, LAParser.Acesso_arrayContext):
+                vetor, elemento, indice = self.elemento(alvo)
+                valor = self.temporario()
+                self.emitir(B_LE_V, valor, vetor, indice)
+                self.ler(valor, elemento)
+                self.emitir(B_GRAVA_V, vetor, indice, valor)
             else:
-                # Tenta determinar o tipo da expressão
-                if expr_text.replace('.','').replace('-','').isdigit() and '.' in expr_text:
-                    formatos.append('%f')
-                    expressoes.append(expr_text)
-                elif expr_text.replace('-','').isdigit():
-                    formatos.append('%d')
-                    expressoes.append(expr_text)
+                if alvo.getText() not in self.simbolos:
+                    raise ErroAvaliacao(f'variavel {alvo.getText()}')
+                registrador, descritor = self.simbolos[alvo.getText()]
+                if descritor == REF_LITERAL:
+                    valor = self.temporario()
+                    self.emitir(B_LE_REF, valor, registrador)
+                    self.ler(valor, 'literal')
+                    self.emitir(B_GRAVA_REF, registrador, valor)
                 else:
-                    # Para expressões complexas, tenta inferir o tipo das variáveis
-                    formato_expr = self.inferir_tipo_expressao(expr_text)
-                    formatos.append(formato_expr)
-                    expressoes.append(expr_text)
-        
-        formato_str = ''.join(formatos)
-        if expressoes:
-            params = ','.join(expressoes)
-            linha = f'printf("{formato_str}",{params});'
+                    self.ler(registrador, descritor)
+
+    def ler(self, registrador, descritor):
+        """Sem valor na entrada, o registrador fica como estava"""
+        operacao = {'int': B_LEIA_I, 'float': B_LEIA_R, 'literal': B_LEIA_L}.get(descritor)
+        if operacao is None:
+            raise ErroAvaliacao(f'leitura de {descritor}')
+        self.emitir(operacao, registrador)
+
+    def caso(self, ctx):
+        seletor, tipo = self.expressao(ctx.expressao())
+        if tipo != 'int':
+            raise ErroAvaliacao('caso com seletor nao inteiro')
+        fins = []
+        for selecao in ctx.selecao():
+            entradas = []
+            for constante in selecao.constantes().constante():
+                limites = [int(num.getText()) for num in constante.NUM_INT()]
+                inicio, fim = limites[0], limites[-1]
+                if inicio == fim:
+                    entradas.append((self.emitir(B_SALTA_IGUAL, seletor, self.constante(inicio, 'int')), 3))
+                elif inicio < fim:
+                    abaixo = self.emitir(B_SALTA_MENOR, seletor, self.constante(inicio, 'int'))
+                    entradas.append((self.emitir(B_SALTA_MENOR_IGUAL, seletor, self.constante(fim, 'int')), 3))
+                    self.corrigir([(abaixo, 3)], len(self.codigo))
+            proxima = self.emitir(B_SALTA)
+            self.corrigir(entradas, len(self.codigo))
+            self.comandos(selecao.comandos())
+            fins.append((self.emitir(B_SALTA), 1))
+            self.corrigir([(proxima, 1)], len(self.codigo))
+        if ctx.comandos():
+            self.comandos(ctx.comandos())
+        self.corrigir(fins, len(self.codigo))
+
+    def para(self, ctx):
+        """for (var = inicio; var <= fim; var++) com o limite avaliado uma vez.
+        Com variável e limite inteiros, o incremento, o teste e o desvio de volta
+        são uma instrução só (PARA_PASSO)"""
+        nome = ctx.IDENT().getText()
+        registrador, descritor = self.simbolos.get(nome, (None, None))
+        if descritor not in ('int', 'float'):
+            raise ErroAvaliacao(f'variavel de para {nome}')
+        inicio = self.converter(self.expressao(ctx.expressao(0), registrador), descritor, registrador)
+        if inicio != registrador:
+            self.emitir(B_MOV, registrador, inicio)
+        limite, tipo_limite = self.expressao(ctx.expressao(1))
+        if limite in self.variaveis:
+            copia = self.temporario()
+            self.emitir(B_MOV, copia, limite)
+            limite = copia
+
+        if descritor == tipo_limite == 'int':
+            saida = self.emitir(B_SALTA_MAIOR, registrador, limite)
+            corpo = len(self.codigo)
+            self.comandos(ctx.comandos())
+            self.emitir(B_PARA_PASSO, registrador, limite, corpo)
+            self.corrigir([(saida, 3)], len(self.codigo))
+            return
+        teste = len(self.codigo)
+        a, b, _ = self.numericos((registrador, descritor), (limite, tipo_limite))
+        continua = self.temporario()
+        self.emitir(B_MENOR_IGUAL, continua, a, b)  # não 'a > b': NaN encerra o laço
+        saida = self.emitir(B_SE_FALSO, continua)
+        self.comandos(ctx.comandos())
+        soma = self.operar('+', (registrador, descritor), (self.constante(1, 'int'), 'int'), registrador)
+        proximo = self.converter(soma, descritor, registrador)
+        if proximo != registrador:
+            self.emitir(B_MOV, registrador, proximo)
+        self.emitir(B_SALTA, teste)
+        self.corrigir([(saida, 2)], len(self.codigo))
+
+    def desvio(self, ctx, quando):
+        """Emite os desvios tomados quando o valor lógico da condição é 'quando'
+        (o caso contrário segue para a próxima instrução); devolve os desvios
+        (instrução, operando) cujo destino ainda será corrigido"""
+        ctx = self.reduzir(ctx)
+        if isinstance(ctx, LAParser.FatorContext):
+            forma, dado = self.forma(ctx)
+            if forma == 'parenteses':
+                return self.desvio(dado, quando)
+            if forma == 'nao':
+                return self.desvio(dado, not quando)
+        if isinstance(ctx, LAParser.Expressao_logicaContext):
+            operadores = {ctx.getChild(i).getText() for i in range(1, ctx.getChildCount(), 2)}
+            partes = [ctx.getChild(i) for i in range(0, ctx.getChildCount(), 2)]
+            if operadores == {'e'} and not quando or operadores == {'ou'} and quando:
+                # Qualquer parte decide sozinha
+                return [salto for parte in partes for salto in self.desvio(parte, quando)]
+            if len(operadores) == 1:
+                # Só a última parte decide; as anteriores podem encerrar o teste
+                encerra = [salto for parte in partes[:-1] for salto in self.desvio(parte, not quando)]
+                saltos = self.desvio(partes[-1], quando)
+                self.corrigir(encerra, len(self.codigo))
+                return saltos
+        if isinstance(ctx, LAParser.Expressao_relacionalContext):
+            operador, a, b, tipo = self.comparacao(ctx)
+            if quando or tipo not in ('float', 'double'):
+                operador = operador if quando else COMPARACAO_INVERSA[operador]
+                return [(self.emitir(SALTOS_BYTECODE[operador], a, b), 3)]
+            # Com NaN a comparação e a inversa são ambas falsas: testa a original
+            resultado = self.temporario()
+            self.emitir(COMPARACOES_BYTECODE[operador], resultado, a, b)
+            return [(self.emitir(B_SE_FALSO, resultado), 2)]
+        registrador, tipo = self.expressao(ctx)
+        self.verificar_condicao(tipo)
+        return [(self.emitir(B_SE_VERDADE if quando else B_SE_FALSO, registrador), 2)]
+
+    # Expressões: devolvem (registrador, descritor do tipo); com destino, a
+    # última operação escreve nele
+
+    def reduzir(self, ctx):
+        while not isinstance(ctx, LAParser.FatorContext) and ctx.getChildCount() == 1:
+            ctx = ctx.getChild(0)
+        return ctx
+
+    def expressao(self, ctx, destino=None):
+        ctx = self.reduzir(ctx)
+        if isinstance(ctx, LAParser.Expressao_logicaContext):
+            return self.logica(ctx)
+        if isinstance(ctx, LAParser.Expressao_relacionalContext):
+            operador, a, b, _ = self.comparacao(ctx)
+            destino = self.destino(destino)
+            self.emitir(COMPARACOES_BYTECODE[operador], destino, a, b)
+            return destino, 'int'
+        if isinstance(ctx, (LAParser.Expressao_aritmeticaContext, LAParser.TermoContext)):
+            valor = self.expressao(ctx.getChild(0))
+            ultimo = ctx.getChildCount() - 2
+            for i in range(1, ctx.getChildCount(), 2):
+                direita = ctx.getChild(i + 1)
+                valor = self.fixar(valor, direita)
+                valor = self.operar(ctx.getChild(i).getText(), valor, self.expressao(direita),
+                                    destino if i == ultimo else None)
+            return valor
+        return self.fator(ctx, destino)
+
+    def logica(self, ctx):
+        """'e'/'ou' com curto-circuito, associando à esquerda"""
+        destino = self.temporario()
+        registrador, tipo = self.expressao(ctx.getChild(0))
+        self.verificar_condicao(tipo)
+        self.emitir(B_LOGICO, destino, registrador)
+        for i in range(1, ctx.getChildCount(), 2):
+            decidido = self.emitir(B_SE_FALSO if ctx.getChild(i).getText() == 'e' else B_SE_VERDADE, destino)
+            registrador, tipo = self.expressao(ctx.getChild(i + 1))
+            self.verificar_condicao(tipo)
+            self.emitir(B_LOGICO, destino, registrador)
+            self.corrigir([(decidido, 2)], len(self.codigo))
+        return destino, 'int'
+
+    def comparacao(self, ctx):
+        """(operador, a, b, tipo) de uma comparação com os operandos já convertidos"""
+        operador = {'=': '==', '<>': '!='}.get(ctx.getChild(1).getText(), ctx.getChild(1).getText())
+        esquerda, direita = ctx.expressao_aritmetica()
+        a = self.fixar(self.comparado(esquerda), direita)
+        b = self.comparado(direita)
+        if a[1] == b[1] == 'literal':
+            return operador, a[0], b[0], 'literal'
+        return (operador, *self.numericos(a, b))
+
+    def comparado(self, ctx):
+        """Operando de comparação: concatenações são montadas (e truncadas) antes"""
+        valor = self.expressao(ctx)
+        fator = self.tabelas.operacoes.fator_unico(ctx)
+        while fator is not None and fator.ABREPAR():
+            fator = self.tabelas.operacoes.fator_unico(fator.expressao())
+        if valor[1] == 'literal' and fator is None:
+            truncado = self.temporario()
+            self.emitir(B_TRUNCA, truncado, valor[0])
+            return truncado, 'literal'
+        return valor
+
+    def operar(self, operador, esquerda, direita, destino=None):
+        if esquerda[1] == direita[1] == 'literal' and operador == '+':
+            destino = self.destino(destino)
+            self.emitir(B_CONCATENA, destino, esquerda[0], direita[0])
+            return destino, 'literal'
+        a, b, tipo = self.numericos(esquerda, direita)
+        if (operador, tipo) not in ARITMETICAS_BYTECODE:
+            raise ErroAvaliacao(f'operacao {operador} indefinida')
+        destino = self.destino(destino)
+        self.emitir(ARITMETICAS_BYTECODE[operador, tipo], destino, a, b)
+        return destino, tipo
+
+    def numericos(self, esquerda, direita):
+        """Os dois operandos no tipo comum: um int só precisa de conversão para
+        float (em double o Python já opera como o C)"""
+        if esquerda[1] not in NUMERICOS or direita[1] not in NUMERICOS:
+            raise ErroAvaliacao(f'operacao entre {esquerda[1]} e {direita[1]}')
+        tipo = max(esquerda[1], direita[1], key=NUMERICOS.index)
+        if tipo == 'float':
+            esquerda, direita = self.converter(esquerda, 'float'), self.converter(direita, 'float')
         else:
-            linha = f'printf("{formato_str}");'
-        
-        if self.em_funcao:
-            self.funcoes.append(f'\t\t{linha}')
-        elif self.em_procedimento:
-            self.procedimentos.append(f'\t\t{linha}')
+            esquerda, direita = esquerda[0], direita[0]
+        return esquerda, direita, tipo
+
+    def converter(self, valor, descritor, destino=None):
+        """Registrador com o valor convertido como a atribuição C faria"""
+        registrador, tipo = valor
+        constante = self.valores_constantes.get(registrador)
+        if descritor in ('int', 'float') and tipo in NUMERICOS:
+            if tipo == descritor:
+                return registrador
+            if constante is not None:
+                convertido = self.tabelas.operacoes.converter_constante((constante, tipo), descritor)
+                if convertido is None:
+                    raise ErroAvaliacao(f'conversao de {tipo} para {descritor}')
+                return self.constante(*convertido)
+            destino = self.destino(destino)
+            self.emitir(B_INTEIRO if descritor == 'int' else B_F32, destino, registrador)
+            return destino
+        if descritor == 'literal' and tipo == 'literal':
+            # Variáveis já guardam no máximo max_literal bytes
+            if registrador in self.variaveis or constante is not None and len(constante) <= self.max_literal:
+                return registrador
+            if constante is not None:
+                return self.constante(constante[:self.max_literal], 'literal')
+            destino = self.destino(destino)
+            self.emitir(B_TRUNCA, destino, registrador)
+            return destino
+        if descritor == tipo and (eh_ponteiro(tipo) or eh_registro(tipo)):
+            return registrador
+        raise ErroAvaliacao(f'conversao de {tipo} para {descritor}')
+
+    def verificar_tipo(self, tipo, esperado):
+        if tipo != esperado:
+            raise ErroAvaliacao(f'atribuicao de {tipo} a {esperado}')
+
+    def verificar_condicao(self, tipo):
+        if tipo not in NUMERICOS and not eh_ponteiro(tipo):
+            raise ErroAvaliacao(f'condicao do tipo {tipo}')
+
+    def fixar(self, valor, seguinte):
+        """Copia um operando que é uma variável quando a expressão seguinte chama
+        uma função (que pode mudá-la por ponteiro antes da operação)"""
+        if valor[0] in self.variaveis and tem_chamada(seguinte):
+            copia = self.temporario()
+            self.emitir(B_MOV, copia, valor[0])
+            return copia, valor[1]
+        return valor
+
+    def forma(self, ctx):
+        return self.tabelas.formas.get(id(ctx)) or self.tabelas.classificar_fator(ctx)
+
+    def fator(self, ctx, destino=None):
+        forma, dado = self.forma(ctx)
+        if forma == 'constante':
+            return self.constante(*dado), dado[1]
+        if forma == 'nome':
+            return self.nome(dado)
+        if forma == 'acesso':
+            if isinstance(dado, LAParser.Acesso_campoContext):
+                registro, posicao, descritor = self.campo(dado)
+                destino = self.destino(destino)
+                self.emitir(B_LE_CAMPO, destino, registro, posicao)
+                return destino, descritor
+            vetor, elemento, indice = self.elemento(dado)
+            destino = self.destino(destino)
+            self.emitir(B_LE_V, destino, vetor, indice)
+            return destino, elemento
+        if forma == 'parenteses':
+            return self.expressao(dado, destino)
+        if forma == 'negacao':
+            registrador, tipo = self.expressao(dado)
+            if tipo not in NUMERICOS:
+                raise ErroAvaliacao('negacao indefinida')
+            destino = self.destino(destino)
+            self.emitir(B_NEG_I if tipo == 'int' else B_NEG_R, destino, registrador)
+            return destino, tipo
+        if forma == 'nao':
+            registrador, tipo = self.expressao(dado)
+            self.verificar_condicao(tipo)
+            destino = self.destino(destino)
+            self.emitir(B_NAO, destino, registrador)
+            return destino, 'int'
+        if forma == 'endereco':
+            return self.endereco(dado, destino)
+        if forma == 'apontado':
+            ponteiro, tipo = self.nome(dado)
+            if not eh_ponteiro(tipo):
+                raise ErroAvaliacao(f'^{dado} de nao ponteiro')
+            destino = self.destino(destino)
+            self.emitir(B_LE_REF, destino, ponteiro)
+            return destino, tipo[1]
+        if forma == 'chamada':
+            return self.chamada(dado, destino)
+        if forma == 'potencia':
+            return self.potencia(dado, destino)
+        if forma == 'subliteral':
+            cadeia, tipo = self.comparado(dado.expressao())
+            if tipo != 'literal':
+                raise ErroAvaliacao('subLiteral de nao literal')
+            inicio, tamanho = (int(numero.getText()) for numero in dado.NUM_INT())
+            inicio = max(inicio - 1, 0)
+            destino = self.destino(destino)
+            self.emitir(B_SUBLITERAL, destino, cadeia, self.dado((inicio, inicio + max(tamanho, 0))))
+            return destino, 'literal'
+        raise ErroAvaliacao(dado)
+
+    def nome(self, nome):
+        if nome not in self.simbolos:
+            if nome in self.tabelas.constantes:
+                valor, tipo = self.tabelas.constantes[nome]
+                return self.constante(valor, tipo), tipo
+            raise ErroAvaliacao(f'variavel {nome}')
+        registrador, descritor = self.simbolos[nome]
+        if descritor == REF_LITERAL:
+            valor = self.temporario()
+            self.emitir(B_LE_REF, valor, registrador)
+            return valor, 'literal'
+        if eh_vetor(descritor):
+            raise ErroAvaliacao(f'vetor {nome} como valor')
+        return registrador, descritor
+
+    def campo(self, ctx):
+        """(registrador do registro, posição do campo, descritor do campo) de reg.campo"""
+        identificadores = [ident.getText() for ident in ctx.IDENT()]
+        registro, descritor = self.simbolos.get(identificadores[0], (None, None))
+        if len(identificadores) == 2 and eh_registro(descritor):
+            for posicao, (campo, tipo) in enumerate(descritor[1]):
+                if campo == identificadores[1]:
+                    return registro, posicao, tipo
+        raise ErroAvaliacao(f'campo {ctx.getText()}')
+
+    def elemento(self, ctx):
+        """(registrador do vetor, descritor do elemento, registrador do índice) de v[i]"""
+        vetor, descritor = self.simbolos.get(ctx.IDENT().getText(), (None, None))
+        indice, tipo = self.expressao(ctx.expressao())
+        if not eh_vetor(descritor) or tipo != 'int':
+            raise ErroAvaliacao(f'acesso {ctx.getText()}')
+        return vetor, descritor[1], indice
+
+    def endereco(self, alvo, destino=None):
+        if isinstance(alvo, LAParser.Acesso_campoContext):
+            registro, posicao, descritor = self.campo(alvo)
+            destino = self.destino(destino)
+            self.emitir(B_REF_CAMPO, destino, registro, posicao)
+            return destino, ('^', descritor)
+        nome = alvo.getText()
+        registrador, descritor = self.simbolos.get(nome, (None, None))
+        if descritor is None or eh_vetor(descritor):
+            raise ErroAvaliacao(f'endereco de {nome}')
+        destino = self.destino(destino)
+        if descritor == REF_LITERAL:
+            self.emitir(B_MOV, destino, registrador)
+            return destino, ('^', 'literal')
+        self.emitir(B_REF, destino, registrador)
+        return destino, ('^', descritor)
+
+    def referencia(self, expr, modo, descritor, nome):
+        """Argumento 'var': referência a um literal (modo 'ref') ou a própria
+        lista de um registro (modo 'alias')"""
+        fator = self.tabelas.operacoes.fator_unico(expr)
+        alvo = fator and (fator.acesso_campo() or fator.acesso_array() or fator.IDENT())
+        if alvo is None or fator.getChildCount() != 1:
+            raise ErroAvaliacao(f'argumento var de {nome}')
+        if isinstance(alvo, LAParser.Acesso_campoContext):
+            registro, posicao, tipo = self.campo(alvo)
+            self.verificar_tipo(tipo, descritor)
+            referencia = self.temporario()
+            self.emitir(B_REF_CAMPO, referencia, registro, posicao)
+            return referencia
+        if isinstance(alvo, LAParser.Acesso_arrayContext):
+            vetor, elemento, indice = self.elemento(alvo)
+            self.verificar_tipo(elemento, descritor)
+            referencia = self.temporario()
+            self.emitir(B_REF_ELEM if modo == 'ref' else B_LE_V, referencia, vetor, indice)
+            return referencia
+        registrador, tipo = self.simbolos.get(alvo.getText(), (None, None))
+        if modo == 'ref' and tipo == REF_LITERAL:
+            return registrador
+        self.verificar_tipo(tipo, descritor)
+        if modo == 'alias':
+            return registrador
+        referencia = self.temporario()
+        self.emitir(B_REF, referencia, registrador)
+        return referencia
+
+    def chamada(self, ctx, destino=None, descartar=False):
+        nome = ctx.IDENT().getText()
+        if nome not in self.assinaturas:
+            raise ErroAvaliacao(f'subprograma {nome}')
+        parametros, retorno = self.assinaturas[nome]
+        expressoes = ctx.lista_expressao().expressao() if ctx.lista_expressao() else []
+        if len(parametros) != len(expressoes) or retorno is None and not descartar:
+            raise ErroAvaliacao(f'argumentos de {nome}')
+        argumentos = []
+        for numero, ((_, modo, descritor), expr) in enumerate(zip(parametros, expressoes)):
+            if modo == 'valor':
+                registrador = self.converter(self.expressao(expr), descritor)
+                if registrador in self.variaveis and any(map(tem_chamada, expressoes[numero + 1:])):
+                    copia = self.temporario()
+                    self.emitir(B_MOV, copia, registrador)
+                    registrador = copia
+                argumentos.append(registrador)
+            else:
+                argumentos.append(self.referencia(expr, modo, descritor, nome))
+        destino = -1 if descartar else self.destino(destino)
+        self.emitir(B_CHAMA, destino, self.indices_funcoes[nome], self.dado(tuple(argumentos)))
+        return destino, retorno
+
+    def potencia(self, ctx, destino=None):
+        """pot() como o Interpretador: multiplicações em linha para expoente
+        constante pequeno, senão pot_inteiro/pot_real/pow"""
+        expr_base, expr_expoente = ctx.expressao()
+        base = self.fixar(self.expressao(expr_base), expr_expoente)
+        expoente = self.expressao(expr_expoente)
+        if base[1] not in NUMERICOS or expoente[1] not in NUMERICOS:
+            raise ErroAvaliacao('pot de nao numero')
+        if expoente[1] != 'int':
+            funcao = 'pow'
         else:
-            self.adicionar_codigo(linha, 2)
-    
-    def processar_leitura_manual(self, ctx):
-        """Processa comando de leitura manualmente"""
-        for ident_ctx in ctx.lista_identificadores().children:
-            if hasattr(ident_ctx, 'getText'):
-                nome = ident_ctx.getText()
-                if nome != ',':
-                    tipo = self.tabela_simbolos.get(nome, 'int')
-                    formato = self.obter_formato_printf(tipo)
-                    
-                    if tipo == 'char':
-                        linha = f'fgets({nome}, 80, stdin);'
-                        if self.em_funcao:
-                            self.funcoes.append(f'\t\t{linha}')
-                        elif self.em_procedimento:
-                            self.procedimentos.append(f'\t\t{linha}')
-                        else:
-                            self.adicionar_codigo(linha, 2)
-                        # Remove a quebra de linha do fgets
-                        linha = f'{nome}[strcspn({nome}, "\\n")] = \'\\0\';'
+            funcao = 'pot_inteiro' if base[1] == 'int' else 'pot_real'
+        constante = lambda expr: (re.fullmatch(r'\d+(\.\d+)?', expr.getText())
+                                  or expr.getText() in self.tabelas.constantes)
+        if (funcao != 'pow' and not constante(expr_base) and constante(expr_expoente)
+                and re.fullmatch(r'[\w.\[\]]+', expr_base.getText())):
+            if expoente[0] not in self.valores_constantes:
+                raise ErroAvaliacao('expoente constante sombreado')
+            n = self.valores_constantes[expoente[0]]
+            if 0 <= n <= LIMITE_POT_INLINE:
+                if n == 0:
+                    return ((self.constante(1, 'int'), 'int') if funcao == 'pot_inteiro'
+                            else (self.constante(1.0, 'double'), 'double'))
+                resultado = base
+                for vez in range(n - 1):
+                    resultado = self.operar('*', resultado, base, destino if vez == n - 2 else None)
+                return resultado
+        destino = self.destino(destino)
+        operacao = {'pow': B_POW, 'pot_inteiro': B_POT_I, 'pot_real': B_POT_R}[funcao]
+        self.emitir(operacao, destino, base[0], expoente[0])
+        return destino, 'int' if funcao == 'pot_inteiro' else 'double'
+
+
+def eh_registro(descritor):
+    return isinstance(descritor, tuple) and descritor[0] == 'registro'
+
+def eh_ponteiro(descritor):
+    return isinstance(descritor, tuple) and descritor[0] == '^'
+
+def eh_vetor(descritor):
+    return isinstance(descritor, tuple) and descritor[0] == 'vetor'
+
+def tem_chamada(ctx):
+    if isinstance(ctx, LAParser.Chamada_funcaoContext):
+        return True
+    return isinstance(ctx, ParserRuleContext) and any(tem_chamada(filho) for filho in ctx.getChildren())
+
+
+class MaquinaVirtual:
+    """Executa um ProgramaBytecode (o --run padrão).
+
+    Os registradores de cada chamada são uma lista copiada do modelo da função;
+    as chamadas empilham (retorno, registradores, destino) numa pilha própria,
+    sem recursão do Python. Vetores e registros são listas, ponteiros e
+    referências são pares (lista, posição) e os valores são os do
+    Interpretador: int com estouro em 32 bits, float arredondado a cada
+    operação, literal como bytes. A interface (entrada, saida_fd, descarregar,
+    executar) e os erros (ErroAvaliacao) também são os dele.
+    """
+
+    def __init__(self, bytecode, entrada=None, saida_fd=None):
+        self.bytecode = bytecode
+        self.entrada = entrada
+        self.saida_fd = saida_fd
+        self.saida = bytearray()
+
+    def descarregar(self):
+        """Escreve no saida_fd o que foi escrito até aqui"""
+        if self.saida_fd is not None and self.saida:
+            os.write(self.saida_fd, self.saida)
+            self.saida.clear()
+
+    def executar(self):
+        palavras = self.bytecode.codigo
+        codigo = [tuple(palavras[i:i + 4]) for i in range(0, len(palavras), 4)]
+        funcoes, dados, max_literal = self.bytecode.funcoes, self.bytecode.dados, self.bytecode.max_literal
+        saida, entrada = self.saida, self.entrada
+        float32 = struct.Struct('f')
+        pack, unpack = float32.pack, float32.unpack
+        pc, modelo = funcoes[0]
+        r = list(modelo)
+        pilha = []
+
+        # Despacho por uma cadeia de ifs, das operações mais frequentes em laços
+        # para as mais raras; 2147483647 e afins são os limites do int de 32 bits
+        try:
+            while True:
+                op, a, b, c = codigo[pc]
+                pc += 1
+                if op == B_PARA_PASSO:
+                    v = r[a] + 1
+                    if v > 2147483647:
+                        v = -2147483648
+                    r[a] = v
+                    if v <= r[b]:
+                        pc = c
+                elif op == B_LE_V:
+                    i = r[c]
+                    if i < 0:
+                        raise IndexError
+                    r[a] = r[b][i]
+                elif op == B_MOV:
+                    r[a] = r[b]
+                elif op == B_SOMA_I:
+                    v = r[b] + r[c]
+                    r[a] = v if -2147483648 <= v <= 2147483647 else (v + 2147483648) % 4294967296 - 2147483648
+                elif op == B_GRAVA_V:
+                    i = r[b]
+                    if i < 0:
+                        raise IndexError
+                    r[a][i] = r[c]
+                elif op == B_SOMA_V_I:
+                    i = r[c]
+                    if i < 0:
+                        raise IndexError
+                    v = r[a] + r[b][i]
+                    r[a] = v if -2147483648 <= v <= 2147483647 else (v + 2147483648) % 4294967296 - 2147483648
+                elif op == B_SALTA_MAIOR:
+                    if r[a] > r[b]:
+                        pc = c
+                elif op == B_SALTA_MAIOR_IGUAL:
+                    if r[a] >= r[b]:
+                        pc = c
+                elif op == B_SALTA_MENOR:
+                    if r[a] < r[b]:
+                        pc = c
+                elif op == B_SALTA_MENOR_IGUAL:
+                    if r[a] <= r[b]:
+                        pc = c
+                elif op == B_SALTA_IGUAL:
+                    if r[a] == r[b]:
+                        pc = c
+                elif op == B_SALTA_DIFERENTE:
+                    if r[a] != r[b]:
+                        pc = c
+                elif op == B_SUB_I:
+                    v = r[b] - r[c]
+                    r[a] = v if -2147483648 <= v <= 2147483647 else (v + 2147483648) % 4294967296 - 2147483648
+                elif op == B_MUL_I:
+                    v = r[b] * r[c]
+                    r[a] = v if -2147483648 <= v <= 2147483647 else (v + 2147483648) % 4294967296 - 2147483648
+                elif op == B_SALTA:
+                    pc = a
+                elif op == B_SE_FALSO:
+                    if not r[a]:
+                        pc = b
+                elif op == B_SE_VERDADE:
+                    if r[a]:
+                        pc = b
+                elif op == B_LE_CAMPO:
+                    r[a] = r[b][c]
+                elif op == B_GRAVA_CAMPO:
+                    r[a][b] = r[c]
+                elif op == B_DIV_I or op == B_MOD_I:
+                    x, y = r[b], r[c]
+                    if op == B_DIV_I:
+                        v = abs(x) // abs(y)
+                        if (x < 0) != (y < 0):
+                            v = -v
+                        if v > 2147483647:
+                            raise ErroAvaliacao('operacao / indefinida')
                     else:
-                        linha = f'scanf("{formato}",&{nome});'
-                    
-                    if self.em_funcao:
-                        self.funcoes.append(f'\t\t{linha}')
-                    elif self.em_procedimento:
-                        self.procedimentos.append(f'\t\t{linha}')
+                        v = abs(x) % abs(y)
+                        if x < 0:
+                            v = -v
+                    r[a] = v
+                elif op == B_SOMA_F or op == B_SUB_F or op == B_MUL_F or op == B_DIV_F:
+                    # Estouro do float vira ±inf (o pack de alguns Pythons recusa)
+                    x, y = r[b], r[c]
+                    if op == B_SOMA_F:
+                        v = x + y
+                    elif op == B_MUL_F:
+                        v = x * y
+                    elif op == B_SUB_F:
+                        v = x - y
                     else:
-                        self.adicionar_codigo(linha, 2)
-    
-    def processar_atribuicao_manual(self, ctx):
-        """Processa atribuição manualmente"""
-        # Verifica se é ponteiro
-        if ctx.getChildCount() >= 3 and ctx.getChild(0).getText() == '^':
-            # É um ponteiro: ^IDENT <- expressao
-            var = '*' + ctx.getChild(1).getText()
+                        v = x / y if y else dividir_real(x, y)
+                    try:
+                        r[a] = unpack(pack(v))[0]
+                    except OverflowError:
+                        r[a] = float_c(v)
+                elif op == B_SOMA_D or op == B_SUB_D or op == B_MUL_D or op == B_DIV_D:
+                    x, y = r[b], r[c]
+                    r[a] = (x + y if op == B_SOMA_D else x - y if op == B_SUB_D else x * y if op == B_MUL_D
+                            else x / y if y else dividir_real(x, y))
+                elif op == B_MENOR:
+                    r[a] = 1 if r[b] < r[c] else 0
+                elif op == B_MENOR_IGUAL:
+                    r[a] = 1 if r[b] <= r[c] else 0
+                elif op == B_MAIOR:
+                    r[a] = 1 if r[b] > r[c] else 0
+                elif op == B_MAIOR_IGUAL:
+                    r[a] = 1 if r[b] >= r[c] else 0
+                elif op == B_IGUAL:
+                    r[a] = 1 if r[b] == r[c] else 0
+                elif op == B_DIFERENTE:
+                    r[a] = 1 if r[b] != r[c] else 0
+                elif op == B_CHAMA:
+                    entrada_funcao, modelo = funcoes[b]
+                    quadro = list(modelo)
+                    for posicao, argumento in enumerate(dados[c]):
+                        quadro[posicao] = r[argumento]
+                    pilha.append((pc, r, a))
+                    if len(pilha) > LIMITE_CHAMADAS_BYTECODE:
+                        raise ErroAvaliacao('recursao profunda demais')
+                    pc, r = entrada_funcao, quadro
+                elif op == B_RETORNA:
+                    v = r[a]
+                    pc, r, destino = pilha.pop()
+                    if destino >= 0:
+                        r[destino] = v
+                elif op == B_RETORNA_NADA:
+                    pc, r, _ = pilha.pop()
+                elif op == B_ESCREVE_I or op == B_ESCREVE_R or op == B_ESCREVE_L:
+                    if op == B_ESCREVE_L:
+                        saida += r[a]
+                    elif op == B_ESCREVE_I:
+                        saida += b'%d' % r[a]
+                    else:
+                        saida += formatar_real(r[a]).encode()
+                    if len(saida) > LIMITE_SAIDA_AVALIACAO:
+                        self.descarregar()
+                elif op == B_LEIA_I or op == B_LEIA_R or op == B_LEIA_L:
+                    if entrada is None:
+                        raise ErroAvaliacao('leitura da entrada')
+                    if op == B_LEIA_I:
+                        v = entrada.ler_inteiro()
+                    elif op == B_LEIA_R:
+                        v = entrada.ler_real()
+                    else:
+                        v = entrada.ler_literal(max_literal)
+                    if v is not None:
+                        r[a] = v
+                elif op == B_LOGICO:
+                    r[a] = 1 if r[b] else 0
+                elif op == B_NAO:
+                    r[a] = 0 if r[b] else 1
+                elif op == B_NEG_I:
+                    r[a] = -r[b] if r[b] != -2147483648 else r[b]  # dá a volta como no gcc
+                elif op == B_NEG_R:
+                    r[a] = -r[b]
+                elif op == B_F32:
+                    r[a] = float_c(r[b])
+                elif op == B_INTEIRO:
+                    v = int(r[b]) if math.isfinite(r[b]) else None
+                    if v is None or not -2147483648 <= v <= 2147483647:
+                        raise ErroAvaliacao('conversao para int fora da faixa')
+                    r[a] = v
+                elif op == B_CONCATENA:
+                    r[a] = r[b] + r[c]
+                elif op == B_TRUNCA:
+                    r[a] = r[b][:max_literal]
+                elif op == B_SUBLITERAL:
+                    inicio, fim = dados[c]
+                    r[a] = r[b][inicio:fim]
+                elif op == B_GRAVA_V_REG:
+                    i = r[b]
+                    if i < 0:
+                        raise IndexError
+                    r[a][i][:] = r[c]
+                elif op == B_COPIA_REG:
+                    r[a][:] = r[b]
+                elif op == B_LE_REF:
+                    referencia = r[b]
+                    if referencia is None:
+                        raise ErroAvaliacao('ponteiro indefinido')
+                    r[a] = referencia[0][referencia[1]]
+                elif op == B_GRAVA_REF:
+                    referencia = r[a]
+                    if referencia is None:
+                        raise ErroAvaliacao('ponteiro indefinido')
+                    referencia[0][referencia[1]] = r[b]
+                elif op == B_REF:
+                    r[a] = (r, b)
+                elif op == B_REF_CAMPO:
+                    r[a] = (r[b], c)
+                elif op == B_REF_ELEM:
+                    i = r[c]
+                    if not 0 <= i < len(r[b]):
+                        raise IndexError
+                    r[a] = (r[b], i)
+                elif op == B_POT_I:
+                    r[a] = potencia_c(r[b], r[c], 'pot_inteiro')
+                elif op == B_POT_R:
+                    r[a] = potencia_c(r[b], r[c], 'pot_real')
+                elif op == B_POW:
+                    r[a] = potencia_c(r[b], r[c], 'pow')
+                elif op == B_NOVO_REG:
+                    r[a] = list(dados[b])
+                elif op == B_NOVO_VETOR:
+                    elementos, valor = dados[b]
+                    if isinstance(valor, tuple):
+                        r[a] = [list(valor) for _ in range(elementos)]
+                    else:
+                        r[a] = [valor] * elementos
+                elif op == B_COPIA_PARAM:
+                    r[a] = list(r[a])
+                elif op == B_ERRO:
+                    raise ErroAvaliacao(dados[a])
+                elif op == B_FIM:
+                    return
+                else:
+                    raise ErroAvaliacao(f'operacao {op} do bytecode')
+        except ZeroDivisionError:
+            raise ErroAvaliacao('divisao por zero')
+        except IndexError:
+            raise ErroAvaliacao('acesso fora do vetor')
+
+
+def caminho_bytecode(arquivo_entrada, max_literal):
+    """Arquivo do bytecode guardado de um programa: em PASTA_BYTECODE ao lado do
+    fonte, pelo hash do fonte, do tamanho de literal e deste compilador"""
+    assinatura = hashlib.sha256()
+    for arquivo in (arquivo_entrada, os.path.abspath(__file__)):
+        with open(arquivo, 'rb') as f:
+            assinatura.update(hashlib.sha256(f.read()).digest())
+    assinatura.update(f'{max_literal}/{VERSAO_BYTECODE}'.encode())
+    return os.path.join(os.path.dirname(os.path.abspath(arquivo_entrada)), PASTA_BYTECODE,
+                        assinatura.hexdigest()[:16] + '.labc')
+
+def carregar_bytecode(caminho):
+    """O ProgramaBytecode guardado em caminho (None se não há ou não é válido)"""
+    try:
+        with open(caminho, 'rb') as f:
+            conteudo = marshal.loads(f.read())
+        marca, versao, max_literal, palavras, funcoes, dados = conteudo
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if marca != MARCA_BYTECODE or versao != VERSAO_BYTECODE:
+        return None
+    codigo = array.array('i')
+    codigo.frombytes(palavras)
+    return ProgramaBytecode(codigo, funcoes, dados, max_literal)
+
+def compilar_bytecode(programa, max_literal=MAX_LITERAL_PADRAO, caminho=None):
+    """Compila o programa para bytecode e o guarda em caminho, se dado; None se
+    o programa usa algo que o CompiladorBytecode não traduz"""
+    try:
+        bytecode = CompiladorBytecode(programa, max_literal).compilar()
+    except ErroAvaliacao:
+        return None
+    if caminho is not None:
+        # Escrito à parte e renomeado: uma execução concorrente nunca lê metade
+        temporario = f'{caminho}.{os.getpid()}'
+        try:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            with open(temporario, 'wb') as f:
+                f.write(bytecode.serializar())
+            os.replace(temporario, caminho)
+        except OSError:
+            pass
+    return bytecode
+
+def executar_programa(programa, max_literal=MAX_LITERAL_PADRAO, bytecode=None):
+    """--run: executa o programa com a entrada e a saída padrão, sem gcc: o
+    bytecode na MaquinaVirtual, se dado, senão a árvore no Interpretador.
+    Devolve o código de saída do processo (1 se a execução parou com erro)"""
+    saida_fd = sys.stdout.fileno()
+    sys.stdout.flush()
+    if bytecode is not None:
+        executor = MaquinaVirtual(bytecode, saida_fd=saida_fd)
+    else:
+        executor = Interpretador(programa, max_literal, saida_fd=saida_fd)
+    executor.entrada = EntradaPadrao(sys.stdin.fileno(), executor.descarregar)
+    limite_anterior = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limite_anterior, LIMITE_RECURSAO_EXECUCAO))
+    try:
+        executor.executar()
+    except ErroAvaliacao as erro:
+        # Como o binário que morre no erro: o que ainda estava no buffer se perde
+        print(f'Erro de execucao: {erro}', file=sys.stderr)
+        return 1
+    finally:
+        sys.setrecursionlimit(limite_anterior)
+    executor.descarregar()
+    return 0
+
+
+def ler_argumentos():
+    """Lê os arquivos de entrada/saída e as opções do compilador"""
+    parser = argparse.ArgumentParser(prog='compilador.py', add_help=False)
+    parser.add_argument('arquivo_entrada', nargs='?')
+    parser.add_argument('arquivo_saida', nargs='?')
+    parser.add_argument('--keep-dead', action='store_true',
+                        help='nao elimina codigo morto nem declaracoes sem uso')
+    parser.add_argument('--dce-report', action='store_true',
+                        help='mostra em stderr o que foi eliminado e o ganho em tamanho e tempo de gcc')
+    parser.add_argument('--memoize', choices=('auto', 'off'), default='auto',
+                        help='guarda os resultados de funcoes recursivas puras (auto) ou nao (off)')
+    parser.add_argument('--max-literal', type=int, default=MAX_LITERAL_PADRAO,
+                        help='numero maximo de caracteres de uma variavel literal')
+    parser.add_argument('--layout-report', action='store_true',
+                        help='mostra em stderr o tamanho e o preenchimento de cada registro')
+    parser.add_argument('--parallel', action='store_true',
+                        help='paraleliza com OpenMP os lacos para sem dependencias entre iteracoes')
+    parser.add_argument('--vec-report', action='store_true',
+                        help='mostra em stderr o resultado da vetorizacao do gcc para cada laco do programa')
+    parser.add_argument('--fuse-loops', choices=('auto', 'off'), default='auto',
+                        help='funde lacos para adjacentes com os mesmos limites (auto) ou nao (off)')
+    parser.add_argument('--unroll', choices=('auto', 'off'), default='auto',
+                        help='desenrola lacos para com limites constantes (auto) ou nao (off)')
+    parser.add_argument('--cse', choices=('auto', 'off'), default='auto',
+                        help='calcula uma vez as subexpressoes repetidas em um bloco (auto) ou nao (off)')
+    parser.add_argument('--partial-eval', choices=('auto', 'off'), default='auto',
+                        help='executa na compilacao o que nao depende da entrada (auto) ou nao (off)')
+    parser.add_argument('--run', action='store_true',
+                        help='executa o programa direto no interpretador (entrada e saida padrao), sem gerar C')
+    parser.add_argument('--interpreter', choices=('bytecode', 'tree'), default='bytecode',
+                        help='com --run: compila para bytecode guardado em disco (bytecode) ou percorre a arvore '
+                             '(tree; programas recursivos executam no bytecode)')
+    parser.add_argument('--run-bench', metavar='ENTRADAS',
+                        help='compara nas entradas (arquivo ou pasta) o binario do gcc com o --run (bytecode e arvore)')
+    parser.add_argument('--pgo', metavar='ENTRADAS',
+                        help='recompila o executavel com o perfil das execucoes nas entradas (arquivo ou pasta)')
+    parser.add_argument('--autotune', metavar='ENTRADAS',
+                        help='escolhe as opcoes do gcc mais rapidas nas entradas (arquivo ou pasta) e guarda a escolha')
+    parser.add_argument('--pass-stats', action='store_true',
+                        help='mostra em stderr onde cada otimizacao foi aplicada')
+    parser.add_argument('--layout', choices=('aos', 'soa'), default='aos',
+                        help='guarda vetores de registros como vetores de structs (aos) ou um vetor por campo (soa)')
+    args, desconhecidos = parser.parse_known_args()
+    if (desconhecidos or args.arquivo_entrada is None or (args.arquivo_saida is None and not args.run)
+            or args.max_literal < 1):
+        print("Uso: python compilador.py [opcoes] <arquivo_entrada> <arquivo_saida>")
+        print("     python compilador.py --run [--max-literal=N] <arquivo_entrada> < entrada")
+        sys.exit(1)
+    return args
+
+def gerar_codigo(tree, **opcoes):
+    """Executa o gerador sobre a árvore e devolve o gerador com o código pronto"""
+    gerador = GeradorCodigo(**opcoes)
+    ParseTreeWalker().walk(gerador, tree)
+    return gerador
+
+def compilar_c(arquivo_c, arquivo_executavel, openmp=False, opcoes=()):
+    """Compila com gcc; devolve o resultado do processo e o tempo gasto em segundos"""
+    inicio = time.perf_counter()
+    comando = (['gcc', *opcoes, arquivo_c, '-o', arquivo_executavel, '-lm']
+               + (['-fopenmp'] if openmp else []))
+    resultado = subprocess.run(comando, capture_output=True, text=True)
+    return resultado, time.perf_counter() - inicio
+
+def entradas_pgo(caminho):
+    """Arquivos de entrada do treino: o próprio arquivo ou os arquivos da pasta"""
+    if os.path.isdir(caminho):
+        return sorted(os.path.join(caminho, nome) for nome in os.listdir(caminho)
+                      if os.path.isfile(os.path.join(caminho, nome)))
+    return [caminho]
+
+def executar_entradas(executavel, entradas, pasta=None):
+    """Roda o executável (ou a linha de comando, se for uma lista) uma vez por
+    entrada; devolve (segundos, saídas), com segundos None se alguma execução
+    passou do limite"""
+    inicio, saidas = time.perf_counter(), []
+    for entrada in entradas:
+        with open(entrada, 'rb') as f:
+            try:
+                comando = [executavel] if isinstance(executavel, str) else executavel
+                resultado = subprocess.run(comando, stdin=f, capture_output=True, cwd=pasta,
+                                           timeout=LIMITE_SEGUNDOS_EXECUCAO)
+            except subprocess.TimeoutExpired:
+                return None, saidas
+        saidas.append(resultado.stdout)
+    return time.perf_counter() - inicio, saidas
+
+def tempos_execucao(executavel, entradas):
+    """Tempos de REPETICOES_MEDIDA passadas pelas entradas (None se alguma
+    passou do limite) e as saídas da última"""
+    tempos, saidas = [], []
+    for _ in range(REPETICOES_MEDIDA):
+        segundos, saidas = executar_entradas(executavel, entradas)
+        if segundos is None:
+            return None, saidas
+        tempos.append(segundos)
+    return tempos, saidas
+
+def medir_execucao(executavel, entradas):
+    """Melhor tempo de REPETICOES_MEDIDA passadas pelas entradas e as saídas"""
+    tempos, saidas = tempos_execucao(executavel, entradas)
+    return (min(tempos) if tempos else None), saidas
+
+def compilar_pgo(arquivo_c, arquivo_executavel, caminho_entradas, openmp=False):
+    """Otimização guiada por perfil: compila com -fprofile-generate, roda o
+    programa nas entradas, recompila arquivo_executavel com -fprofile-use e
+    mostra (em stderr) o tempo de execução antes e depois.
+
+    O perfil fica em PASTA_PERFIS/<hash do C> ao lado do .c e é reaproveitado
+    quando o mesmo programa é compilado de novo com as mesmas entradas. A
+    compilação é feita com -c dentro da pasta do perfil para o .gcda ter sempre
+    o mesmo nome (programa.gcda).
+    """
+    entradas = entradas_pgo(caminho_entradas)
+    if not entradas:
+        print(f'PGO: nenhuma entrada em {caminho_entradas}', file=sys.stderr)
+        return False
+    with open(arquivo_c, 'rb') as f:
+        codigo = f.read()
+    pasta = os.path.join(os.path.dirname(os.path.abspath(arquivo_c)), PASTA_PERFIS, hash_programa(arquivo_c))
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, 'programa.c'), 'wb') as f:
+        f.write(codigo)
+
+    extras = ['-fopenmp'] if openmp else []
+    def gcc(*opcoes, saida):
+        objeto = subprocess.run(['gcc', '-O2', *opcoes, *extras, '-c', 'programa.c', '-o', 'programa.o'],
+                                cwd=pasta, capture_output=True, text=True)
+        if objeto.returncode != 0:
+            return objeto
+        return subprocess.run(['gcc', *opcoes, *extras, 'programa.o', '-o', saida, '-lm'],
+                              cwd=pasta, capture_output=True, text=True)
+
+    # Treino: refeito só se o perfil guardado veio de outras entradas
+    assinatura = hashlib.sha256()
+    for entrada in entradas:
+        with open(entrada, 'rb') as f:
+            assinatura.update(hashlib.sha256(f.read()).digest())
+    arquivo_assinatura = os.path.join(pasta, 'entradas.sha256')
+    perfil = os.path.join(pasta, 'programa.gcda')
+    reaproveitado = False
+    if os.path.exists(perfil) and os.path.exists(arquivo_assinatura):
+        with open(arquivo_assinatura) as f:
+            reaproveitado = f.read() == assinatura.hexdigest()
+    if not reaproveitado:
+        if os.path.exists(perfil):
+            os.remove(perfil)
+        resultado = gcc('-fprofile-generate', saida='instrumentado')
+        if resultado.returncode != 0:
+            print(f'PGO: erro no gcc instrumentado: {resultado.stderr}', file=sys.stderr)
+            return False
+        segundos, _ = executar_entradas(os.path.join(pasta, 'instrumentado'), entradas, pasta)
+        if segundos is None or not os.path.exists(perfil):
+            print('PGO: o programa instrumentado nao terminou; executavel sem perfil', file=sys.stderr)
+            return False
+        with open(arquivo_assinatura, 'w') as f:
+            f.write(assinatura.hexdigest())
+
+    resultado = gcc('-fprofile-use', '-fprofile-correction', '-Wno-missing-profile', saida='pgo')
+    if resultado.returncode != 0:
+        print(f'PGO: erro no gcc com perfil: {resultado.stderr}', file=sys.stderr)
+        return False
+    gcc(saida='o2')
+    # O executável recebido pode ter as opções de --autotune: a base é o gcc sem opções
+    compilar_c(os.path.join(pasta, 'programa.c'), os.path.join(pasta, 'padrao'), openmp)
+
+    # Tempos: build normal (gcc sem opções), -O2 e -O2 com perfil
+    medidas = []
+    for nome, executavel in (('gcc padrao', os.path.join(pasta, 'padrao')),
+                             ('gcc -O2', os.path.join(pasta, 'o2')),
+                             ('gcc -O2 com perfil', os.path.join(pasta, 'pgo'))):
+        medidas.append((nome, *medir_execucao(executavel, entradas)))
+    linhas = [f'PGO ({len(entradas)} entrada(s), perfil em {pasta}'
+              + (', reaproveitado' if reaproveitado else '') + '):']
+    base = medidas[0][1]
+    for nome, segundos, _ in medidas:
+        if segundos is None:
+            linhas.append(f'  - {nome}: passou de {LIMITE_SEGUNDOS_EXECUCAO}s')
+        elif base:
+            linhas.append(f'  - {nome}: {segundos:.3f}s ({(segundos - base) / base * 100:+.1f}%)')
         else:
-            # Atribuição normal
-            var = ctx.children[0].getText()
-            
-        expr = self.processar_expressao(ctx.expressao())
-        linha = f'{var} = {expr};'
-        
-        if self.em_funcao:
-            self.funcoes.append(f'\t\t{linha}')
-        elif self.em_procedimento:
-            self.procedimentos.append(f'\t\t{linha}')
+            linhas.append(f'  - {nome}: {segundos:.3f}s')
+    if medidas[0][2] != medidas[2][2]:
+        linhas.append('  aviso: a saida do executavel com perfil difere da do build normal')
+    print('\n'.join(linhas), file=sys.stderr)
+
+    with open(os.path.join(pasta, 'pgo'), 'rb') as origem, open(arquivo_executavel, 'wb') as destino:
+        destino.write(origem.read())
+    return True
+
+def comparar_execucao(arquivo_entrada, arquivo_executavel, caminho_entradas, max_literal,
+                      segundos_gcc):
+    """--run-bench: mostra (em stderr) o tempo do binário do gcc e do --run com
+    bytecode (sem e com o bytecode guardado) e com o Interpretador nas
+    entradas, e se as saídas são as do binário"""
+    entradas = entradas_pgo(caminho_entradas)
+    if not entradas:
+        print(f'Run-bench: nenhuma entrada em {caminho_entradas}', file=sys.stderr)
+        return False
+    comando = [sys.executable, os.path.abspath(__file__), '--run', f'--max-literal={max_literal}']
+    guardado = caminho_bytecode(arquivo_entrada, max_literal)
+    if os.path.exists(guardado):
+        os.remove(guardado)
+    # Primeira passada sem bytecode guardado: inclui análise e compilação
+    frio, _ = executar_entradas(comando + [arquivo_entrada], entradas[:1])
+    medidas = [('gcc', *medir_execucao(os.path.abspath(arquivo_executavel), entradas)),
+               ('--run bytecode', *medir_execucao(comando + [arquivo_entrada], entradas)),
+               ('--run arvore', *medir_execucao(comando + ['--interpreter=tree', arquivo_entrada], entradas))]
+
+    linhas = [f'Run-bench ({len(entradas)} entrada(s), melhor de {REPETICOES_MEDIDA}):']
+    for nome, segundos, saidas in medidas:
+        if segundos is None:
+            texto = f'passou de {LIMITE_SEGUNDOS_EXECUCAO}s'
         else:
-            self.adicionar_codigo(linha, 2)
-    
-    def exitComandose(self, ctx):
-        """Não faz nada - processamento já realizado no enterComandose"""
+            texto = f'{segundos:.3f}s'
+        if nome == 'gcc':
+            texto += f' (+ {segundos_gcc:.3f}s de gcc)'
+        elif nome == '--run bytecode' and frio is not None:
+            texto += f' (primeira entrada sem bytecode guardado: {frio:.3f}s)'
+        linhas.append(f'  - {nome}: {texto}')
+        if segundos is not None and medidas[0][1] is not None and saidas != medidas[0][2]:
+            linhas.append(f'    aviso: a saida de {nome} difere da do binario do gcc')
+    print('\n'.join(linhas), file=sys.stderr)
+    return True
+
+def hash_programa(arquivo_c):
+    """Identifica o programa pelo C gerado"""
+    with open(arquivo_c, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def ler_ajustes(arquivo_c):
+    """Banco de ajustes (hash do programa -> opções vencedoras) ao lado do .c"""
+    caminho = os.path.join(os.path.dirname(os.path.abspath(arquivo_c)), ARQUIVO_AJUSTES)
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            ajustes = json.load(f)
+    except (OSError, ValueError):
+        return caminho, {}
+    return caminho, ajustes if isinstance(ajustes, dict) else {}
+
+def opcoes_ajustadas(arquivo_c):
+    """Opções do gcc escolhidas por --autotune para este programa (vazio se nenhuma).
+    Só valem opções idênticas a uma de CONFIGURACOES_AUTOTUNE: o banco fica ao
+    lado do .c e qualquer um pode escrevê-lo"""
+    _, ajustes = ler_ajustes(arquivo_c)
+    ajuste = ajustes.get(hash_programa(arquivo_c))
+    opcoes = ajuste.get('opcoes') if isinstance(ajuste, dict) else None
+    if isinstance(opcoes, list) and tuple(opcoes) in CONFIGURACOES_AUTOTUNE:
+        return opcoes
+    return []
+
+def autotune(arquivo_c, arquivo_executavel, caminho_entradas, openmp=False):
+    """Compila o programa com cada configuração de CONFIGURACOES_AUTOTUNE,
+    mede cada uma nas entradas e recompila arquivo_executavel com a mais rápida.
+
+    Uma configuração só vence a atual se a mediana dos tempos cair mais que o
+    ruído (a variação relativa entre as repetições da configuração padrão, no
+    mínimo LIMIAR_RUIDO); empates ficam com a mais simples. Configurações cuja
+    saída difere da padrão são descartadas. Cada --autotune mede de novo; o
+    vencedor é guardado no banco de ajustes e usado nas compilações seguintes
+    do mesmo programa.
+    """
+    programa = hash_programa(arquivo_c)
+    caminho_banco, ajustes = ler_ajustes(arquivo_c)
+    entradas = entradas_pgo(caminho_entradas)
+    if not entradas:
+        print(f'Autotune: nenhuma entrada em {caminho_entradas}', file=sys.stderr)
+        return False
+
+    medidas = []  # (opções, mediana dos tempos ou motivo do descarte)
+    vencedor, tempo_vencedor, limiar, saida_padrao = None, None, LIMIAR_RUIDO, None
+    with tempfile.TemporaryDirectory() as pasta:
+        for numero, opcoes in enumerate(CONFIGURACOES_AUTOTUNE):
+            executavel = os.path.join(pasta, f'candidato_{numero}')
+            try:
+                resultado, _ = compilar_c(arquivo_c, executavel, openmp, opcoes)
+            except OSError:
+                resultado = None
+            if resultado is None or resultado.returncode != 0:
+                medidas.append((opcoes, 'erro no gcc'))
+                continue
+            tempos, saidas = tempos_execucao(executavel, entradas)
+            if tempos is None:
+                medidas.append((opcoes, f'passou de {LIMITE_SEGUNDOS_EXECUCAO}s'))
+                continue
+            if saida_padrao is None:
+                saida_padrao = saidas
+                limiar = max(LIMIAR_RUIDO, (max(tempos) - min(tempos)) / max(min(tempos), 1e-9))
+            elif saidas != saida_padrao:
+                medidas.append((opcoes, 'saida diferente'))
+                continue
+            mediana = sorted(tempos)[len(tempos) // 2]
+            medidas.append((opcoes, mediana))
+            if tempo_vencedor is None or mediana < tempo_vencedor * (1 - limiar):
+                vencedor, tempo_vencedor = opcoes, mediana
+
+    if vencedor is None:
+        print('Autotune: nenhuma configuracao executou nas entradas', file=sys.stderr)
+        return False
+    ajustes[programa] = {
+        'opcoes': list(vencedor),
+        'segundos': {' '.join(opcoes) or 'padrao': round(medida, 4)
+                     for opcoes, medida in medidas if isinstance(medida, float)},
+    }
+    try:
+        with open(caminho_banco, 'w', encoding='utf-8') as f:
+            json.dump(ajustes, f, indent=1, sort_keys=True)
+    except OSError:
         pass
-    
-    def enterComandopara(self, ctx):
-        """Processa loop for"""
-        var = ctx.IDENT().getText()
-        inicio = self.processar_expressao(ctx.expressao(0))
-        fim = self.processar_expressao(ctx.expressao(1))
-        
-        linha = f'for ({var} = {inicio}; {var} <= {fim}; {var}++) {{'
-        
-        if self.em_funcao:
-            self.funcoes.append(f'\t{linha}')
-        elif self.em_procedimento:
-            self.procedimentos.append(f'\t{linha}')
-        else:
-            self.adicionar_codigo(linha, 1)
-        
-        self.nivel_escopo += 1
-    
-    def exitComandopara(self, ctx):
-        """Finaliza loop for"""
-        self.nivel_escopo -= 1
-        
-        if self.em_funcao:
-            self.funcoes.append('\t}')
-        elif self.em_procedimento:
-            self.procedimentos.append('\t}')
-        else:
-            self.adicionar_codigo('}', 1)
+    compilar_c(arquivo_c, arquivo_executavel, openmp, vencedor)
 
-    def enterComandoenquanto(self, ctx):
-        """Processa loop while"""
-        condicao = self.processar_expressao(ctx.expressao())
-        linha = f'while ({condicao}) {{'
-        
-        if self.em_funcao:
-            self.funcoes.append(f'\t{linha}')
-        elif self.em_procedimento:
-            self.procedimentos.append(f'\t{linha}')
-        else:
-            self.adicionar_codigo(linha, 1)
-        
-        self.nivel_escopo += 1
-    
-    def exitComandoenquanto(self, ctx):
-        """Finaliza loop while"""
-        self.nivel_escopo -= 1
-        
-        if self.em_funcao:
-            self.funcoes.append('\t}')
-        elif self.em_procedimento:
-            self.procedimentos.append('\t}')
-        else:
-            self.adicionar_codigo('}', 1)
+    linhas = [f'Autotune ({len(entradas)} entrada(s), mediana de {REPETICOES_MEDIDA}, ruido {limiar * 100:.1f}%):']
+    for opcoes, medida in medidas:
+        texto = f'{medida:.3f}s' if isinstance(medida, float) else medida
+        marca = '  <- escolhida' if opcoes == vencedor else ''
+        linhas.append(f'  - {" ".join(opcoes) or "gcc padrao"}: {texto}{marca}')
+    print('\n'.join(linhas), file=sys.stderr)
+    return True
 
-    def enterComandofaca(self, ctx):
-        """Processa loop do-while"""
-        if self.em_funcao:
-            self.funcoes.append('\tdo {')
-        elif self.em_procedimento:
-            self.procedimentos.append('\tdo {')
-        else:
-            self.adicionar_codigo('do {', 1)
-        
-        self.nivel_escopo += 1
-    
-    def exitComandofaca(self, ctx):
-        """Finaliza loop do-while"""
-        self.nivel_escopo -= 1
-        condicao = self.processar_expressao(ctx.expressao())
-        
-        # Para faca-ate, a condição já vem negada (nao (...)), então não negamos novamente
-        if self.em_funcao:
-            self.funcoes.append(f'\t}} while ({condicao});')
-        elif self.em_procedimento:
-            self.procedimentos.append(f'\t}} while ({condicao});')
-        else:
-            self.adicionar_codigo(f'}} while ({condicao});', 1)
+def opcoes_gerador(args):
+    """Opções do GeradorCodigo vindas da linha de comando"""
+    return {
+        'eliminar_mortos': not args.keep_dead,
+        'memoizar': args.memoize == 'auto',
+        'max_literal': args.max_literal,
+        'layout': args.layout,
+        'paralelo': args.parallel,
+        'fundir_lacos': args.fuse_loops == 'auto',
+        'desenrolar': args.unroll == 'auto',
+        'eliminar_subexpressoes': args.cse == 'auto',
+        'avaliar_parcial': args.partial_eval == 'auto',
+    }
 
-    def processar_expressao(self, ctx):
-        """Processa expressão e retorna código C"""
-        if not ctx:
-            return ""
-        
-        # Pega o texto original e faz algumas substituições
-        texto = ctx.getText()
-        
-        # Não processa strings literais - só substitui operadores fora de strings
-        if texto.startswith('"') and texto.endswith('"'):
-            # É uma string literal, retorna sem modificações
-            return texto
-        
-        # Substitui operadores lógicos de forma mais específica
-        import re
-        
-        # Substitui "e" quando está entre operadores/números (não notação científica)
-        # Padrão: qualquer caractere que não seja letra seguido de 'e' seguido de qualquer caractere que não seja dígito
-        texto = re.sub(r'(\W)e(\W)', r'\1&&\2', texto)  # e entre não-letras
-        texto = re.sub(r'^e(\W)', r'&&\1', texto)      # e no início
-        texto = re.sub(r'(\W)e$', r'\1&&', texto)      # e no final
-        
-        # Casos específicos para números e operadores
-        texto = re.sub(r'(\d)e(\d)', r'\1 && \2', texto)  # número e número
-        texto = re.sub(r'(\))e(\()', r'\1 && \2', texto)  # ) e (
-        texto = re.sub(r'(\))e(\w)', r'\1 && \2', texto)  # ) e palavra
-        texto = re.sub(r'(\w)e(\()', r'\1 && \2', texto)  # palavra e (
-        
-        # Substitui ou e nao
-        texto = re.sub(r'\bou\b', '||', texto)
-        texto = re.sub(r'\bnao\b', '!', texto)
-        
-        # Outros operadores
-        texto = texto.replace('<>', '!=')
-        # Troca = por == apenas em comparações (não em atribuições como i=i+1)
-        # Só substitui = por == quando está entre operandos (não assignment)
-        import re
-        texto = re.sub(r'(\w+)\s*=\s*(\w+)', r'\1 == \2', texto)  # var = var
-        texto = re.sub(r'(\w+)\s*=\s*(\d+)', r'\1 == \2', texto)  # var = num
-        texto = re.sub(r'(\d+)\s*=\s*(\w+)', r'\1 == \2', texto)  # num = var
-        texto = re.sub(r'(\d+)\s*=\s*(\d+)', r'\1 == \2', texto)  # num = num
-        texto = re.sub(r'\bverdadeiro\b', '1', texto)
-        texto = re.sub(r'\bfalso\b', '0', texto)
-        
-        # Substitui constantes pelos seus valores
-        for const_nome, const_valor in self.constantes.items():
-            texto = re.sub(r'\b' + re.escape(const_nome) + r'\b', str(const_valor), texto)
-        
-        return texto
+def relatorio_codigo_morto(tree, gerador, opcoes):
+    """Compara o código gerado com e sem eliminação de código morto"""
+    linhas = ['Eliminacao de codigo morto:']
+    linhas.extend(f'  - {item}' for item in gerador.removidos)
+    if not gerador.removidos:
+        linhas.append('  (nada a eliminar)')
+
+    completo = gerar_codigo(tree, **{**opcoes, 'eliminar_mortos': False})
+    with tempfile.TemporaryDirectory() as pasta:
+        medidas = []
+        for nome, versao in (('completo', completo), ('otimizado', gerador)):
+            arquivo_c = os.path.join(pasta, nome + '.c')
+            with open(arquivo_c, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(versao.codigo) + '\n')
+            try:
+                _, segundos = compilar_c(arquivo_c, os.path.join(pasta, nome + '.out'), versao.usa_openmp)
+            except OSError:
+                segundos = None
+            medidas.append((os.path.getsize(arquivo_c), segundos))
+
+    (bytes_antes, gcc_antes), (bytes_depois, gcc_depois) = medidas
+    linhas.append(f'Codigo C: {bytes_antes} -> {bytes_depois} bytes ({bytes_depois - bytes_antes:+d})')
+    if gcc_antes is not None and gcc_depois is not None:
+        linhas.append(f'Tempo do gcc: {gcc_antes:.3f}s -> {gcc_depois:.3f}s ({gcc_depois - gcc_antes:+.3f}s)')
+    print('\n'.join(linhas), file=sys.stderr)
+
+def relatorio_layout(gerador):
+    """Tamanho e preenchimento de cada registro"""
+    linhas = ['Layout dos registros (sizeof no gcc x86-64):']
+    linhas.extend(f'  - {nome}: {tamanho} bytes ({preenchimento} de preenchimento)'
+                  for nome, tamanho, preenchimento in gerador.layouts_registros)
+    if not gerador.layouts_registros:
+        linhas.append('  (nenhum registro)')
+    print('\n'.join(linhas), file=sys.stderr)
+
+def relatorio_vetorizacao(tree, opcoes):
+    """Mensagens de -fopt-info-vec do gcc agrupadas pela linha LA de cada laço"""
+    marcado = gerar_codigo(tree, **{**opcoes, 'marcar_linhas': True})
+    linhas_c = '\n'.join(marcado.codigo).split('\n')
+
+    # Extensão de cada laço marcado no C: da linha do laço até fechar a chave
+    lacos = []  # (primeira linha C, última linha C, linha LA)
+    for numero, linha in enumerate(linhas_c, 1):
+        marca = re.search(r'/\* linha (\d+) \*/$', linha)
+        if not marca:
+            continue
+        profundidade, fim = 0, numero
+        for fim in range(numero, len(linhas_c) + 1):
+            sem_cadeias = re.sub(r'"(?:\\.|[^"\\])*"', '', linhas_c[fim - 1])
+            profundidade += sem_cadeias.count('{') - sem_cadeias.count('}')
+            if profundidade <= 0:
+                break
+        lacos.append((numero, fim, int(marca.group(1))))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo_c = os.path.join(pasta, 'vetorizacao.c')
+        with open(arquivo_c, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(linhas_c) + '\n')
+        comando = ['gcc', '-O3', '-c', arquivo_c, '-o', os.path.join(pasta, 'vetorizacao.o'),
+                   '-fopt-info-vec-optimized', '-fopt-info-vec-missed']
+        try:
+            resultado = subprocess.run(comando + (['-fopenmp'] if marcado.usa_openmp else []),
+                                       capture_output=True, text=True)
+        except OSError:
+            print('Vetorizacao: gcc nao encontrado', file=sys.stderr)
+            return
+
+    # Cada mensagem vai para o laço mais interno que contém a linha
+    mensagens = {}
+    for linha in resultado.stderr.splitlines():
+        partes = re.match(r'.*?:(\d+):\d+: (optimized|missed): (.*)', linha)
+        if not partes:
+            continue
+        numero = int(partes.group(1))
+        contem = [laco for laco in lacos if laco[0] <= numero <= laco[1]]
+        if contem:
+            texto = f'{partes.group(2)}: {partes.group(3)}'
+            lista = mensagens.setdefault(max(contem)[2], [])
+            if texto not in lista:
+                lista.append(texto)
+
+    linhas = ['Vetorizacao (gcc -O3 -fopt-info-vec):']
+    for linha_la in sorted(mensagens):
+        linhas.append(f'  - linha {linha_la}:')
+        linhas.extend(f'      {texto}' for texto in mensagens[linha_la])
+    if not mensagens:
+        linhas.append('  (nenhum laco analisado)')
+    print('\n'.join(linhas), file=sys.stderr)
+
+def relatorio_passes(gerador):
+    """Quantas vezes (e onde) cada passo de otimização foi aplicado"""
+    estatisticas = dict(gerador.estatisticas)
+    if gerador.funcoes_memo:
+        estatisticas['funcoes memoizadas'] = sorted(gerador.funcoes_memo)
+    if gerador.removidos:
+        estatisticas['codigo morto eliminado'] = gerador.removidos
+    linhas = ['Estatisticas dos passes:']
+    for passo, ondes in estatisticas.items():
+        linhas.append(f'  {passo}: {len(ondes)}')
+        linhas.extend(f'    - {onde}' for onde in ondes)
+    if not estatisticas:
+        linhas.append('  (nenhuma otimizacao aplicada)')
+    print('\n'.join(linhas), file=sys.stderr)
+
+def relatar_erros(erros):
+    """--run: os erros da análise vão para stderr; devolve o código de saída"""
+    for erro in erros:
+        print(erro, file=sys.stderr)
+    print("Fim da compilacao", file=sys.stderr)
+    return 1
 
 def main():
-    if len(sys.argv) != 3:
-        print("Uso: python compilador.py <arquivo_entrada> <arquivo_saida>")
-        sys.exit(1)
-    
-    arquivo_entrada = sys.argv[1]
-    arquivo_saida = sys.argv[2]
+    args = ler_argumentos()
+    arquivo_entrada = args.arquivo_entrada
+    arquivo_saida = args.arquivo_saida
     
     try:
+        # --run com o bytecode guardado deste programa: nem análise nem compilação
+        if args.run and args.interpreter == 'bytecode':
+            guardado = caminho_bytecode(arquivo_entrada, args.max_literal)
+            bytecode = carregar_bytecode(guardado)
+            if bytecode is not None:
+                sys.exit(executar_programa(None, args.max_literal, bytecode))
+
         # Lê o arquivo de entrada
         input_stream = FileStream(arquivo_entrada, encoding='utf-8')
         lexer = LALexer(input_stream)
@@ -1340,6 +6332,8 @@ def main():
         tree = parser.programa()
         
         # Se houve erros léxicos/sintáticos, escreve e termina
+        if erro_listener.erros and args.run:
+            sys.exit(relatar_erros(erro_listener.erros))
         if erro_listener.erros:
             with open(arquivo_saida, 'w', encoding='utf-8') as f:
                 for erro in erro_listener.erros:
@@ -1353,6 +6347,8 @@ def main():
         walker.walk(analisador_semantico, tree)
         
         # Se houve erros semânticos, escreve e termina
+        if analisador_semantico.erros and args.run:
+            sys.exit(relatar_erros(analisador_semantico.erros))
         if analisador_semantico.erros:
             with open(arquivo_saida, 'w', encoding='utf-8') as f:
                 for erro in analisador_semantico.erros:
@@ -1360,10 +6356,30 @@ def main():
                 f.write("Fim da compilacao\n")
             return
         
+        # Sem gcc: a máquina virtual executa o bytecode (guardado para as próximas
+        # execuções) ou, se ele não pôde ser gerado, o interpretador executa a árvore.
+        # Programas recursivos vão para a máquina virtual mesmo com --interpreter=tree:
+        # a árvore gasta a pilha do Python a cada chamada e não chega à profundidade
+        # do binário do gcc
+        if args.run:
+            bytecode = None
+            if args.interpreter == 'bytecode':
+                bytecode = compilar_bytecode(tree, args.max_literal, guardado)
+            elif GeradorCodigo().coletar_recursivos(tree):
+                bytecode = compilar_bytecode(tree, args.max_literal)
+            sys.exit(executar_programa(tree, args.max_literal, bytecode))
+
         # Geração de código
-        gerador = GeradorCodigo()
-        walker = ParseTreeWalker()
-        walker.walk(gerador, tree)
+        opcoes = opcoes_gerador(args)
+        gerador = gerar_codigo(tree, **opcoes)
+        if args.dce_report:
+            relatorio_codigo_morto(tree, gerador, opcoes)
+        if args.layout_report:
+            relatorio_layout(gerador)
+        if args.vec_report:
+            relatorio_vetorizacao(tree, opcoes)
+        if args.pass_stats:
+            relatorio_passes(gerador)
         
         # Escreve o código C no arquivo de saída
         with open(arquivo_saida, 'w', encoding='utf-8') as f:
@@ -1376,18 +6392,28 @@ def main():
             arquivo_executavel = arquivo_saida.rsplit('.c', 1)[0] + '.out'
             try:
                 # Compila com gcc
-                resultado = subprocess.run(['gcc', arquivo_saida, '-o', arquivo_executavel], 
-                                         capture_output=True, text=True)
-                if resultado.returncode != 0:
-                    # Se houve erro na compilação, escreve erro no arquivo de saída
-                    with open(arquivo_saida, 'w', encoding='utf-8') as f:
-                        f.write(f"Erro na compilacao: {resultado.stderr}\n")
-                        f.write("Fim da compilacao\n")
-            except Exception as e:
+                resultado, segundos_gcc = compilar_c(arquivo_saida, arquivo_executavel, gerador.usa_openmp,
+                                                     opcoes_ajustadas(arquivo_saida))
+            except FileNotFoundError:
                 # Se gcc não está disponível, mantém apenas o código C
-                pass
+                return
+            if resultado.returncode != 0:
+                # Se houve erro na compilação, escreve erro no arquivo de saída
+                with open(arquivo_saida, 'w', encoding='utf-8') as f:
+                    f.write(f"Erro na compilacao: {resultado.stderr}\n")
+                    f.write("Fim da compilacao\n")
+                return
+            if args.autotune:
+                autotune(arquivo_saida, arquivo_executavel, args.autotune, gerador.usa_openmp)
+            if args.pgo:
+                compilar_pgo(arquivo_saida, arquivo_executavel, args.pgo, gerador.usa_openmp)
+            if args.run_bench:
+                comparar_execucao(arquivo_entrada, arquivo_executavel, args.run_bench, args.max_literal,
+                                  segundos_gcc)
         
     except Exception as e:
+        if args.run:
+            sys.exit(relatar_erros([f"Erro durante a compilacao: {str(e)}"]))
         with open(arquivo_saida, 'w', encoding='utf-8') as f:
             f.write(f"Erro durante a compilacao: {str(e)}\n")
             f.write("Fim da compilacao\n")